@@ -0,0 +1,359 @@
+# run.py
+"""插件热点路径的无界面基准测试
+
+使用 stubs/ 中的 bpy 与 addon_utils 替身在普通 CPython 中运行，对不同数量的合成插件
+测量列表刷新、重载、顶部栏绘制、下拉列表查找与重载后首次导入的耗时，输出随插件数量的增长曲线，
+并与保存的基准比较，变慢超过容差时以非零状态退出
+
+    python benchmarks/run.py                      # 运行并与 baseline.json 比较
+    python benchmarks/run.py --update-baseline    # 运行并保存为新的基准
+
+每次运行使用多个独立进程，每项取最小值；疑似变慢时重新运行确认。
+比较使用相对值: 每项耗时除以同一进程中固定参考负载的耗时，基准文件因此可以在不同机器之间使用
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import logging
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from typing import Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(os.path.dirname(HERE), "src")
+PACKAGE = "addon_reloader"
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+# 每个样本至少运行的时间(纳秒)，过快的操作会重复多次取平均
+_MIN_SAMPLE_NS = 5_000_000
+_MAX_LOOPS = 1 << 16
+
+# sys.path 上模拟的其他目录（目录数、每个目录的模块数）
+_SITE_DIRS = 10
+_SITE_ENTRIES = 200
+
+sys.path.insert(0, os.path.join(HERE, "stubs"))
+sys.path.insert(0, HERE)
+
+import addon_utils  # noqa: E402  (替身)
+import bpy  # noqa: E402  (替身)
+import synthetic  # noqa: E402
+
+
+class _Layout:
+    """UILayout 替身: 所有绘制调用都返回自身"""
+
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: self
+
+
+def load_addon() -> types.ModuleType:
+    """以包的形式导入 src 并注册"""
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, os.path.join(SRC, "__init__.py"), submodule_search_locations=[SRC])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+
+    prefs = module.preferences.ADDONRELOADER_AP_preferences()
+    bpy.context.preferences.addons[PACKAGE] = types.SimpleNamespace(preferences=prefs)
+    module.register()
+    bpy.context.window_manager.addonreloader = module.AddonReloaderPropertyGroup()
+    return module
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """返回单次调用的最短耗时(毫秒)，与 timeit 相同，取最小值并在计时期间暂停垃圾回收"""
+    func()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _measure(func, repeat)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _measure(func: Callable[[], object], repeat: int) -> float:
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= _MIN_SAMPLE_NS or loops >= _MAX_LOOPS:
+            break
+        loops *= 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter_ns() - start) / loops)
+    return min(samples) / 1e6
+
+
+def _reference_work() -> None:
+    """固定的纯 Python 参考负载（字典、字符串与排序，与插件的热点路径相似）"""
+    table = {f"bench_addon_{i:04d}": f"Bench Addon {i}".lower() for i in range(2000)}
+    words = sorted(value.split()[-1] for value in table.values())
+    "".join(words)
+
+
+def reference_ms(repeat: int) -> float:
+    """参考负载的耗时(毫秒)"""
+    return measure(_reference_work, repeat)
+
+
+def _purge_synthetic() -> None:
+    """禁用并移除上一组合成插件"""
+    for name in list(sys.modules):
+        if name.startswith("bench_addon_"):
+            root = name.split(".", 1)[0]
+            if addon_utils.check(root)[0]:
+                addon_utils.disable(root)
+            sys.modules.pop(name, None)
+    addon_utils.reset()
+
+
+def run_size(addon, root: str, size: int, args) -> Dict[str, float]:
+    """生成 size 个插件并测量各热点路径"""
+    from addon_reloader import catalog, import_cache, operators, precompile, search, ui, utils
+    from addon_reloader.data_manager import dm
+
+    _purge_synthetic()
+    tree = os.path.join(root, f"n{size}")
+    names = synthetic.make_tree(tree, size, args.submodules, args.weight)
+    addon_utils.search_paths[:] = [tree]
+    sys.path.insert(0, tree)
+    try:
+        target = names[0]
+        addon_utils.enable(target)
+        catalog.clear()
+        utils.refresh_addon_list(force=True)
+        utils.select_addon(bpy.context, names[-1])
+        # 选择插件会启动后台预编译，等它结束，避免与计时争用解释器
+        precompile.wait(60.0)
+
+        def refresh_cold():
+            catalog.clear()
+            addon_utils.reset_fake_modules()
+            utils.refresh_addon_list(force=True)
+
+        def refresh_incremental():
+            catalog.mark(target)
+            utils.refresh_addon_list()
+
+        header = types.SimpleNamespace(layout=_Layout())
+        reloader = operators.ADDONRELOADER_OT_reload_addon()
+        query = f"bench {size - 1}"
+        # 在下拉列表的搜索框中选定最后一个插件
+        label = dm.search_labels[names[-1]]
+
+        # 重载后下一次导入的查找: 失效的目录需要重新列出
+        def first_import_global():
+            importlib.invalidate_caches()
+            importlib.util.find_spec("bench_missing_module")
+
+        def first_import_targeted():
+            import_cache.invalidate(target)
+            importlib.util.find_spec("bench_missing_module")
+
+        results = {
+            "refresh_cold": measure(refresh_cold, args.repeat),
+            "refresh_rescan": measure(lambda: utils.refresh_addon_list(force=True), args.repeat),
+            "refresh_incremental": measure(refresh_incremental, args.repeat),
+            "refresh_cached": measure(utils.refresh_addon_list, args.repeat),
+            "draw_topbar": measure(lambda: ui.draw_topbar_menu(header, bpy.context), args.repeat),
+            "dropdown_lookup": measure(lambda: search.resolve(label), args.repeat),
+            "search": measure(lambda: search.rank(query), args.repeat),
+            "reload": measure(lambda: reloader._reload_modules(bpy.context, target, True), args.repeat),
+            "first_import_global": measure(first_import_global, args.repeat),
+            "first_import_targeted": measure(first_import_targeted, args.repeat),
+        }
+        assert dm.show_index, "synthetic addons missing from the list"
+        return results
+    finally:
+        sys.path.remove(tree)
+
+
+def scaling(sizes: List[int], values: List[float]) -> float:
+    """首尾两点的对数斜率: 约 0 为常数，约 1 为线性"""
+    if len(sizes) < 2 or values[0] <= 0 or values[-1] <= 0:
+        return 0.0
+    return math.log(values[-1] / values[0]) / math.log(sizes[-1] / sizes[0])
+
+
+def print_table(sizes: List[int], results: Dict[str, Dict[str, float]]) -> None:
+    header = f"{'metric':<22}" + "".join(f"{f'n={n}':>12}" for n in sizes) + f"{'scaling':>10}"
+    print(header)
+    print("-" * len(header))
+    for metric, by_size in results.items():
+        values = [by_size[str(n)] for n in sizes]
+        cells = "".join(f"{value:>12.4f}" for value in values)
+        print(f"{metric:<22}{cells}{f'n^{scaling(sizes, values):.2f}':>10}")
+    print("(milliseconds, best of --repeat samples)")
+
+
+def compare(baseline: dict, config: dict, relative: Dict[str, Dict[str, float]],
+            reference: float, tolerance: float, floor_ms: float) -> List[str]:
+    """返回超过容差的变慢项（按相对参考负载的倍数比较，差值换算为本机毫秒后再与 floor_ms 比较）"""
+    if baseline.get("config") != config:
+        print("baseline was recorded with different parameters, skipping comparison")
+        return []
+    if "relative" not in baseline:
+        print("baseline has no relative timings, re-record it with --update-baseline")
+        return []
+    regressions = []
+    for metric, by_size in relative.items():
+        for size, value in by_size.items():
+            base = baseline["relative"].get(metric, {}).get(size)
+            if base is None:
+                continue
+            if value > base * (1.0 + tolerance) and (value - base) * reference > floor_ms:
+                regressions.append(
+                    f"{metric} n={size}: {value:.4f}x reference vs baseline {base:.4f}x "
+                    f"(+{(value / base - 1.0) * 100.0:.0f}%)")
+    return regressions
+
+
+def run_worker(args, sizes: List[int]) -> Dict[str, object]:
+    """在当前进程中运行所有规模，返回耗时与本进程的参考负载耗时"""
+    if not args.verbose:
+        # 插件只在没有处理器时配置日志
+        logger = logging.getLogger("RA")
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.WARNING)
+    addon = load_addon()
+    if args.verbose:
+        logging.getLogger("RA").setLevel(logging.DEBUG)
+    root = tempfile.mkdtemp(prefix="addon_reloader_bench_")
+    site_paths = synthetic.make_site_packages(os.path.join(root, "site"), _SITE_DIRS, _SITE_ENTRIES)
+    sys.path.extend(site_paths)
+    results: Dict[str, Dict[str, float]] = {}
+    # 开始与结束时各测一次参考负载，取较小值
+    reference = reference_ms(args.repeat)
+    try:
+        for size in sizes:
+            for metric, value in run_size(addon, root, size, args).items():
+                results.setdefault(metric, {})[str(size)] = round(value, 6)
+        reference = min(reference, reference_ms(args.repeat))
+    finally:
+        _purge_synthetic()
+        addon.unregister()
+        for path in site_paths:
+            sys.path.remove(path)
+        shutil.rmtree(root, ignore_errors=True)
+    return {"results": results, "reference_ms": round(reference, 6)}
+
+
+def _keep_min(merged: Dict[str, Dict[str, float]], metric: str, size: str, value: float) -> None:
+    by_size = merged.setdefault(metric, {})
+    by_size[size] = min(value, by_size.get(size, value))
+
+
+def run_processes(argv: List[str], count: int, results: Dict[str, Dict[str, float]],
+                  relative: Dict[str, Dict[str, float]], references: List[float]) -> None:
+    """在 count 个独立进程中运行，耗时与相对值每项保留最小值
+
+    同一进程内的多次测量差异很小，进程之间（内存布局、调度）的差异却可能很大；
+    相对值使用同一进程的参考负载，进程整体偏慢时两者一起变慢
+    """
+    for _ in range(count):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", *argv],
+            check=True, stdout=subprocess.PIPE, text=True).stdout
+        worker = json.loads(output.splitlines()[-1])
+        reference = worker["reference_ms"]
+        references.append(reference)
+        for metric, by_size in worker["results"].items():
+            for size, value in by_size.items():
+                _keep_min(results, metric, size, value)
+                _keep_min(relative, metric, size, round(value / reference, 6))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="10,50,200", help="comma-separated addon counts")
+    parser.add_argument("--submodules", type=int, default=5, help="submodules per addon")
+    parser.add_argument("--weight", type=int, default=20, help="functions (and import-time work) per submodule")
+    parser.add_argument("--repeat", type=int, default=9, help="samples per measurement")
+    parser.add_argument("--processes", type=int, default=3, help="worker processes per run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed slowdown relative to the reference workload (1.0 = 100%%)")
+    parser.add_argument("--retries", type=int, default=2, help="extra runs to confirm a suspected regression")
+    parser.add_argument("--floor-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--verbose", action="store_true", help="show the addon's log output")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    config = {"sizes": sizes, "submodules": args.submodules, "weight": args.weight}
+    if args.worker:
+        print(json.dumps(run_worker(args, sizes)))
+        return 0
+
+    worker_argv = [
+        "--sizes", ",".join(map(str, sizes)), "--submodules", str(args.submodules),
+        "--weight", str(args.weight), "--repeat", str(args.repeat),
+    ] + (["--verbose"] if args.verbose else [])
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results: Dict[str, Dict[str, float]] = {}
+    relative: Dict[str, Dict[str, float]] = {}
+    references: List[float] = []
+    run_processes(worker_argv, args.processes, results, relative, references)
+    regressions: List[str] = []
+    if baseline is not None:
+        regressions = compare(baseline, config, relative, min(references), args.tolerance, args.floor_ms)
+        # 疑似变慢时在新的进程中重新运行确认，排除偶发的干扰
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            print(f"{len(regressions)} possible regressions, running again to confirm")
+            run_processes(worker_argv, args.processes, results, relative, references)
+            regressions = compare(baseline, config, relative, min(references), args.tolerance, args.floor_ms)
+
+    print_table(sizes, results)
+    print(f"reference workload: {min(references):.4f} ms")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": config,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "reference_ms": min(references),
+                "results": results,
+                "relative": relative,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("no baseline found, run with --update-baseline to create one")
+        return 0
+    if regressions:
+        print("regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
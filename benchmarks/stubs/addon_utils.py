@@ -0,0 +1,115 @@
+# addon_utils.py
+"""基准测试使用的 addon_utils 替身
+
+与 Blender 相同: modules() 只用 ast 读取 bl_info（不导入插件），按文件修改时间缓存；
+enable()/disable() 导入插件并调用 register()/unregister()
+"""
+import ast
+import importlib
+import os
+import sys
+import types
+from typing import Dict, List, Tuple
+
+# 插件搜索目录（由基准测试设置）
+search_paths: List[str] = []
+
+# 入口文件 -> (mtime, 只含 bl_info 的模块)
+_fake_modules: Dict[str, Tuple[float, types.ModuleType]] = {}
+_enabled = set()
+
+
+def paths() -> List[str]:
+    return list(search_paths)
+
+
+def _read_bl_info(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "bl_info" for target in node.targets):
+            return ast.literal_eval(node.value)
+    return {}
+
+
+def _fake_module(name: str, path: str) -> types.ModuleType:
+    mtime = os.path.getmtime(path)
+    cached = _fake_modules.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    module = types.ModuleType(name)
+    module.__file__ = path
+    module.bl_info = _read_bl_info(path)
+    _fake_modules[path] = (mtime, module)
+    return module
+
+
+def modules_refresh() -> None:
+    for path in list(_fake_modules):
+        if not os.path.exists(path):
+            del _fake_modules[path]
+
+
+def modules(module_cache=None, refresh: bool = True) -> List[types.ModuleType]:
+    if refresh:
+        modules_refresh()
+    result = []
+    for search_path in search_paths:
+        for name in sorted(os.listdir(search_path)):
+            path = os.path.join(search_path, name)
+            if os.path.isfile(os.path.join(path, "__init__.py")):
+                result.append(_fake_module(name, os.path.join(path, "__init__.py")))
+            elif name.endswith(".py"):
+                result.append(_fake_module(name[:-3], path))
+    return result
+
+
+def reset_fake_modules() -> None:
+    """清空 bl_info 缓存（相当于首次扫描）"""
+    _fake_modules.clear()
+
+
+def reset() -> None:
+    """清空缓存与启用状态"""
+    _fake_modules.clear()
+    _enabled.clear()
+
+
+def check(module_name: str) -> Tuple[bool, bool]:
+    module = sys.modules.get(module_name)
+    return module_name in _enabled, bool(getattr(module, "__addon_enabled__", False))
+
+
+def check_extension(module_name: str) -> bool:
+    return module_name.startswith("bl_ext.")
+
+
+def enable(module_name: str, default_set: bool = False, persistent: bool = False, handle_error=None):
+    try:
+        module = importlib.import_module(module_name)
+        module.register()
+        module.__addon_enabled__ = True
+    except Exception as e:
+        if handle_error is not None:
+            handle_error(e)
+        else:
+            print(f"enable {module_name} failed: {e}")
+        return None
+    _enabled.add(module_name)
+    return module
+
+
+def disable(module_name: str, default_set: bool = False, handle_error=None) -> None:
+    module = sys.modules.get(module_name)
+    _enabled.discard(module_name)
+    if module is not None:
+        module.__addon_enabled__ = False
+    if module is not None and hasattr(module, "unregister"):
+        try:
+            module.unregister()
+        except Exception as e:
+            if handle_error is not None:
+                handle_error(e)
+            else:
+                print(f"disable {module_name} failed: {e}")
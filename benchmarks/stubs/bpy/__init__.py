@@ -0,0 +1,200 @@
+# bpy/__init__.py
+"""基准测试使用的 bpy 替身: 只实现本插件用到的接口，行为尽量接近 Blender"""
+import types as _types
+
+from . import props  # noqa: F401  (bpy.props)
+
+
+class _Registry(_types.ModuleType):
+    """bpy.types: 未定义的类型按需创建（菜单、空间类型等）"""
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        cls = type(name, (bpy_struct,), {})
+        setattr(self, name, cls)
+        return cls
+
+
+class bpy_struct:
+    """按注解中属性的默认值初始化实例"""
+
+    def __init__(self):
+        for klass in reversed(type(self).__mro__):
+            for name, value in vars(klass).get("__annotations__", {}).items():
+                if isinstance(value, props.Property):
+                    setattr(self, name, value.initial())
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        setattr(self, name, value)
+
+
+class _Drawable(bpy_struct):
+    """可以 append()/prepend() 绘制函数的类型（菜单、标题栏）"""
+
+    @classmethod
+    def _funcs(cls):
+        draw = vars(cls).get("draw")
+        if draw is None or not hasattr(draw, "_draw_funcs"):
+            def draw(self, context):
+                for func in draw._draw_funcs:
+                    func(self, context)
+            draw._draw_funcs = []
+            cls.draw = draw
+        return draw._draw_funcs
+
+    @classmethod
+    def append(cls, func):
+        cls._funcs().append(func)
+
+    @classmethod
+    def prepend(cls, func):
+        cls._funcs().insert(0, func)
+
+    @classmethod
+    def remove(cls, func):
+        cls._funcs().remove(func)
+
+
+class _Space(bpy_struct):
+    _handles = []
+
+    @classmethod
+    def draw_handler_add(cls, callback, args, region_type, draw_type):
+        handle = object()
+        cls._handles.append(handle)
+        return handle
+
+    @classmethod
+    def draw_handler_remove(cls, handle, region_type):
+        cls._handles.remove(handle)
+
+
+class Operator(bpy_struct):
+    bl_idname = ""
+
+    def report(self, report_type, message):
+        pass
+
+
+types = _Registry("bpy.types")
+types.bpy_struct = bpy_struct
+types.Operator = Operator
+types.PropertyGroup = type("PropertyGroup", (bpy_struct,), {})
+types.AddonPreferences = type("AddonPreferences", (bpy_struct,), {})
+types.Panel = type("Panel", (_Drawable,), {})
+types.Menu = type("Menu", (_Drawable,), {})
+types.Context = object
+types.Event = object
+types.TOPBAR_HT_upper_bar = type("TOPBAR_HT_upper_bar", (_Drawable,), {})
+types.TOPBAR_MT_editor_menus = type("TOPBAR_MT_editor_menus", (_Drawable,), {})
+for _name in (
+    "SpaceView3D", "SpaceImageEditor", "SpaceNodeEditor", "SpaceSequenceEditor",
+    "SpaceClipEditor", "SpaceGraphEditor", "SpaceDopeSheetEditor", "SpaceNLA",
+    "SpaceTextEditor", "SpaceOutliner", "SpaceProperties", "SpaceFileBrowser",
+    "SpaceConsole", "SpaceInfo", "SpacePreferences", "SpaceSpreadsheet",
+):
+    setattr(types, _name, type(_name, (_Space,), {"_handles": []}))
+
+
+class _Timers:
+    def __init__(self):
+        self._registered = {}
+
+    def register(self, function, first_interval=0.0, persistent=False):
+        self._registered[function] = first_interval
+
+    def unregister(self, function):
+        if function not in self._registered:
+            raise ValueError("timer not registered")
+        del self._registered[function]
+
+    def is_registered(self, function):
+        return function in self._registered
+
+
+def _persistent(function):
+    function._bpy_persistent = True
+    return function
+
+
+class _Handlers:
+    persistent = staticmethod(_persistent)
+
+    def __init__(self):
+        for name in (
+            "depsgraph_update_pre", "depsgraph_update_post", "load_pre", "load_post",
+            "save_pre", "save_post", "frame_change_pre", "frame_change_post",
+            "undo_post", "redo_post", "_extension_repos_sync",
+        ):
+            setattr(self, name, [])
+
+
+app = _types.SimpleNamespace(
+    timers=_Timers(),
+    handlers=_Handlers(),
+    version=(4, 2, 0),
+    background=True,
+    binary_path="",
+)
+
+
+def _register_class(cls):
+    if getattr(cls, "is_registered", False):
+        raise ValueError(f"{cls.__name__} already registered")
+    cls.is_registered = True
+
+
+def _unregister_class(cls):
+    if not getattr(cls, "is_registered", False):
+        raise RuntimeError(f"{cls.__name__} not registered")
+    cls.is_registered = False
+
+
+utils = _types.SimpleNamespace(register_class=_register_class, unregister_class=_unregister_class)
+
+
+class _MsgBus:
+    def subscribe_rna(self, key=None, owner=None, args=(), notify=None, options=set()):
+        pass
+
+    def clear_by_owner(self, owner):
+        pass
+
+
+msgbus = _MsgBus()
+
+
+class _Ops:
+    """bpy.ops.<模块>.<操作>(): 不执行任何操作"""
+
+    def __getattr__(self, name):
+        return _types.SimpleNamespace(**{})
+
+
+ops = _Ops()
+
+
+class _Addons(dict):
+    """context.preferences.addons"""
+
+    def get(self, name, default=None):
+        return dict.get(self, name, default)
+
+
+class _WindowManager(bpy_struct):
+    def __init__(self):
+        super().__init__()
+        self.windows = []
+
+
+context = _types.SimpleNamespace(
+    preferences=_types.SimpleNamespace(addons=_Addons()),
+    window_manager=_WindowManager(),
+    scene=None,
+    window=None,
+    region=_types.SimpleNamespace(alignment="RIGHT"),
+)
@@ -0,0 +1,38 @@
+# bpy/props.py
+"""bpy.props 替身: 记录属性类型与默认值"""
+
+
+class Property:
+    def __init__(self, kind: str, keywords: dict):
+        self.kind = kind
+        self.keywords = keywords
+
+    def initial(self):
+        """实例上的初始值"""
+        if "default" in self.keywords:
+            return self.keywords["default"]
+        if self.kind == "Enum":
+            items = self.keywords.get("items")
+            return items[0][0] if isinstance(items, (list, tuple)) and items else ""
+        if self.kind == "Collection":
+            return []
+        if self.kind == "Pointer":
+            klass = self.keywords.get("type")
+            return klass() if klass is not None else None
+        return {"Bool": False, "Int": 0, "Float": 0.0, "String": ""}.get(self.kind)
+
+
+def _factory(kind: str):
+    def make(**keywords):
+        return Property(kind, keywords)
+    make.__name__ = f"{kind}Property"
+    return make
+
+
+BoolProperty = _factory("Bool")
+IntProperty = _factory("Int")
+FloatProperty = _factory("Float")
+StringProperty = _factory("String")
+EnumProperty = _factory("Enum")
+PointerProperty = _factory("Pointer")
+CollectionProperty = _factory("Collection")
@@ -0,0 +1,103 @@
+# synthetic.py
+"""生成合成插件目录: N 个插件，每个 M 个子模块，导入负载可调"""
+import os
+
+
+def _submodule_source(index: int, weight: int) -> str:
+    """子模块源码: 依赖前一个子模块，包含 weight 个函数、一个类与导入时的计算"""
+    lines = ["import bpy", ""]
+    if index:
+        lines += [f"from . import mod_{index - 1}", ""]
+    lines += [
+        f"_TABLE = [k * k for k in range({weight * 200})]",
+        "",
+    ]
+    for k in range(weight):
+        lines += [
+            f"def func_{k}(value):",
+            f"    return value * {k} + len(_TABLE)",
+            "",
+        ]
+    lines += [
+        f"class BENCH_OT_op_{index}(bpy.types.Operator):",
+        f'    bl_idname = "bench.op_{index}"',
+        f'    bl_label = "Op {index}"',
+        "",
+        "    def execute(self, context):",
+        '        return {"FINISHED"}',
+        "",
+        "",
+        "def register():",
+        f"    bpy.utils.register_class(BENCH_OT_op_{index})",
+        "",
+        "",
+        "def unregister():",
+        f"    bpy.utils.unregister_class(BENCH_OT_op_{index})",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def _init_source(index: int, submodules: int) -> str:
+    names = [f"mod_{j}" for j in range(submodules)]
+    lines = [
+        "bl_info = {",
+        f'    "name": "Bench Addon {index}",',
+        f'    "version": (1, 0, {index}),',
+        '    "blender": (4, 2, 0),',
+        '    "category": "Development",',
+        "}",
+        "",
+    ]
+    if names:
+        lines += [f"from . import {', '.join(names)}", "", f"_modules = ({', '.join(names)},)"]
+    else:
+        lines += ["_modules = ()"]
+    lines += [
+        "",
+        "",
+        "def register():",
+        "    for module in _modules:",
+        "        module.register()",
+        "",
+        "",
+        "def unregister():",
+        "    for module in reversed(_modules):",
+        "        module.unregister()",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def addon_name(index: int) -> str:
+    return f"bench_addon_{index:04d}"
+
+
+def make_tree(root: str, addons: int, submodules: int, weight: int) -> list:
+    """在 root 下生成插件，返回插件模块名列表"""
+    os.makedirs(root, exist_ok=True)
+    names = []
+    for i in range(addons):
+        name = addon_name(i)
+        package = os.path.join(root, name)
+        os.makedirs(package, exist_ok=True)
+        with open(os.path.join(package, "__init__.py"), "w", encoding="utf-8") as f:
+            f.write(_init_source(i, submodules))
+        for j in range(submodules):
+            with open(os.path.join(package, f"mod_{j}.py"), "w", encoding="utf-8") as f:
+                f.write(_submodule_source(j, weight))
+        names.append(name)
+    return names
+
+
+def make_site_packages(root: str, dirs: int, entries: int) -> list:
+    """生成 dirs 个各含 entries 个模块的目录（模拟 sys.path 上的其他目录），返回目录列表"""
+    paths = []
+    for i in range(dirs):
+        path = os.path.join(root, f"site_{i}")
+        os.makedirs(path, exist_ok=True)
+        for k in range(entries):
+            with open(os.path.join(path, f"site_{i}_mod_{k}.py"), "w", encoding="utf-8") as f:
+                f.write("")
+        paths.append(path)
+    return paths
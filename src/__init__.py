@@ -1,7 +1,25 @@
 # __init__.py
 import bpy
 
-from . import ui, operators, utils
+from . import log, ui, broadcast, callback_cleanup, catalog, control_server, leak_check, operators, precompile, preferences, scheduler, search, utils, watcher
+
+
+# 批量重载选择项
+class AddonReloaderBatchItem(bpy.types.PropertyGroup):
+    label: bpy.props.StringProperty()  # type: ignore
+    selected: bpy.props.BoolProperty(default=False)  # type: ignore
+
+
+def _search_addons(self, context, edit_text):
+    """搜索框结果（已排序）"""
+    return search.search_items(edit_text)
+
+
+def _select_searched(self, context):
+    """在搜索框中选定插件"""
+    module_name = search.resolve(self.search)
+    if module_name is not None:
+        utils.select_addon(context, module_name)
 
 
 # 插件属性组定义
@@ -13,13 +31,37 @@ class AddonReloaderPropertyGroup(bpy.types.PropertyGroup):
         options={'SKIP_SAVE'},
     )  # type: ignore
 
+    batch_items: bpy.props.CollectionProperty(
+        type=AddonReloaderBatchItem,
+    )  # type: ignore
+
+    search: bpy.props.StringProperty(
+        name="Search",
+        description="Search addons and extensions by name or module (favorites and recently used first)",
+        search=_search_addons,
+        search_options=set(),
+        update=_select_searched,
+        options={'SKIP_SAVE'},
+    )  # type: ignore
+
 
 # 插件类列表
 classes = (
+    AddonReloaderBatchItem,
     AddonReloaderPropertyGroup,
+    preferences.ADDONRELOADER_AP_preferences,
     operators.ADDONRELOADER_OT_reload_addon,
+    operators.ADDONRELOADER_OT_batch_reload,
     operators.ADDONRELOADER_OT_dropdown_list,
+    operators.ADDONRELOADER_OT_toggle_favorite,
     operators.ADDONRELOADER_OT_refresh_list,
+    operators.ADDONRELOADER_OT_measure_refresh,
+    operators.ADDONRELOADER_OT_show_import_profile,
+    operators.ADDONRELOADER_OT_export_import_profile,
+    operators.ADDONRELOADER_OT_show_leak_report,
+    operators.ADDONRELOADER_OT_show_log,
+    operators.ADDONRELOADER_OT_copy_log,
+    operators.ADDONRELOADER_OT_clear_log,
     operators.ADDONRELOADER_OT_open_addon_folder,
     operators.ADDONRELOADER_OT_enable_or_disable_addon,
 )
@@ -27,6 +69,9 @@ classes = (
 
 def register():
     """注册插件"""
+    # 禁用后再次启用时重新启动日志线程
+    log.setup_logger()
+
     # 获取当前插件的模块名称
     utils.get_my_module_names(__package__)
 
@@ -34,6 +79,11 @@ def register():
     for cls in classes:
         bpy.utils.register_class(cls)
 
+    # 按偏好设置调整日志级别
+    prefs = preferences.get_prefs()
+    if prefs:
+        log.configure_logging(prefs.log_level, prefs.log_buffer_size)
+
     # 注册属性组
     bpy.types.WindowManager.addonreloader = bpy.props.PointerProperty(
         type=AddonReloaderPropertyGroup
@@ -42,12 +92,32 @@ def register():
     # 注册顶部菜单绘制函数
     bpy.types.TOPBAR_HT_upper_bar.append(ui.draw_topbar_menu)
 
+    # 记录绘制回调与 msgbus 订阅，重载时清理插件遗留的回调
+    callback_cleanup.install()
+
+    # 监听插件启用/禁用、扩展仓库同步与目录变化，按需更新插件列表
+    catalog.install()
+
     # 注册Blender启动后刷新插件列表的处理器
     bpy.app.timers.register(utils.check_blender_ready)
 
+    # 后台模式 (blender -b) 中定时器不会执行，直接登记本实例；转发的重载由脚本调用 broadcast.poll() 处理
+    if bpy.app.background and prefs and prefs.broadcast_reload:
+        broadcast.start(prefs.broadcast_dir, prefs.broadcast_timeout)
+
 
 def unregister():
     """注销插件"""
+    # 停止文件监视、后台重载与后台编译（先停止调度，等待中的控制连接会收到失败回复）
+    watcher.stop()
+    scheduler.shutdown()
+    control_server.stop()
+    broadcast.stop()
+    precompile.shutdown()
+    leak_check.shutdown()
+    callback_cleanup.uninstall()
+    catalog.uninstall()
+
     # 注销顶部菜单绘制函数
     bpy.types.TOPBAR_HT_upper_bar.remove(ui.draw_topbar_menu)
 
@@ -57,3 +127,6 @@ def unregister():
     # 注销所有类（按相反顺序）
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
+
+    # 输出剩余的日志并停止日志线程
+    log.shutdown_logger()
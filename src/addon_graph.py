@@ -0,0 +1,134 @@
+# addon_graph.py
+import sys
+from types import ModuleType
+from typing import Dict, Iterable, List, Optional, Set
+
+from .data_manager import dm
+from .log import log
+
+
+def owner_root(module_name: str, roots: Iterable[str]) -> Optional[str]:
+    """返回模块所属的插件包（最长前缀匹配）"""
+    best = None
+    for root in roots:
+        if module_name == root or module_name.startswith(f"{root}."):
+            if best is None or len(root) > len(best):
+                best = root
+    return best
+
+
+def referenced_modules(module: ModuleType) -> Set[str]:
+    """模块全局变量引用到的模块名（模块对象本身或对象的 __module__）"""
+    names: Set[str] = set()
+    try:
+        values = list(vars(module).values())
+    except TypeError:
+        return names
+
+    for value in values:
+        if isinstance(value, ModuleType):
+            names.add(value.__name__)
+            continue
+        try:
+            owner = getattr(value, "__module__", None)
+        except Exception:
+            continue
+        if isinstance(owner, str):
+            names.add(owner)
+    return names
+
+
+def addon_dependencies(roots: Iterable[str]) -> Dict[str, Set[str]]:
+    """根据 sys.modules 中的模块引用推导插件之间的依赖: 插件 -> 它依赖的插件"""
+    roots = list(roots)
+    deps: Dict[str, Set[str]] = {root: set() for root in roots}
+
+    for name, module in list(sys.modules.items()):
+        if module is None:
+            continue
+        root = owner_root(name, roots)
+        if root is None:
+            continue
+        for ref in referenced_modules(module):
+            other = owner_root(ref, roots)
+            if other is not None and other != root:
+                deps[root].add(other)
+    return deps
+
+
+def topological_order(roots: Iterable[str], deps: Dict[str, Set[str]]) -> List[str]:
+    """按依赖排序（被依赖的插件在前），循环依赖按原顺序追加"""
+    roots = list(roots)
+    remaining = {root: set(deps.get(root, ())) & set(roots) for root in roots}
+    order: List[str] = []
+
+    while remaining:
+        ready = [root for root in roots if root in remaining and not remaining[root]]
+        if not ready:
+            cycle = [root for root in roots if root in remaining]
+            log.warning("插件之间存在循环依赖: %s", ", ".join(cycle))
+            order.extend(cycle)
+            break
+        for root in ready:
+            order.append(root)
+            del remaining[root]
+        for pending in remaining.values():
+            pending.difference_update(ready)
+    return order
+
+
+def _owner(module_name: str, roots: Set[str]) -> Optional[str]:
+    """与 owner_root 相同，按名称前缀逐级查找（与插件数量无关）"""
+    name = module_name
+    while True:
+        if name in roots:
+            return name
+        name, dot, _ = name.rpartition(".")
+        if not dot:
+            return None
+
+
+def loaded_dependencies(candidates: Iterable[str]) -> Dict[str, Set[str]]:
+    """已加载插件之间的依赖: 插件 -> 它依赖的插件
+
+    只检查属于候选插件的模块，每个模块的全局变量只检查一次
+    """
+    roots = {name for name in candidates if name in sys.modules}
+    deps: Dict[str, Set[str]] = {root: set() for root in roots}
+    for name, module in list(sys.modules.items()):
+        if module is None:
+            continue
+        root = _owner(name, roots)
+        if root is None:
+            continue
+        for ref in referenced_modules(module):
+            other = _owner(ref, roots)
+            if other is not None and other != root:
+                deps[root].add(other)
+    return deps
+
+
+def dependent_addons(root: str, candidates: Iterable[str]) -> List[str]:
+    """找出引用了该插件模块的其他已加载插件（包括传递依赖）
+
+    依赖关系在插件启用、禁用或重载前保存在 dm.addon_dependencies 中
+    """
+    deps = dm.addon_dependencies
+    if deps is None:
+        deps = dm.addon_dependencies = loaded_dependencies(set(candidates) | {root})
+
+    dependents: Dict[str, Set[str]] = {}
+    for name, used in deps.items():
+        for other in used:
+            dependents.setdefault(other, set()).add(name)
+
+    result: List[str] = []
+    pending = [root]
+    affected: Set[str] = {root}
+    while pending:
+        for name in sorted(dependents.get(pending.pop(0), ())):
+            if name not in affected:
+                affected.add(name)
+                result.append(name)
+                pending.append(name)
+    return result
@@ -0,0 +1,295 @@
+# broadcast.py
+import json
+import os
+import socket
+import time
+from typing import Dict, List, Optional
+
+import bpy
+
+from . import control_server
+from .data_manager import dm
+from .log import log
+
+
+# 定时器间隔(秒)
+_TICK_INTERVAL_S: float = 0.1
+# 连接其他实例的超时(秒)
+_CONNECT_TIMEOUT_S: float = 2.0
+# 实例登记文件后缀
+_SUFFIX = ".json"
+
+# 本实例接收转发请求的服务、登记文件与目录
+_server: Optional[control_server.ControlServer] = None
+_registry_file: Optional[str] = None
+_directory: str = ""
+# 等待其他实例回复的转发
+_calls: List["_PeerCall"] = []
+_timeout_s: float = 120.0
+
+
+def default_directory() -> str:
+    """默认的实例登记目录（只有当前用户可以访问）"""
+    return os.path.join(control_server.config_directory(), "instances")
+
+
+def _owned(path: str) -> bool:
+    """登记文件属于当前用户（其他用户写入的登记不会被连接）"""
+    if os.name == "nt":
+        return True
+    try:
+        return os.stat(path).st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # Windows 上无法廉价地检查，连接失败时再清理
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def peers() -> List[Dict[str, object]]:
+    """登记目录中的其他实例（清理已退出进程的登记）"""
+    result = []
+    try:
+        names = os.listdir(_directory)
+    except OSError:
+        return result
+    for name in names:
+        if not name.endswith(_SUFFIX):
+            continue
+        path = os.path.join(_directory, name)
+        if not _owned(path):
+            log.warning("忽略不属于当前用户的实例登记: %s", path)
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            continue
+        pid = info.get("pid")
+        if pid == os.getpid():
+            continue
+        if not isinstance(pid, int) or not _pid_alive(pid):
+            _remove_stale(path, info)
+            continue
+        result.append(info)
+    return result
+
+
+def _remove_stale(path: str, info: Dict[str, object]) -> None:
+    log.debug("清理已退出实例的登记: %s", path)
+    for stale in (path, str(info.get("address", "")).replace("unix:", "", 1)):
+        if stale and stale.startswith(_directory):
+            try:
+                os.unlink(stale)
+            except OSError:
+                pass
+
+
+class _PeerCall:
+    """向一个实例转发重载并等待结果（非阻塞，由定时器推进）"""
+
+    def __init__(self, info: Dict[str, object], module_name: str, token: str):
+        self.info = info
+        self.module_name = module_name
+        self.started = time.monotonic()
+        self.connected = False
+        self.outgoing = f"auth {token}\npeer-reload {module_name}\n".encode("utf-8")
+        self.incoming = bytearray()
+        self.authenticated = False
+        self.result: Optional[Dict[str, object]] = None
+
+        family, address = control_server.parse_address(str(info["address"]))
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.sock.connect_ex(address)
+
+    def _fail(self, error: str) -> None:
+        self.result = {"ok": False, "error": error}
+
+    def poll(self) -> bool:
+        """推进一次，完成（成功、失败或超时）时返回 True"""
+        elapsed = time.monotonic() - self.started
+        limit = _timeout_s if self.connected else _CONNECT_TIMEOUT_S
+        if elapsed > limit:
+            self._fail("timed out")
+            return True
+        try:
+            if self.outgoing:
+                sent = self.sock.send(self.outgoing)
+                self.outgoing = self.outgoing[sent:]
+                self.connected = True
+                if not self.outgoing:
+                    self.sock.shutdown(socket.SHUT_WR)
+                return False
+            data = self.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError as e:
+            self._fail(str(e))
+            return True
+        if not data:
+            self._fail("connection closed without a reply")
+            return True
+        self.incoming += data
+        while b"\n" in self.incoming:
+            line, _, rest = bytes(self.incoming).partition(b"\n")
+            self.incoming = bytearray(rest)
+            try:
+                reply = json.loads(line.decode("utf-8"))
+            except ValueError:
+                self._fail("invalid reply")
+                return True
+            # 第一行是认证结果，第二行是重载结果
+            if self.authenticated or not reply.get("ok"):
+                self.result = reply
+                return True
+            self.authenticated = True
+        return False
+
+    def close(self) -> None:
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _record(call: _PeerCall) -> None:
+    """保存并记录一个实例的结果"""
+    result = dict(call.result or {})
+    result.update(
+        pid=call.info.get("pid"),
+        background=call.info.get("background", False),
+        module=call.module_name,
+        elapsed_ms=round((time.monotonic() - call.started) * 1000.0, 3),
+    )
+    dm.broadcast_results.append(result)
+    if result.get("ok") and result.get("success"):
+        log.info("实例 %s 已重载 %s: %.1f ms", result["pid"], call.module_name,
+                 result.get("total_ms", 0.0))
+    else:
+        log.error("实例 %s 重载 %s 失败: %s", result["pid"], call.module_name,
+                  result.get("error", "reload failed"))
+
+
+def after_reload(module_name: str) -> None:
+    """本实例重载成功后转发给其他实例"""
+    if _server is None:
+        return
+    targets = peers()
+    if not targets:
+        return
+    dm.broadcast_results = []
+    log.info("转发重载 %s 到 %d 个实例", module_name, len(targets))
+    token = _server.token
+    for info in targets:
+        try:
+            _calls.append(_PeerCall(info, module_name, token))
+        except (OSError, ValueError, KeyError) as e:
+            log.error("无法连接实例 %s: %s", info.get("pid"), e)
+
+
+def poll() -> None:
+    """处理收到的转发请求并推进发出的转发
+
+    后台实例（blender -b）中定时器不会执行，运行的脚本需要在自己的循环中定期调用；
+    收到的重载在调用中同步执行
+    """
+    if _server is not None:
+        _server.poll()
+    for call in list(_calls):
+        if call.poll():
+            call.close()
+            _calls.remove(call)
+            _record(call)
+
+
+def _tick() -> Optional[float]:
+    try:
+        poll()
+    except Exception as e:
+        log.error("实例同步出错: %s", e)
+    return _TICK_INTERVAL_S
+
+
+def _listen_address() -> str:
+    if hasattr(socket, "AF_UNIX") and os.name != "nt":
+        return f"unix:{os.path.join(_directory, f'{os.getpid()}.sock')}"
+    return "127.0.0.1:0"
+
+
+def start(directory: str = "", timeout_s: float = 120.0) -> bool:
+    """开始接收其他实例的转发并登记本实例"""
+    global _server, _registry_file, _directory, _timeout_s
+    stop()
+    _directory = directory or default_directory()
+    _timeout_s = timeout_s
+    try:
+        os.makedirs(_directory, mode=0o700, exist_ok=True)
+        _server = control_server.ControlServer(_listen_address(), control_server.load_token())
+    except (OSError, ValueError) as e:
+        log.error("无法启动实例同步: %s", e)
+        _server = None
+        return False
+
+    info = {
+        "pid": os.getpid(),
+        "address": _server.bound_address(),
+        "background": bool(bpy.app.background),
+        "started": time.time(),
+        "version": list(bpy.app.version),
+    }
+    _registry_file = os.path.join(_directory, f"{os.getpid()}{_SUFFIX}")
+    try:
+        with open(_registry_file, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+    except OSError as e:
+        log.error("无法写入实例登记: %s", e)
+
+    if not bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.register(_tick, first_interval=_TICK_INTERVAL_S, persistent=True)
+    log.info("实例同步已启动: %s", info["address"])
+    return True
+
+
+def stop() -> None:
+    """停止实例同步并删除登记"""
+    global _server, _registry_file
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    for call in _calls:
+        call.close()
+    _calls.clear()
+    if _registry_file is not None:
+        try:
+            os.unlink(_registry_file)
+        except OSError:
+            pass
+        _registry_file = None
+    if _server is not None:
+        _server.close()
+        _server = None
+        log.info("实例同步已停止")
+
+
+def is_running() -> bool:
+    return _server is not None
+
+
+def configure(enabled: bool, directory: str, timeout_s: float) -> None:
+    """根据偏好设置启动或停止实例同步"""
+    if enabled:
+        start(directory, timeout_s)
+    else:
+        stop()
@@ -0,0 +1,80 @@
+# call_profiler.py
+import cProfile
+import os
+import pstats
+import tempfile
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from .log import log
+
+
+# (函数, 调用次数, 自身耗时 s, 累计耗时 s)
+FunctionStat = Tuple[str, int, float, float]
+
+
+class CallProfile:
+    """一次 register()/unregister() 调用的分析结果"""
+
+    def __init__(self, module_name: str, label: str):
+        self.module_name = module_name
+        self.label = label
+        self.path: Optional[str] = None
+        self.total_s: float = 0.0
+        self.top: List[FunctionStat] = []
+
+    def summary(self, count: int = 3) -> str:
+        """简短的文本摘要"""
+        names = ", ".join(f"{name} {cum * 1000:.0f} ms" for name, _, _, cum in self.top[:count])
+        return f"{self.label} {self.total_s * 1000:.0f} ms: {names}"
+
+
+def _function_name(key: Tuple[str, int, str]) -> str:
+    """将 pstats 的函数键格式化为 file:line(func)"""
+    filename, line, func = key
+    if filename == "~":
+        return func
+    return f"{os.path.basename(filename)}:{line}({func})"
+
+
+def _top_functions(stats: pstats.Stats, count: int) -> List[FunctionStat]:
+    """按累计耗时排序的前 N 个函数"""
+    rows = [
+        (_function_name(key), nc, tt, ct)
+        for key, (cc, nc, tt, ct, callers) in stats.stats.items()
+    ]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows[:count]
+
+
+def dump_directory() -> str:
+    """分析文件保存目录"""
+    directory = os.path.join(tempfile.gettempdir(), "addon_reloader_profiles")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+@contextmanager
+def profile_call(module_name: str, label: str, count: int = 20):
+    """使用 cProfile 分析上下文中的调用，并保存 .prof 文件"""
+    result = CallProfile(module_name, label)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        try:
+            stats = pstats.Stats(profiler)
+            result.total_s = stats.total_tt
+            result.top = _top_functions(stats, count)
+
+            safe_name = module_name.replace(".", "_")
+            result.path = os.path.join(dump_directory(), f"{safe_name}_{label}.prof")
+            stats.dump_stats(result.path)
+        except Exception as e:
+            log.error("保存分析结果失败: %s", e)
+
+        log.info("%s %s 分析结果: %s", module_name, label, result.path)
+        for name, calls, tottime, cumtime in result.top:
+            log.info("  %8.2f ms %8.2f ms %6d  %s", cumtime * 1000, tottime * 1000, calls, name)
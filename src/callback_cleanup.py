@@ -0,0 +1,225 @@
+# callback_cleanup.py
+import functools
+import sys
+import types
+from typing import Dict, List, Tuple
+
+import bpy
+
+from . import module_tracker
+from .log import log
+
+
+_MISSING = object()
+
+# 支持 draw_handler_add 的空间类型
+_SPACE_TYPES = (
+    "SpaceView3D", "SpaceImageEditor", "SpaceNodeEditor", "SpaceSequenceEditor",
+    "SpaceClipEditor", "SpaceGraphEditor", "SpaceDopeSheetEditor", "SpaceNLA",
+    "SpaceTextEditor", "SpaceOutliner", "SpaceProperties", "SpaceFileBrowser",
+    "SpaceConsole", "SpaceInfo", "SpacePreferences", "SpaceSpreadsheet",
+)
+
+# 通过 draw_handler_add 添加的绘制回调: (空间类型, 句柄, 区域类型, 回调所在模块)
+_draw_handles: List[Tuple[type, object, str, str]] = []
+# 通过 msgbus.subscribe_rna 订阅的 owner: id(owner) -> (owner, 回调所在模块)
+_msgbus_owners: Dict[int, Tuple[object, str]] = {}
+# 被替换的原始属性: (对象, 属性名, 原始值或 _MISSING)
+_patched: List[Tuple[object, str, object]] = []
+
+
+def owner_module(callback) -> str:
+    """回调函数所属的模块名"""
+    func = callback
+    while isinstance(func, functools.partial):
+        func = func.func
+    func = getattr(func, "__func__", func)
+    return getattr(func, "__module__", None) or ""
+
+
+def _in_package(module_name: str, root: str) -> bool:
+    return module_name == root or module_name.startswith(f"{root}.")
+
+
+def _patch(owner, name: str, replacement) -> None:
+    """替换属性并记录原值，卸载时还原"""
+    _patched.append((owner, name, vars(owner).get(name, _MISSING)))
+    setattr(owner, name, replacement)
+
+
+def _wrap_draw_handlers(space_type: type) -> None:
+    """记录该空间类型上添加/移除的绘制回调"""
+    add = space_type.draw_handler_add
+    remove = space_type.draw_handler_remove
+
+    def draw_handler_add(callback, args, region_type, draw_type, *rest):
+        handle = add(callback, args, region_type, draw_type, *rest)
+        _draw_handles.append((space_type, handle, region_type, owner_module(callback)))
+        return handle
+
+    def draw_handler_remove(handle, region_type, *rest):
+        _draw_handles[:] = [entry for entry in _draw_handles if entry[1] is not handle]
+        return remove(handle, region_type, *rest)
+
+    _patch(space_type, "draw_handler_add", staticmethod(draw_handler_add))
+    _patch(space_type, "draw_handler_remove", staticmethod(draw_handler_remove))
+
+
+def _wrap_msgbus() -> None:
+    """记录 msgbus 订阅的 owner 与回调模块"""
+    subscribe = bpy.msgbus.subscribe_rna
+    clear = bpy.msgbus.clear_by_owner
+
+    def subscribe_rna(*args, **kwargs):
+        result = subscribe(*args, **kwargs)
+        owner, notify = kwargs.get("owner"), kwargs.get("notify")
+        if owner is not None:
+            _msgbus_owners[id(owner)] = (owner, owner_module(notify))
+        return result
+
+    def clear_by_owner(owner):
+        _msgbus_owners.pop(id(owner), None)
+        return clear(owner)
+
+    _patch(bpy.msgbus, "subscribe_rna", subscribe_rna)
+    _patch(bpy.msgbus, "clear_by_owner", clear_by_owner)
+
+
+def install() -> None:
+    """开始记录无法枚举的注册表（绘制回调与 msgbus 订阅）
+
+    只能记录此后添加的回调；处理器、定时器与菜单绘制函数在清理时按所属模块查找，不受影响
+    """
+    if _patched:
+        return
+    for name in _SPACE_TYPES:
+        space_type = getattr(bpy.types, name, None)
+        if space_type is None:
+            continue
+        try:
+            _wrap_draw_handlers(space_type)
+        except (AttributeError, TypeError) as e:
+            log.debug("无法记录 %s 的绘制回调: %s", space_type.__name__, e)
+    try:
+        _wrap_msgbus()
+    except (AttributeError, TypeError) as e:
+        log.debug("无法记录 msgbus 订阅: %s", e)
+
+
+def uninstall() -> None:
+    """还原被替换的函数"""
+    for owner, name, original in reversed(_patched):
+        try:
+            if original is _MISSING:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        except (AttributeError, TypeError):
+            pass
+    _patched.clear()
+    _draw_handles.clear()
+    _msgbus_owners.clear()
+
+
+def _clean_app_handlers(root: str) -> int:
+    removed = 0
+    for name in dir(bpy.app.handlers):
+        handlers = getattr(bpy.app.handlers, name, None)
+        if not isinstance(handlers, list):
+            continue
+        for handler in list(handlers):
+            if _in_package(owner_module(handler), root):
+                handlers.remove(handler)
+                log.debug("移除残留的处理器 %s: %s", name, getattr(handler, "__qualname__", handler))
+                removed += 1
+    return removed
+
+
+def _package_functions(root: str):
+    """插件包中定义的模块级函数与类中的函数"""
+    for module_name in module_tracker.package_module_names(root):
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for value in list(vars(module).values()):
+            if isinstance(value, types.FunctionType) and value.__module__ == module_name:
+                yield value
+            elif isinstance(value, type) and value.__module__ == module_name:
+                for attr in list(vars(value).values()):
+                    attr = getattr(attr, "__func__", attr)
+                    if isinstance(attr, types.FunctionType):
+                        yield attr
+
+
+def _clean_timers(root: str) -> int:
+    # bpy.app.timers 无法枚举，只能检查插件包中的函数是否仍注册为定时器
+    removed = 0
+    for func in _package_functions(root):
+        try:
+            if bpy.app.timers.is_registered(func):
+                bpy.app.timers.unregister(func)
+                log.debug("移除残留的定时器: %s", func.__qualname__)
+                removed += 1
+        except (TypeError, ValueError):
+            continue
+    return removed
+
+
+def _clean_draw_handlers(root: str) -> int:
+    removed = 0
+    for space_type, handle, region_type, module_name in list(_draw_handles):
+        if not _in_package(module_name, root):
+            continue
+        try:
+            space_type.draw_handler_remove(handle, region_type)
+            removed += 1
+        except (ValueError, TypeError, RuntimeError):
+            # 句柄已失效
+            _draw_handles[:] = [entry for entry in _draw_handles if entry[1] is not handle]
+    return removed
+
+
+def _clean_msgbus(root: str) -> int:
+    removed = 0
+    for owner, module_name in list(_msgbus_owners.values()):
+        if _in_package(module_name, root):
+            bpy.msgbus.clear_by_owner(owner)
+            removed += 1
+    return removed
+
+
+def _clean_ui_draw_funcs(root: str) -> int:
+    """菜单/面板/标题栏通过 append()/prepend() 追加的绘制函数"""
+    removed = 0
+    seen = set()
+    for name in dir(bpy.types):
+        cls = getattr(bpy.types, name, None)
+        draw_funcs = getattr(getattr(cls, "draw", None), "_draw_funcs", None)
+        if not isinstance(draw_funcs, list) or id(draw_funcs) in seen:
+            continue
+        seen.add(id(draw_funcs))
+        for func in list(draw_funcs):
+            if _in_package(owner_module(func), root):
+                draw_funcs.remove(func)
+                log.debug("移除残留的界面绘制函数 %s: %s", name, getattr(func, "__qualname__", func))
+                removed += 1
+    return removed
+
+
+def clean(root: str) -> Dict[str, int]:
+    """移除插件禁用后仍然残留的回调，返回各注册表移除的数量
+
+    在插件 unregister() 之后、模块移除之前调用，此时仍属于插件包的回调都是遗漏的
+    """
+    counts = {
+        "handlers": _clean_app_handlers(root),
+        "timers": _clean_timers(root),
+        "draw_handlers": _clean_draw_handlers(root),
+        "msgbus": _clean_msgbus(root),
+        "menus": _clean_ui_draw_funcs(root),
+    }
+    total = sum(counts.values())
+    if total:
+        log.warning("清理 %s 遗留的回调: %s", root,
+                    ", ".join(f"{name} {count}" for name, count in counts.items() if count))
+    return counts
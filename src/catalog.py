@@ -0,0 +1,290 @@
+# catalog.py
+import functools
+import os
+from typing import Dict, List, Optional, Tuple
+
+import addon_utils
+import bpy
+
+from . import module_tracker, search
+from .data_manager import dm
+from .log import log
+
+
+# 插件入口文件指纹: (mtime_ns, size)，扩展附带 manifest 指纹
+EntryStamp = Tuple[Optional[Tuple[int, int]], Optional[module_tracker.FileStamp]]
+
+_MANIFEST_NAME = "blender_manifest.toml"
+
+# 扩展仓库同步/更新后触发的处理器（私有 API，不存在时忽略）
+_REPO_HANDLERS = ("_extension_repos_update_post", "_extension_repos_sync", "_extension_repos_files_clear")
+# 检查搜索目录是否有增删的间隔(秒)
+_DIR_CHECK_INTERVAL_S: float = 2.0
+
+# 搜索目录自身的指纹（目录中增删插件时变化）
+_dir_stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+# 被替换的 addon_utils 函数: 名称 -> 原函数
+_originals: Dict[str, object] = {}
+
+
+class CatalogEntry:
+    """插件/扩展的静态信息，只在其文件变更时重新构建"""
+
+    __slots__ = ("module_name", "label", "version", "file", "excluded", "search_key", "_items")
+
+    def __init__(self, module_name: str, label: str, version: str, file: str, excluded: bool):
+        self.module_name = module_name
+        self.label = label
+        self.version = version
+        self.file = file
+        self.excluded = excluded
+        # 预计算的搜索键
+        self.search_key: Optional[search.SearchKey] = None
+        # (是否启用, 索引, 附加描述) -> 枚举项元组
+        self._items: Dict[Tuple[bool, int, str], Tuple[str, str, str, str, int]] = {}
+
+    def enum_item(self, is_enabled: bool, index: int, extra: str = "") -> Tuple[str, str, str, str, int]:
+        """返回下拉列表使用的枚举项元组（按状态、索引与附加描述复用）"""
+        key = (is_enabled, index, extra)
+        item = self._items.get(key)
+        if item is None:
+            # 附加描述变化后旧的元组不会再用到
+            if len(self._items) >= 8:
+                self._items.clear()
+            enabled_status = " [Enabled]" if is_enabled else " [Disabled]"
+            state_icon = "COLORSET_03_VEC" if is_enabled else "COLORSET_02_VEC"
+            item = (
+                self.module_name,
+                self.label,
+                f"Version: {self.version}{enabled_status}{extra}",
+                state_icon,
+                index,
+            )
+            self._items[key] = item
+        return item
+
+
+def _search_paths() -> List[str]:
+    """插件与扩展仓库的搜索目录"""
+    paths = list(addon_utils.paths())
+    # 扩展仓库目录（私有 API，不存在时忽略）
+    ext_paths = getattr(addon_utils, "_paths_with_extension_repos", None)
+    if ext_paths is not None:
+        try:
+            paths.extend(path for path, _ in ext_paths())
+        except Exception as e:
+            log.debug("获取扩展仓库目录失败: %s", e)
+    return paths
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _scan_stamps() -> Dict[str, EntryStamp]:
+    """获取所有搜索目录下插件入口的指纹"""
+    previous = dm.catalog_stamps
+    stamps: Dict[str, EntryStamp] = {}
+    for search_path in _search_paths():
+        try:
+            entries = list(os.scandir(search_path))
+        except OSError:
+            continue
+        for entry in entries:
+            name = entry.name
+            if name.startswith((".", "__")):
+                continue
+            if entry.is_dir():
+                init_file = os.path.join(entry.path, "__init__.py")
+                manifest = os.path.join(entry.path, _MANIFEST_NAME)
+                old = previous.get(init_file)
+                manifest_stamp = None
+                if os.path.exists(manifest):
+                    manifest_stamp = module_tracker.file_stamp(
+                        manifest, old[1] if old else None)
+                stamps[init_file] = (_stat(init_file), manifest_stamp)
+            elif name.endswith(".py"):
+                stamps[entry.path] = (_stat(entry.path), None)
+    return stamps
+
+
+def _scan_dir_stamps() -> None:
+    global _dir_stamps
+    _dir_stamps = {path: _stat(path) for path in _search_paths()}
+
+
+def scan() -> bool:
+    """检查插件目录是否有变化，并使变化项的缓存失效
+
+    返回 True 表示需要重新扫描插件模块
+    """
+    stamps = _scan_stamps()
+    previous = dm.catalog_stamps
+    first_run = not previous
+    changed = {path for path, stamp in stamps.items() if previous.get(path) != stamp}
+    changed.update(set(previous) - set(stamps))
+    dm.catalog_stamps = stamps
+    _scan_dir_stamps()
+
+    if changed:
+        log.debug("插件目录变化: %d 项", len(changed))
+        for module_name, entry in list(dm.catalog_entries.items()):
+            if entry.file in changed:
+                del dm.catalog_entries[module_name]
+    return first_run or bool(changed)
+
+
+def clear() -> None:
+    """清空目录缓存"""
+    dm.catalog_stamps = {}
+    dm.catalog_entries = {}
+    dm.catalog_dirty = True
+    dm.addon_dependencies = None
+
+
+def invalidate(reason: str) -> None:
+    """使插件列表失效，下次读取时完整重建"""
+    if not dm.catalog_dirty:
+        log.debug("插件列表失效: %s", reason)
+    dm.catalog_dirty = True
+
+
+def mark(module_name: str) -> None:
+    """插件状态变化，下次读取列表时只更新该项"""
+    dm.catalog_stale.add(module_name)
+    dm.addon_dependencies = None
+
+
+def entry_changed(entry: CatalogEntry) -> bool:
+    """条目的入口文件在上次扫描后是否有变化（bl_info 可能已改变）"""
+    stamp = dm.catalog_stamps.get(entry.file)
+    return stamp is None or stamp[0] != _stat(entry.file)
+
+
+def _wrap_addon_utils(name: str) -> None:
+    """启用/禁用插件（包括偏好设置中的复选框）后标记对应项"""
+    original = getattr(addon_utils, name)
+
+    @functools.wraps(original)
+    def wrapper(module_name, *args, **kwargs):
+        try:
+            return original(module_name, *args, **kwargs)
+        finally:
+            mark(module_name)
+
+    _originals[name] = original
+    setattr(addon_utils, name, wrapper)
+
+
+@bpy.app.handlers.persistent
+def _on_repos_changed(*args) -> None:
+    invalidate("扩展仓库同步")
+
+
+def _check_dirs() -> Optional[float]:
+    """定时器回调: 搜索目录中增删了插件时使列表失效"""
+    for path, stamp in _dir_stamps.items():
+        if _stat(path) != stamp:
+            invalidate(f"目录变化 {path}")
+            break
+    return _DIR_CHECK_INTERVAL_S
+
+
+def install() -> None:
+    """开始监听使插件列表失效的事件"""
+    if _originals:
+        return
+    for name in ("enable", "disable"):
+        _wrap_addon_utils(name)
+    for name in _REPO_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name, None)
+        if isinstance(handlers, list) and _on_repos_changed not in handlers:
+            handlers.append(_on_repos_changed)
+    if not bpy.app.timers.is_registered(_check_dirs):
+        bpy.app.timers.register(_check_dirs, first_interval=_DIR_CHECK_INTERVAL_S, persistent=True)
+
+
+def uninstall() -> None:
+    """停止监听并还原 addon_utils"""
+    for name, original in _originals.items():
+        # 其他插件在之后又替换了该函数时保留它们的替换
+        if getattr(getattr(addon_utils, name), "__wrapped__", None) is original:
+            setattr(addon_utils, name, original)
+    _originals.clear()
+    for name in _REPO_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name, None)
+        if isinstance(handlers, list) and _on_repos_changed in handlers:
+            handlers.remove(_on_repos_changed)
+    if bpy.app.timers.is_registered(_check_dirs):
+        bpy.app.timers.unregister(_check_dirs)
+
+
+def get_entry(addon) -> CatalogEntry:
+    """获取插件的缓存条目，不存在时构建"""
+    module_name = addon.__name__
+    entry = dm.catalog_entries.get(module_name)
+    if entry is not None and entry.file == addon.__file__:
+        return entry
+
+    entry = _build_entry(addon)
+    dm.catalog_entries[module_name] = entry
+    return entry
+
+
+def _build_entry(addon) -> CatalogEntry:
+    """根据模块信息构建条目"""
+    # 模块名称
+    module_name = addon.__name__
+    # 模块路径
+    module_file = addon.__file__
+
+    # 模块信息
+    this_bl_info = addon.__dict__.get("bl_info", {})
+    bl_addon_version = this_bl_info.get("version", "0.0.0")
+    bl_addon_name = this_bl_info.get("name", "Unknown Name")
+
+    # 当前插件名称(Addon Reloader)
+    my_module = dm.my_addon_names
+    excluded = False
+
+    # 扩展
+    if addon_utils.check_extension(module_name):
+        # 分割模块名称
+        module_name_split = module_name.split(".")
+        # 排除自己(Addon Reloader)
+        if my_module["Extend"]:
+            if module_name == my_module["Extend"]:
+                log.debug("Exclude this extension (Addon Reloader)")
+                excluded = True
+        else:
+            if module_name_split[-1] == my_module["Addon"]:
+                log.debug("Exclude this addon (Addon Reloader)")
+                excluded = True
+
+        # 排除系统扩展
+        if (
+            len(module_name_split) > 1
+            and module_name_split[0] == "bl_ext"
+            and module_name_split[1] == "system"
+        ):
+            excluded = True
+
+        label = f"[E] {bl_addon_name}"
+    else:  # 插件
+        # 排除自己(Addon Reloader)
+        if module_name == my_module["Addon"]:
+            excluded = True
+
+        # 排除系统插件(v4.2+)
+        if "addons_core" in module_file:
+            excluded = True
+
+        label = f"[A] {bl_addon_name}"
+
+    entry = CatalogEntry(module_name, label, bl_addon_version, module_file, excluded)
+    entry.search_key = search.SearchKey(module_name, bl_addon_name)
+    return entry
@@ -0,0 +1,332 @@
+# class_reload.py
+import hashlib
+import sys
+import types
+from typing import Dict, List, Set, Tuple
+
+import bpy
+
+from . import addon_graph, module_tracker
+from .data_manager import dm
+from .log import log
+
+
+# Blender 在注册时根据是否存在这些方法决定回调，增删它们需要重新注册
+_RNA_CALLBACKS = {
+    "poll", "invoke", "execute", "modal", "draw", "draw_header", "draw_header_preset",
+    "check", "cancel", "description", "draw_item", "filter_items", "update", "init",
+    "copy", "free", "draw_buttons", "draw_buttons_ext", "draw_label", "socket_value_update",
+    "draw_color", "draw_color_simple",
+}
+
+
+class FallbackRequired(Exception):
+    """当前修改无法通过类级别差异重载完成，需要完整重载"""
+
+
+class ClassReloadError(Exception):
+    """新代码执行失败（已还原该模块，当前版本仍然有效）"""
+
+
+def code_key(code: types.CodeType) -> Tuple:
+    """代码对象的内容标识（忽略行号等位置信息）"""
+    consts = tuple(
+        code_key(const) if isinstance(const, types.CodeType) else repr(const)
+        for const in code.co_consts
+    )
+    return (code.co_code, code.co_names, code.co_varnames, code.co_freevars, consts)
+
+
+def _unwrap(value):
+    """取出 classmethod/staticmethod 包装的函数"""
+    if isinstance(value, (classmethod, staticmethod)):
+        return value.__func__
+    return value
+
+
+def _describe(value) -> str:
+    """将属性值转换为稳定的文本，类型与函数按名称和代码描述"""
+    if isinstance(value, type):
+        return f"type:{value.__module__}.{value.__qualname__}"
+    if isinstance(value, types.FunctionType):
+        return f"func:{value.__qualname__}:{hash(code_key(value.__code__))}"
+    if isinstance(value, (list, tuple)):
+        return "(" + ",".join(_describe(v) for v in value) + ")"
+    if isinstance(value, (set, frozenset)):
+        return "{" + ",".join(sorted(_describe(v) for v in value)) + "}"
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{k}:{_describe(v)}" for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))) + "}"
+    # bpy.props 返回的延迟属性定义
+    if hasattr(value, "function") and hasattr(value, "keywords"):
+        return f"prop:{getattr(value.function, '__name__', value.function)}({_describe(value.keywords)})"
+    return repr(value)
+
+
+def layout_fingerprint(cls: type) -> str:
+    """类的注册布局指纹: 基类、bl_* 属性、属性注解以及 RNA 回调方法集合"""
+    parts = [",".join(f"{b.__module__}.{b.__qualname__}" for b in cls.__bases__)]
+    namespace = cls.__dict__
+    for name in sorted(namespace):
+        # bl_rna 由 Blender 在注册时添加
+        if name.startswith("bl_") and name != "bl_rna":
+            parts.append(f"{name}={_describe(namespace[name])}")
+    for name, value in namespace.get("__annotations__", {}).items():
+        parts.append(f"@{name}:{_describe(value)}")
+    callbacks = sorted(name for name in namespace if name in _RNA_CALLBACKS)
+    parts.append("callbacks:" + ",".join(callbacks))
+    return hashlib.sha1("\n".join(parts).encode("utf-8", "replace")).hexdigest()
+
+
+def _is_method(value) -> bool:
+    value = _unwrap(value)
+    return isinstance(value, (types.FunctionType, property))
+
+
+def swap_methods(old_cls: type, new_cls: type) -> int:
+    """将新类的方法替换到仍在注册中的旧类上，返回替换数量"""
+    swapped = 0
+    for name, value in list(new_cls.__dict__.items()):
+        if _is_method(value):
+            setattr(old_cls, name, value)
+            swapped += 1
+    # 删除新版本中已移除的方法
+    for name, value in list(old_cls.__dict__.items()):
+        if _is_method(value) and name not in new_cls.__dict__:
+            delattr(old_cls, name)
+    return swapped
+
+
+def _is_registered(cls: type) -> bool:
+    try:
+        return bool(getattr(cls, "is_registered", False)) or "bl_rna" in cls.__dict__
+    except Exception:
+        return False
+
+
+def registered_classes(root: str) -> List[type]:
+    """插件包中所有已注册的 Blender 类"""
+    prefix = f"{root}."
+    result: List[type] = []
+    seen: Set[type] = set()
+    pending = list(bpy.types.bpy_struct.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        if cls in seen:
+            continue
+        seen.add(cls)
+        pending.extend(cls.__subclasses__())
+        module = getattr(cls, "__module__", "") or ""
+        if (module == root or module.startswith(prefix)) and _is_registered(cls):
+            result.append(cls)
+    return result
+
+
+def _is_bpy_class(value, module_name: str) -> bool:
+    return (
+        isinstance(value, type)
+        and issubclass(value, bpy.types.bpy_struct)
+        and value.__module__ == module_name
+    )
+
+
+def _function_key(namespace: dict, name: str):
+    func = namespace.get(name)
+    return code_key(func.__code__) if isinstance(func, types.FunctionType) else None
+
+
+def module_order(root: str, names: Set[str]) -> List[str]:
+    """按包内导入关系排序（被导入的模块在前）"""
+    snapshot = dm.module_snapshots.get(root)
+    deps = snapshot.imports if snapshot else {}
+    ordered = sorted(names)
+    return addon_graph.topological_order(ordered, {n: deps.get(n, set()) for n in ordered})
+
+
+class _ClassReload:
+    """一次类级别差异重载"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.registered = registered_classes(root)
+        # (旧类, 新类)
+        self.changed: List[Tuple[type, type]] = []
+        # 布局未变、等待替换方法的 (旧类, 新类)，全部模块执行成功后才替换
+        self.pending: List[Tuple[type, type]] = []
+        # (模块字典, 执行前的副本)，失败时全部还原
+        self.backups: List[Tuple[dict, dict]] = []
+        self.swapped = 0
+        self.unchanged = 0
+
+    def reexec_module(self, name: str) -> None:
+        """在原模块字典中重新执行新源码，并比较其中的已注册类"""
+        module = sys.modules.get(name)
+        path = getattr(module, "__file__", None)
+        if module is None or not path or not path.endswith(".py"):
+            raise FallbackRequired(f"{name} is not a source module")
+
+        with open(path, "rb") as f:
+            source = f.read()
+        try:
+            code = compile(source, path, "exec", dont_inherit=True)
+        except SyntaxError as e:
+            raise ClassReloadError(f"{path}:{e.lineno}: {e.msg}") from e
+
+        namespace = module.__dict__
+        backup = dict(namespace)
+        old_classes = {cls.__name__: cls for cls in self.registered if cls.__module__ == name}
+        old_hooks = (_function_key(namespace, "register"), _function_key(namespace, "unregister"))
+
+        try:
+            exec(code, namespace)
+        except Exception as e:
+            self._restore(namespace, backup)
+            raise ClassReloadError(f"{name}: {type(e).__name__}: {e}") from e
+
+        try:
+            self._compare(name, namespace, backup, old_classes, old_hooks)
+        except FallbackRequired:
+            self._restore(namespace, backup)
+            raise
+        self.backups.append((namespace, backup))
+
+    def _restore(self, namespace: dict, backup: dict) -> None:
+        namespace.clear()
+        namespace.update(backup)
+
+    def _compare(self, name: str, namespace: dict, backup: dict,
+                 old_classes: Dict[str, type], old_hooks: Tuple) -> None:
+        """比较新旧类，布局未变的替换方法，布局变化的留待重新注册"""
+        new_hooks = (_function_key(namespace, "register"), _function_key(namespace, "unregister"))
+        if new_hooks != old_hooks:
+            raise FallbackRequired(f"register()/unregister() changed in {name}")
+
+        # 新增的 Blender 类需要由插件自己的 register() 注册
+        for attr, value in namespace.items():
+            if _is_bpy_class(value, name) and attr not in old_classes:
+                previous = backup.get(attr)
+                if not (isinstance(previous, type) and previous.__qualname__ == value.__qualname__):
+                    raise FallbackRequired(f"new class {name}.{attr}")
+
+        pending: List[Tuple[str, type, type]] = []
+        changed: List[Tuple[type, type]] = []
+        for attr, old_cls in old_classes.items():
+            new_cls = namespace.get(attr)
+            if not isinstance(new_cls, type) or old_cls.__qualname__ != attr:
+                raise FallbackRequired(f"class {name}.{attr} not found in new code")
+            if layout_fingerprint(old_cls) == layout_fingerprint(new_cls):
+                pending.append((attr, old_cls, new_cls))
+            else:
+                if issubclass(old_cls, bpy.types.PropertyGroup):
+                    raise FallbackRequired(f"PropertyGroup {name}.{attr} changed")
+                changed.append((old_cls, new_cls))
+        self.changed.extend(changed)
+
+        # 布局未变: 模块中保留已注册的旧类，方法在全部模块成功后替换
+        for attr, old_cls, new_cls in pending:
+            self.pending.append((old_cls, new_cls))
+            namespace[attr] = old_cls
+
+    def swap_pending(self) -> None:
+        """将新方法替换到布局未变的旧类上"""
+        for old_cls, new_cls in self.pending:
+            self.swapped += swap_methods(old_cls, new_cls)
+            self.unchanged += 1
+        # 重新执行时构建的 classes 元组/列表中仍是未注册的新类，插件自己的 unregister() 会失败
+        self._replace_references({new: old for old, new in self.pending})
+        self.pending.clear()
+
+    def rollback(self) -> None:
+        """还原所有已重新执行的模块字典，已注册的旧类与方法保持不变"""
+        for namespace, backup in reversed(self.backups):
+            self._restore(namespace, backup)
+        self.backups.clear()
+        self.changed.clear()
+        self.pending.clear()
+
+    def _child_panels(self, panel: type) -> List[type]:
+        """以该面板为父面板的已注册子面板"""
+        idname = getattr(panel, "bl_idname", panel.__name__)
+        return [
+            cls for cls in self.registered
+            if getattr(cls, "bl_parent_id", "") == idname
+        ]
+
+    def reregister(self) -> None:
+        """注销布局变化的旧类并注册新类"""
+        if not self.changed:
+            return
+        changed_old = {old for old, _ in self.changed}
+        children = []
+        for old, _ in self.changed:
+            if issubclass(old, bpy.types.Panel):
+                children.extend(c for c in self._child_panels(old) if c not in changed_old)
+
+        unregistered: List[type] = []
+        registered: List[type] = []
+        try:
+            for cls in reversed(children):
+                bpy.utils.unregister_class(cls)
+                unregistered.append(cls)
+            for old, _ in reversed(self.changed):
+                bpy.utils.unregister_class(old)
+                unregistered.append(old)
+            for _, new in self.changed:
+                bpy.utils.register_class(new)
+                registered.append(new)
+            for cls in children:
+                bpy.utils.register_class(cls)
+                registered.append(cls)
+        except Exception as e:
+            # 注销已注册的新类，重新注册旧类
+            for cls in reversed(registered):
+                try:
+                    bpy.utils.unregister_class(cls)
+                except Exception:
+                    log.debug("无法注销 %s", cls.__name__)
+            for cls in reversed(unregistered):
+                try:
+                    bpy.utils.register_class(cls)
+                except Exception as restore_error:
+                    log.error("无法重新注册 %s: %s", cls.__name__, restore_error)
+            raise ClassReloadError(f"re-registering changed classes failed: {type(e).__name__}: {e}") from e
+
+        self._replace_references({old: new for old, new in self.changed})
+
+    def _replace_references(self, mapping: Dict[type, type]) -> None:
+        """按 mapping 替换包内模块全局变量（包括 classes 元组/列表）中的类"""
+        for module_name in module_tracker.package_module_names(self.root):
+            namespace = vars(sys.modules[module_name])
+            for attr, value in list(namespace.items()):
+                if isinstance(value, type) and value in mapping:
+                    namespace[attr] = mapping[value]
+                elif isinstance(value, list) and any(isinstance(v, type) and v in mapping for v in value):
+                    value[:] = [mapping.get(v, v) if isinstance(v, type) else v for v in value]
+                elif isinstance(value, tuple) and any(isinstance(v, type) and v in mapping for v in value):
+                    namespace[attr] = tuple(mapping.get(v, v) if isinstance(v, type) else v for v in value)
+
+
+def reload_classes(root: str) -> Tuple[int, int, int]:
+    """类级别差异重载，返回 (重新注册的类, 保留的类, 替换的方法)
+
+    失败时抛出 FallbackRequired（需要完整重载）或 ClassReloadError
+    """
+    changed = module_tracker.changed_modules(root)
+    if changed is None:
+        raise FallbackRequired("no module snapshot")
+
+    modules = module_order(root, module_tracker.eviction_set(root, changed))
+    log.debug("类级别重载: 重新执行 %s", ", ".join(modules))
+
+    # 所有模块执行成功并且变化的类重新注册后，才替换其他类的方法；任一步失败都还原全部模块
+    job = _ClassReload(root)
+    try:
+        for name in modules:
+            job.reexec_module(name)
+        job.reregister()
+    except (FallbackRequired, ClassReloadError):
+        job.rollback()
+        raise
+    job.swap_pending()
+
+    module_tracker.take_snapshot(root)
+    return len(job.changed), job.unchanged, job.swapped
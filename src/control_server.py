@@ -0,0 +1,405 @@
+# control_server.py
+import hmac
+import json
+import os
+import secrets
+import selectors
+import socket
+import stat
+from typing import Dict, List, Optional, Tuple
+
+import addon_utils
+import bpy
+
+from . import module_tracker, reload_stats, scheduler, utils
+from .data_manager import dm
+from .log import log
+
+
+# 定时器间隔(秒)
+_TICK_INTERVAL_S: float = 0.1
+# 单行命令的最大长度与同时连接数上限
+_MAX_LINE = 4096
+_MAX_CONNECTIONS = 16
+# Unix 域套接字地址前缀
+_UNIX_PREFIX = "unix:"
+
+_HELP = "commands: reload [module], toggle [module], list, stats [module], ping"
+# 令牌文件名；每个连接的第一行必须是 "auth <令牌>"
+_TOKEN_FILE = "control_token"
+
+
+def config_directory() -> str:
+    """只有当前用户可以访问的配置目录（令牌与实例登记）"""
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    path = os.path.join(base, "addon_reloader")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def token_path() -> str:
+    return os.path.join(config_directory(), _TOKEN_FILE)
+
+
+def load_token() -> str:
+    """读取访问令牌，不存在时生成（文件权限 0600）"""
+    path = token_path()
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        if os.name != "nt" and os.stat(path).st_mode & 0o077:
+            os.chmod(path, 0o600)
+        with open(path, "r", encoding="utf-8") as f:
+            token = f.read().strip()
+        if token:
+            return token
+        fd = os.open(path, os.O_WRONLY | os.O_TRUNC)
+    token = secrets.token_hex(32)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    log.info("已生成控制服务令牌: %s", path)
+    return token
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """解析地址: "host:port"、"port" 或 "unix:/path/to/socket"，返回 (地址族, 地址)"""
+    address = address.strip()
+    if address.startswith(_UNIX_PREFIX):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix domain sockets are not supported on this platform")
+        return socket.AF_UNIX, os.path.expanduser(address[len(_UNIX_PREFIX):])
+    host, _, port = address.rpartition(":")
+    host = host or "127.0.0.1"
+    if host not in {"127.0.0.1", "localhost", "::1"}:
+        raise ValueError("the control server only listens on localhost")
+    family = socket.AF_INET6 if host == "::1" else socket.AF_INET
+    return family, (host, int(port))
+
+
+class _Connection:
+    """一个客户端连接及其读写缓冲区"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.rbuf = bytearray()
+        self.wbuf = bytearray()
+        self.closed = False
+        # 客户端已关闭写入端，回复写完后关闭连接
+        self.eof = False
+        # 尚未完成的重载请求数
+        self.waiting = 0
+        # 已发送正确的令牌 / 令牌错误（回复后关闭）
+        self.authenticated = False
+        self.rejected = False
+
+    def send(self, response: Dict[str, object]) -> None:
+        """加入一行 JSON 回复（下一次定时器回调时写出）"""
+        if not self.closed:
+            self.wbuf += (json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class ControlServer:
+    """本地控制服务: 非阻塞套接字由定时器在主线程轮询"""
+
+    def __init__(self, address: str, token: str):
+        self.family, self.address = parse_address(address)
+        self.token = token
+        self.selector = selectors.DefaultSelector()
+        self.connections: Dict[int, _Connection] = {}
+
+        if self.family == getattr(socket, "AF_UNIX", None) and os.path.lexists(self.address):
+            # 上次未正常关闭时残留的套接字文件，其他文件不删除
+            if not stat.S_ISSOCK(os.lstat(self.address).st_mode):
+                raise OSError(f"{self.address} exists and is not a socket")
+            os.unlink(self.address)
+        self.listener = socket.socket(self.family, socket.SOCK_STREAM)
+        try:
+            if self.family != getattr(socket, "AF_UNIX", None):
+                self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.listener.bind(self.address)
+            if self.family == getattr(socket, "AF_UNIX", None):
+                os.chmod(self.address, 0o600)
+            self.listener.listen(_MAX_CONNECTIONS)
+            self.listener.setblocking(False)
+        except OSError:
+            self.listener.close()
+            raise
+        self.selector.register(self.listener, selectors.EVENT_READ)
+
+    def bound_address(self) -> str:
+        """实际监听的地址（端口为 0 时由系统分配）"""
+        if self.family == getattr(socket, "AF_UNIX", None):
+            return _UNIX_PREFIX + self.address
+        host, port = self.listener.getsockname()[:2]
+        return f"{host}:{port}"
+
+    def close(self) -> None:
+        # 尽量写出剩余的回复（不等待）
+        for conn in list(self.connections.values()):
+            if conn.wbuf:
+                try:
+                    conn.sock.send(conn.wbuf)
+                except OSError:
+                    pass
+            self._drop(conn)
+        self.selector.close()
+        self.listener.close()
+        if self.family == getattr(socket, "AF_UNIX", None):
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+    def _drop(self, conn: _Connection) -> None:
+        conn.closed = True
+        self.connections.pop(conn.sock.fileno(), None)
+        try:
+            self.selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            if len(self.connections) >= _MAX_CONNECTIONS:
+                sock.close()
+                continue
+            sock.setblocking(False)
+            conn = _Connection(sock)
+            self.connections[sock.fileno()] = conn
+            self.selector.register(sock, selectors.EVENT_READ, conn)
+
+    def _read(self, conn: _Connection) -> List[str]:
+        """读取所有可用数据，返回完整的命令行"""
+        while True:
+            try:
+                data = conn.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                self._drop(conn)
+                return []
+            if not data:
+                conn.eof = True
+                self.selector.unregister(conn.sock)
+                break
+            conn.rbuf += data
+
+        lines = []
+        while b"\n" in conn.rbuf:
+            line, _, rest = bytes(conn.rbuf).partition(b"\n")
+            conn.rbuf = bytearray(rest)
+            lines.append(line.decode("utf-8", "replace").strip())
+        if len(conn.rbuf) > _MAX_LINE:
+            conn.send({"ok": False, "error": "command too long"})
+            conn.rbuf.clear()
+        return [line for line in lines if line]
+
+    def _flush(self) -> None:
+        for conn in list(self.connections.values()):
+            if not conn.wbuf:
+                if conn.eof and not conn.waiting:
+                    self._drop(conn)
+                continue
+            try:
+                sent = conn.sock.send(conn.wbuf)
+                del conn.wbuf[:sent]
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                self._drop(conn)
+
+    def _authenticate(self, conn: _Connection, line: str) -> None:
+        """检查连接的第一行，令牌错误时回复后关闭连接"""
+        command, _, argument = line.partition(" ")
+        if command.lower() == "auth" and hmac.compare_digest(
+                argument.strip().encode("utf-8"), self.token.encode("utf-8")):
+            conn.authenticated = True
+            conn.send({"ok": True, "command": "auth"})
+            return
+        log.warning("控制服务: 拒绝未认证的连接")
+        conn.rejected = True
+        conn.send({"ok": False, "error": "authentication required: send 'auth <token>' first"})
+        if not conn.eof:
+            conn.eof = True
+            self.selector.unregister(conn.sock)
+
+    def poll(self) -> None:
+        """接收新连接与命令，同一批到达的命令一起处理"""
+        batch: List[Tuple[_Connection, str]] = []
+        for key, _ in self.selector.select(timeout=0):
+            if key.fileobj is self.listener:
+                self._accept()
+            elif not key.data.closed and not key.data.eof:
+                batch.extend((key.data, line) for line in self._read(key.data))
+        if batch:
+            if len(batch) > 1:
+                log.debug("控制服务: 一次处理 %d 条命令", len(batch))
+            for conn, line in batch:
+                if conn.closed or conn.rejected:
+                    continue
+                if not conn.authenticated:
+                    self._authenticate(conn, line)
+                    continue
+                _dispatch(conn, line)
+        self._flush()
+
+
+def _resolve_module(argument: str) -> Optional[str]:
+    """命令参数中的模块名，省略时使用当前选择的插件"""
+    module_name = argument or dm.last_selected[0]
+    if module_name == "no_addons":
+        return None
+    if module_name not in dm.addons_paths:
+        utils.refresh_addon_list(force=True)
+    return module_name if module_name in dm.addons_paths else None
+
+
+def _is_self(module_name: str) -> bool:
+    return module_name in {dm.my_addon_names.get("Addon"), dm.my_addon_names.get("Extend")}
+
+
+def _reload(conn: _Connection, module_name: str, command: str = "reload", propagate: bool = True) -> None:
+    """通过调度器重载（同一批中的重复请求会被合并），完成后回复结果"""
+    def reply(name: str, success: bool, entry: Optional[Dict[str, object]]) -> None:
+        conn.waiting -= 1
+        response = {"ok": True, "command": command, "module": name, "success": success}
+        if entry is not None and "error" in entry:
+            response["error"] = entry["error"]
+        elif entry is not None:
+            response["total_ms"] = round(entry["total_ns"] / 1e6, 3)
+            response["phases_ms"] = {
+                phase: round(ns / 1e6, 3) for phase, ns in entry["phases_ns"].items()}
+            response["mode"] = entry.get("mode", "")
+        conn.send(response)
+
+    conn.waiting += 1
+    scheduler.request(module_name, callback=reply, propagate=propagate)
+
+
+def _toggle(conn: _Connection, module_name: str) -> None:
+    """切换插件启用状态"""
+    if utils.is_addon_enabled(module_name):
+        addon_utils.disable(module_name, default_set=True)
+    elif addon_utils.enable(module_name, default_set=True) is not None:
+        module_tracker.take_snapshot(module_name)
+    enabled = utils.is_addon_enabled(module_name)
+    utils.refresh_addon_list()
+    utils.sync_addon_state(bpy.context)
+    conn.send({"ok": True, "command": "toggle", "module": module_name, "enabled": enabled})
+
+
+def _list(conn: _Connection) -> None:
+    addons = [
+        {"module": entry[0], "label": entry[1], "enabled": dm.enabled_map.get(entry[0], False)}
+        for entry in dm.show_lists if entry[0] != "no_addons"
+    ]
+    conn.send({"ok": True, "command": "list", "selected": dm.last_selected[0], "addons": addons})
+
+
+def _stats(conn: _Connection, argument: str) -> None:
+    modules = [argument] if argument else sorted({entry["module"] for entry in dm.reload_history})
+    result = {}
+    for module_name in modules:
+        stats = reload_stats.percentiles(module_name)
+        last = next(
+            (entry for entry in reversed(dm.reload_history) if entry["module"] == module_name), None)
+        result[module_name] = {
+            "p50_ms": round(stats[0], 3) if stats else None,
+            "p95_ms": round(stats[1], 3) if stats else None,
+            "count": stats[2] if stats else 0,
+            "last": last,
+        }
+    topbar = {"draws": dm.topbar_draw_count,
+              "avg_us": round(dm.topbar_draw_ns / dm.topbar_draw_count / 1000.0, 3)
+              if dm.topbar_draw_count else None}
+    conn.send({"ok": True, "command": "stats", "modules": result, "topbar": topbar})
+
+
+def _dispatch(conn: _Connection, line: str) -> None:
+    """执行一条命令"""
+    command, _, argument = line.partition(" ")
+    command, argument = command.lower(), argument.strip()
+    log.debug("控制命令: %s", line)
+    try:
+        if command == "ping":
+            conn.send({"ok": True, "command": "ping"})
+        elif command == "list":
+            _list(conn)
+        elif command == "stats":
+            _stats(conn, argument)
+        elif command in {"reload", "peer-reload", "toggle"}:
+            module_name = _resolve_module(argument)
+            if module_name is None:
+                conn.send({"ok": False, "command": command, "error": f"unknown addon: {argument}"})
+            elif _is_self(module_name):
+                conn.send({"ok": False, "command": command, "error": "cannot control Addon Reloader itself"})
+            elif command == "reload":
+                _reload(conn, module_name)
+            elif command == "peer-reload":
+                # 其他实例转发的重载不再继续转发
+                _reload(conn, module_name, command, propagate=False)
+            else:
+                _toggle(conn, module_name)
+        else:
+            conn.send({"ok": False, "error": f"unknown command: {command}", "help": _HELP})
+    except Exception as e:
+        log.error("执行控制命令失败 %s: %s", line, e)
+        conn.send({"ok": False, "command": command, "error": str(e)})
+
+
+_server: Optional[ControlServer] = None
+
+
+def _tick() -> Optional[float]:
+    if _server is None:
+        return None
+    try:
+        _server.poll()
+    except Exception as e:
+        log.error("控制服务出错: %s", e)
+    return _TICK_INTERVAL_S
+
+
+def is_running() -> bool:
+    return _server is not None
+
+
+def start(address: str) -> bool:
+    """在指定地址上启动控制服务"""
+    global _server
+    stop()
+    try:
+        _server = ControlServer(address, load_token())
+    except (OSError, ValueError) as e:
+        log.error("无法启动控制服务 %s: %s", address, e)
+        return False
+    bpy.app.timers.register(_tick, first_interval=_TICK_INTERVAL_S, persistent=True)
+    log.info("控制服务已启动: %s", address)
+    return True
+
+
+def stop() -> None:
+    """停止控制服务"""
+    global _server
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    if _server is not None:
+        _server.close()
+        _server = None
+        log.info("控制服务已停止")
+
+
+def configure(enabled: bool, address: str) -> None:
+    """根据偏好设置启动或停止控制服务"""
+    if enabled:
+        start(address)
+    else:
+        stop()
@@ -1,4 +1,5 @@
 # data_manager.py
+from collections import deque
 
 
 def singleton(cls):
@@ -36,6 +37,67 @@ class DataManager:
 
         self.enabled_map = {}
 
+        # 插件目录缓存: 入口文件 -> 指纹, 模块名 -> 条目
+        self.catalog_stamps = {}
+        self.catalog_entries = {}
+
+        # 插件列表是否需要完整重建、只需更新的插件，以及插件在列表中的索引
+        self.catalog_dirty = True
+        self.catalog_stale = set()
+        self.show_index = {}
+
+        # 搜索框显示名: 模块名 -> 显示名（重名时附加模块名），及其反查表
+        self.search_labels = {}
+        self.search_lookup = {}
+
+        # 插件使用记录（选择与重载）: 模块名 -> (衰减后的次数, 上次使用时间)
+        self.addon_usage = {}
+
+        # 上次刷新插件列表耗时(毫秒)
+        self.last_refresh_ms = 0.0
+
+        # 上次后台预编译耗时(毫秒)
+        self.last_precompile_ms = 0.0
+
+        # 最近的重载耗时记录（环形缓冲区）
+        self.reload_history = deque(maxlen=200)
+
+        # 缓冲区中各插件成功重载的总耗时（已排序）与 (p50 ms, p95 ms, 次数)，随记录更新
+        self.reload_totals = {}
+        self.reload_percentiles = {}
+
+        # 上次重载的导入耗时树
+        self.import_profile = None
+
+        # 上次重载 register()/unregister() 的 cProfile 结果
+        self.call_profiles = []
+
+        # 插件模块快照 (增量重载)
+        self.module_snapshots = {}
+
+        # 插件模块源码 (热补丁比较基准)
+        self.module_sources = {}
+
+        # 后台重载进度: (模块名, 进度 0~1, 当前阶段, 等待中的请求数)，空闲时为 None
+        self.reload_progress = None
+
+        # 顶部栏绘制内容: (启用状态图标, 重载按钮文本, (进度 0~1, 进度文本) 或 None)
+        self.topbar_state = ("COLORSET_02_VEC", self.last_selected[1], None)
+        # 顶部栏绘制次数与总耗时(纳秒)
+        self.topbar_draw_count = 0
+        self.topbar_draw_ns = 0
+
+        # 泄漏检查: 插件 -> 已移除模块的各代弱引用、代编号，以及上次检查结果
+        self.leak_generations = {}
+        self.leak_generation_counter = {}
+        self.leak_report = None
+
+        # 上次转发重载时其他实例的结果
+        self.broadcast_results = []
+
+        # 已加载插件之间的依赖（插件 -> 它依赖的插件），插件列表变化时清空
+        self.addon_dependencies = None
+
 
 dm = DataManager()
 """数据管理器单例实例"""
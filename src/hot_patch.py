@@ -0,0 +1,282 @@
+# hot_patch.py
+import ast
+import sys
+import types
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import module_tracker
+from .class_reload import ClassReloadError, FallbackRequired, code_key
+from .data_manager import dm
+from .log import log
+
+
+_CO_OPTIMIZED = 0x0001
+
+
+def _is_function_code(code: types.CodeType) -> bool:
+    """函数的代码对象（类体代码没有 CO_OPTIMIZED 标志）"""
+    return bool(code.co_flags & _CO_OPTIMIZED)
+
+
+def _skeleton(code: types.CodeType) -> Tuple:
+    """去掉嵌套函数/类体代码内容后的结构标识（忽略行号）"""
+    consts = tuple(
+        _const_key(const) for const in code.co_consts
+    )
+    return (code.co_code, code.co_names, code.co_varnames, consts)
+
+
+def _is_anonymous(code: types.CodeType) -> bool:
+    """lambda、推导式等没有独立名称的代码"""
+    return "<" in code.co_qualname
+
+
+def _const_key(const) -> Tuple:
+    if not isinstance(const, types.CodeType):
+        return ("const", repr(const))
+    # 匿名代码无法单独补丁，按内容计入所在结构
+    if _is_anonymous(const):
+        return ("anon", code_key(const))
+    return ("code", const.co_qualname)
+
+
+def _signature(code: types.CodeType) -> Tuple:
+    """函数签名与闭包布局，变化时无法替换 __code__"""
+    nargs = code.co_argcount + code.co_kwonlyargcount + code.co_posonlyargcount
+    return (
+        code.co_argcount, code.co_posonlyargcount, code.co_kwonlyargcount,
+        code.co_varnames[:nargs], code.co_freevars, code.co_flags,
+    )
+
+
+def _collect(code: types.CodeType, result: Dict[str, types.CodeType]) -> None:
+    """收集模块与类体中定义的函数/类体代码（不进入函数内部）"""
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType) and not _is_anonymous(const):
+            result[const.co_qualname] = const
+            if not _is_function_code(const):
+                _collect(const, result)
+
+
+def _live_function(module: types.ModuleType, qualname: str) -> Optional[types.FunctionType]:
+    """根据限定名找到模块中正在使用的函数对象"""
+    owner = module
+    parts = qualname.split(".")
+    for part in parts[:-1]:
+        owner = getattr(owner, part, None) if owner is module else vars(owner).get(part)
+        if not isinstance(owner, type):
+            return None
+
+    value = vars(owner).get(parts[-1])
+    if isinstance(value, (classmethod, staticmethod)):
+        value = value.__func__
+    elif isinstance(value, property):
+        value = value.fget
+    # 被装饰器包装的函数
+    while value is not None and not isinstance(value, types.FunctionType):
+        value = getattr(value, "__wrapped__", None)
+    if isinstance(value, types.FunctionType) and value.__code__.co_qualname == qualname:
+        return value
+    return None
+
+
+def remember(root: str) -> None:
+    """保存插件包当前已加载模块的源码，作为下次热补丁的比较基准"""
+    snapshot = dm.module_snapshots.get(root)
+    if snapshot is None:
+        dm.module_sources.pop(root, None)
+        return
+    sources: Dict[str, bytes] = {}
+    for name, path in snapshot.files.items():
+        try:
+            with open(path, "rb") as f:
+                sources[name] = f.read()
+        except OSError:
+            continue
+    dm.module_sources[root] = sources
+
+
+def _compile(source: bytes, path: str) -> types.CodeType:
+    try:
+        return compile(source, path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        raise ClassReloadError(f"{path}:{e.lineno}: {e.msg}") from e
+
+
+class _ModulePatch:
+    """单个模块的补丁计划"""
+
+    def __init__(self, name: str, module: types.ModuleType, path: str,
+                 old_source: bytes, new_source: bytes):
+        self.name = name
+        self.module = module
+        old_code = _compile(old_source, path)
+        new_code = _compile(new_source, path)
+        # (函数对象, 新代码)
+        self.functions: List[Tuple[types.FunctionType, types.CodeType]] = []
+        # 只有行号变化的函数 (函数对象, 新代码)，替换后堆栈、inspect 与断点指向正确的行
+        self.moved: List[Tuple[types.FunctionType, types.CodeType]] = []
+        self._plan(old_code, new_code)
+        # 需要写回模块的全局变量
+        self.globals: Dict[str, object] = {}
+        if _skeleton(old_code) != _skeleton(new_code):
+            self.globals = global_updates(name, old_source, new_source, path)
+
+    def _plan(self, old_code: types.CodeType, new_code: types.CodeType) -> None:
+        old_defs: Dict[str, types.CodeType] = {}
+        new_defs: Dict[str, types.CodeType] = {}
+        _collect(old_code, old_defs)
+        _collect(new_code, new_defs)
+
+        if set(old_defs) != set(new_defs):
+            raise FallbackRequired(f"functions or classes added/removed in {self.name}")
+
+        for qualname, new in new_defs.items():
+            old = old_defs[qualname]
+            if not _is_function_code(new):
+                # 类布局（bl_* 属性、注解、方法列表）必须一致
+                if _skeleton(old) != _skeleton(new):
+                    raise FallbackRequired(f"class layout changed: {self.name}.{qualname}")
+                continue
+            if code_key(old) == code_key(new):
+                if old.co_firstlineno != new.co_firstlineno or old.co_linetable != new.co_linetable:
+                    func = _live_function(self.module, qualname)
+                    if func is not None and _signature(func.__code__) == _signature(new):
+                        self.moved.append((func, new))
+                continue
+            if _signature(old) != _signature(new):
+                raise FallbackRequired(f"signature changed: {self.name}.{qualname}")
+            func = _live_function(self.module, qualname)
+            if func is None:
+                raise FallbackRequired(f"function not found: {self.name}.{qualname}")
+            self.functions.append((func, new))
+
+    def apply_code(self) -> int:
+        """替换函数的代码对象，返回内容变化的函数数"""
+        for func, code in self.functions + self.moved:
+            func.__code__ = code
+        return len(self.functions)
+
+
+def _literal_assignments(tree: ast.Module) -> Dict[str, object]:
+    """模块顶层 "名称 = 字面量" 形式的赋值"""
+    result = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        if not all(isinstance(t, ast.Name) for t in targets):
+            continue
+        try:
+            literal = ast.literal_eval(value)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            continue
+        for target in targets:
+            result[target.id] = literal
+    return result
+
+
+def _without_literals(tree: ast.Module, names) -> ast.Module:
+    """去掉这些名称的字面量赋值，用于比较其余模块结构"""
+    def is_literal_assignment(node) -> bool:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            return False
+        return all(isinstance(t, ast.Name) and t.id in names for t in targets)
+
+    tree.body = [node for node in tree.body if not is_literal_assignment(node)]
+    return tree
+
+
+def _module_level_reads(tree: ast.Module) -> Set[str]:
+    """模块执行时（包括类体中）读取的名称，不进入函数体"""
+    names: Set[str] = set()
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            # 装饰器与默认参数在定义时求值
+            pending.extend(getattr(node, "decorator_list", []))
+            pending.extend(node.args.defaults)
+            pending.extend(d for d in node.args.kw_defaults if d is not None)
+            continue
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        pending.extend(ast.iter_child_nodes(node))
+    return names
+
+
+def global_updates(name: str, old_source: bytes, new_source: bytes, path: str) -> Dict[str, object]:
+    """模块体变化时，找出只由字面量赋值变化引起的全局变量更新
+
+    其他模块级变化（新的 import、表达式等）无法在不重新执行模块的情况下应用
+    """
+    try:
+        old_tree = ast.parse(old_source, filename=path)
+        new_tree = ast.parse(new_source, filename=path)
+    except SyntaxError as e:
+        raise ClassReloadError(f"{path}:{e.lineno}: {e.msg}") from e
+
+    old_values = _literal_assignments(old_tree)
+    new_values = _literal_assignments(new_tree)
+    names = set(old_values) | set(new_values)
+    # 只更新源码中确实改变的值，运行时修改过的变量保持不变
+    updates = {
+        key: value for key, value in new_values.items()
+        if key not in old_values or old_values[key] != value
+        or type(old_values[key]) is not type(value)
+    }
+    # 其他模块级代码依赖这些值时，只有重新执行模块才能得到正确结果
+    dependent = sorted(set(updates) & _module_level_reads(new_tree))
+    if dependent:
+        raise FallbackRequired(f"module-level code in {name} reads {', '.join(dependent)}")
+
+    old_code = compile(_without_literals(old_tree, names), path, "exec", dont_inherit=True)
+    new_code = compile(_without_literals(new_tree, names), path, "exec", dont_inherit=True)
+    if _skeleton(old_code) != _skeleton(new_code):
+        raise FallbackRequired(f"module-level code changed in {name}")
+    return updates
+
+
+def hot_patch(root: str) -> Tuple[int, int, int]:
+    """热补丁: 替换变更函数的 __code__ 并更新模块全局变量，返回 (模块数, 函数数, 全局变量数)
+
+    无法安全补丁时抛出 FallbackRequired，新代码执行失败时抛出 ClassReloadError
+    """
+    sources = dm.module_sources.get(root)
+    changed = module_tracker.changed_modules(root)
+    if changed is None or sources is None:
+        raise FallbackRequired("no source baseline")
+
+    snapshot = dm.module_snapshots[root]
+    patches: List[_ModulePatch] = []
+    # 先为所有模块制定计划，任何模块无法补丁时都不做修改
+    for name in sorted(changed):
+        module = sys.modules.get(name)
+        path = snapshot.files[name]
+        if module is None or name not in sources:
+            raise FallbackRequired(f"{name} is not loaded")
+        try:
+            with open(path, "rb") as f:
+                new_source = f.read()
+        except OSError:
+            raise FallbackRequired(f"{name} source removed")
+        patches.append(_ModulePatch(name, module, path, sources[name], new_source))
+
+    globals_updated = 0
+    for patch in patches:
+        patch.module.__dict__.update(patch.globals)
+        globals_updated += len(patch.globals)
+    functions = sum(patch.apply_code() for patch in patches)
+
+    module_tracker.take_snapshot(root)
+    remember(root)
+    log.debug("热补丁: %d 个模块, %d 个函数, %d 个全局变量",
+              len(patches), functions, globals_updated)
+    return len(patches), functions, globals_updated
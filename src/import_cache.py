@@ -0,0 +1,84 @@
+# import_cache.py
+import importlib
+import importlib.util
+import os
+import sys
+from typing import Optional, Tuple
+
+from . import module_tracker, precompile
+from .data_manager import dm
+from .log import log
+
+
+def _normalize(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path or os.getcwd()))
+
+
+def addon_directories(entry_file: str) -> Tuple[str, Optional[str]]:
+    """插件所在的搜索目录与插件包目录（单文件插件没有包目录）"""
+    directory = os.path.dirname(_normalize(entry_file))
+    if os.path.basename(entry_file) == "__init__.py":
+        return os.path.dirname(directory), directory
+    return directory, None
+
+
+def invalidate(module_name: str) -> int:
+    """只使覆盖插件目录的路径查找器缓存失效，返回失效的查找器数
+
+    importlib.invalidate_caches() 会清空 sys.path 上所有目录的缓存，之后整个进程中的
+    导入都要重新列出这些目录；插件路径未知时仍退回到全局失效
+    """
+    entry_file = dm.addons_paths.get(module_name)
+    if not entry_file:
+        log.debug("插件路径未知，清除全部导入缓存: %s", module_name)
+        importlib.invalidate_caches()
+        return sum(finder is not None for finder in sys.path_importer_cache.values())
+    search_dir, package_dir = addon_directories(entry_file)
+    package_prefix = package_dir + os.sep if package_dir else None
+
+    count = 0
+    for path, finder in list(sys.path_importer_cache.items()):
+        if finder is None or not hasattr(finder, "invalidate_caches"):
+            continue
+        normalized = _normalize(path)
+        if normalized == search_dir or (package_dir and (
+                normalized == package_dir or normalized.startswith(package_prefix))):
+            finder.invalidate_caches()
+            count += 1
+    log.debug("使 %d 个查找器缓存失效: %s", count, package_dir or search_dir)
+    return count
+
+
+def drop_stale_bytecode(module_name: str) -> int:
+    """删除插件中源码已变更或已删除的模块的字节码，返回删除的文件数
+
+    只检查模块快照中记录为已变更的文件，与插件包的大小无关；
+    删除源文件后残留的字节码会让目录中看起来仍有该模块，过期的字节码在导入时会被读取校验后再重写。
+    正在后台编译的文件会被跳过，以免删除刚写入或正在写入的字节码
+    """
+    if sys.pycache_prefix:
+        return 0
+    snapshot = dm.module_snapshots.get(module_name)
+    changed = module_tracker.changed_modules(module_name)
+    if snapshot is None or not changed:
+        return 0
+
+    removed = 0
+    for name in changed:
+        source = snapshot.files[name]
+        try:
+            cached = importlib.util.cache_from_source(source)
+        except (NotImplementedError, ValueError):
+            continue
+        if os.path.exists(source) and (precompile.is_compiling(source) or not precompile.is_stale(source)):
+            continue
+        try:
+            os.unlink(cached)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.debug("无法删除字节码 %s: %s", cached, e)
+    if removed:
+        log.debug("删除过期字节码: %d 个", removed)
+    return removed
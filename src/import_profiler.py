@@ -0,0 +1,148 @@
+# import_profiler.py
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from .data_manager import dm
+from .log import log
+from .meta_finder import WrappingFinder
+
+
+class ImportNode:
+    """导入耗时树中的一个节点"""
+
+    __slots__ = ("name", "children", "cumulative_ns")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.children: List["ImportNode"] = []
+        self.cumulative_ns = 0
+
+    @property
+    def self_ns(self) -> int:
+        """不含子导入的耗时"""
+        return max(0, self.cumulative_ns - sum(c.cumulative_ns for c in self.children))
+
+    def walk(self, depth: int = 0):
+        """深度优先遍历 (深度, 节点)"""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+class ImportProfile:
+    """一次重载期间的导入耗时记录"""
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+        self.root = ImportNode(module_name)
+        self._stack: List[ImportNode] = [self.root]
+        # (模块, 原始 loader)，结束后还原 __loader__
+        self._wrapped = []
+
+    def nodes(self) -> List[ImportNode]:
+        """所有导入节点（不含根节点）"""
+        return [node for depth, node in self.root.walk() if depth > 0]
+
+    def top(self, count: int = 15) -> List[ImportNode]:
+        """按自身耗时排序的前 N 个模块"""
+        return sorted(self.nodes(), key=lambda n: n.self_ns, reverse=True)[:count]
+
+    def total_ns(self) -> int:
+        return sum(c.cumulative_ns for c in self.root.children)
+
+    def format(self) -> str:
+        """以 python -X importtime 的格式输出"""
+        lines = [f"# import time of {self.module_name} reload",
+                 "import time: self [us] | cumulative | imported package"]
+        for depth, node in self.root.walk():
+            if depth == 0:
+                continue
+            lines.append(
+                f"import time: {node.self_ns // 1000:>9} | {node.cumulative_ns // 1000:>10} | "
+                f"{'  ' * (depth - 1)}{node.name}")
+        return "\n".join(lines) + "\n"
+
+
+class _TimingLoader:
+    """包装原始 loader，记录 exec_module 的耗时与嵌套关系"""
+
+    def __init__(self, loader, node: ImportNode, profile: ImportProfile):
+        self._loader = loader
+        self._node = node
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        profile = self._profile
+        profile._wrapped.append((module, self._loader))
+        parent = profile._stack[-1]
+        parent.children.append(self._node)
+        profile._stack.append(self._node)
+        start = time.perf_counter_ns()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._node.cumulative_ns += time.perf_counter_ns() - start
+            profile._stack.pop()
+
+
+class _ProfilingFinder(WrappingFinder):
+    """位于 sys.meta_path 首位的查找器，为找到的模块包装计时 loader"""
+
+    def __init__(self, profile: ImportProfile):
+        self._profile = profile
+
+    def wrap_spec(self, fullname, spec, find_ns):
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        node = ImportNode(fullname)
+        # 查找耗时计入该模块
+        node.cumulative_ns = find_ns
+        spec.loader = _TimingLoader(spec.loader, node, self._profile)
+        return spec
+
+
+@contextmanager
+def profile_imports(module_name: str):
+    """在上下文期间记录所有新导入模块的耗时树"""
+    profile = ImportProfile(module_name)
+    finder = _ProfilingFinder(profile)
+    sys.meta_path.insert(0, finder)
+    try:
+        yield profile
+    finally:
+        try:
+            sys.meta_path.remove(finder)
+        except ValueError:
+            pass
+        # 还原模块的 loader，避免依赖 loader 类型的代码出错
+        for module, loader in profile._wrapped:
+            try:
+                module.__loader__ = loader
+                if getattr(module, "__spec__", None) is not None:
+                    module.__spec__.loader = loader
+            except Exception:
+                pass
+        profile._wrapped.clear()
+        dm.import_profile = profile
+        log.debug("导入耗时: %s 共 %d 个模块, %.1f ms",
+                  module_name, len(profile.nodes()), profile.total_ns() / 1e6)
+
+
+def export(profile: ImportProfile, directory: Optional[str] = None) -> str:
+    """将导入耗时树写入文本文件，返回文件路径"""
+    directory = directory or tempfile.gettempdir()
+    safe_name = profile.module_name.replace(".", "_")
+    path = os.path.join(directory, f"addon_reloader_importtime_{safe_name}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(profile.format())
+    return path
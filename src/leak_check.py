@@ -0,0 +1,263 @@
+# leak_check.py
+import gc
+import sys
+import tracemalloc
+import types
+import weakref
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .data_manager import dm
+from .log import log
+
+
+# 每次检查最多追踪引用链的存活对象数
+_MAX_CHAINS = 5
+# 引用链的最大长度与搜索的对象数上限（每个对象一次 gc.get_referrers，都要扫描整个堆）
+_MAX_DEPTH = 4
+_MAX_VISITED = 300
+# tracemalloc 记录的帧数与报告的分配位置数
+_TRACE_FRAMES = 1
+_TOP_ALLOCATIONS = 10
+
+# tracemalloc 是否由本插件启动
+_started_tracemalloc = False
+
+
+class Generation:
+    """一代已移除的模块及其类（弱引用）"""
+
+    def __init__(self, root: str, index: int):
+        self.root = root
+        self.index = index
+        # (描述, 弱引用)
+        self.refs: List[Tuple[str, weakref.ref]] = []
+
+
+class Survivor:
+    """一个未被释放的旧对象"""
+
+    def __init__(self, label: str, generation: int, ref: weakref.ref):
+        self.label = label
+        self.generation = generation
+        self.ref = ref
+        # 从对象到仍在使用的根（模块全局变量等）的引用链，查看报告时才搜索（None 为尚未搜索）
+        self.chain: Optional[List[str]] = None
+
+
+class LeakReport:
+    """一次重载后的泄漏检查结果"""
+
+    def __init__(self, module_name: str, generation: int):
+        self.module_name = module_name
+        self.generation = generation
+        self.survivors: List[Survivor] = []
+        # 存活对象总数（只为前几个追踪引用链）
+        self.alive_count = 0
+        # 每代存活对象数
+        self.generations: Dict[int, int] = {}
+        self.collected = 0
+        # tracemalloc 统计的重载前后内存差(字节)，未开启时为 None
+        self.memory_delta: Optional[int] = None
+        # 仍然存活的旧模块（弱引用），搜索引用链时排除
+        self.old_modules: List[weakref.ref] = []
+        self.top_allocations: List[str] = []
+
+
+def track(root: str, module_names: List[str]) -> None:
+    """在移除模块前记录它们及其中定义的类"""
+    index = dm.leak_generation_counter.get(root, 0) + 1
+    dm.leak_generation_counter[root] = index
+    generation = Generation(root, index)
+    for name in module_names:
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        try:
+            generation.refs.append((f"module {name}", weakref.ref(module)))
+        except TypeError:
+            continue
+        for value in list(vars(module).values()):
+            if isinstance(value, type) and value.__module__ == name:
+                generation.refs.append(
+                    (f"class {name}.{value.__qualname__}", weakref.ref(value)))
+    dm.leak_generations.setdefault(root, []).append(generation)
+
+
+def memory_snapshot() -> tracemalloc.Snapshot:
+    """重载前的内存快照（首次调用时启动 tracemalloc）"""
+    global _started_tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(_TRACE_FRAMES)
+        _started_tracemalloc = True
+        log.info("已启动 tracemalloc，从下一次重载开始统计的内存变化更准确")
+    return tracemalloc.take_snapshot()
+
+
+def _live_roots(old_modules: set) -> Dict[int, str]:
+    """仍在使用的模块全局字典，作为引用链的终点"""
+    roots = {}
+    for name, module in list(sys.modules.items()):
+        if module is None or id(module) in old_modules:
+            continue
+        try:
+            roots[id(vars(module))] = f"module {name}"
+        except TypeError:
+            continue
+    # 应用处理器列表不在任何模块字典中
+    try:
+        import bpy
+        for name in dir(bpy.app.handlers):
+            handlers = getattr(bpy.app.handlers, name)
+            if isinstance(handlers, list):
+                roots[id(handlers)] = f"bpy.app.handlers.{name}"
+    except Exception:
+        pass
+    return roots
+
+
+def _describe(obj, child) -> str:
+    """描述引用链中的一个对象以及它如何引用下一个对象"""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if value is child:
+                return f"dict[{key!r}]"
+        return f"dict ({len(obj)} keys)"
+    if isinstance(obj, (list, tuple)):
+        return f"{type(obj).__name__} (len {len(obj)})"
+    if isinstance(obj, types.FunctionType):
+        return f"function {obj.__module__}.{obj.__qualname__}"
+    if isinstance(obj, types.MethodType):
+        return f"bound method {getattr(obj.__func__, '__qualname__', '?')}"
+    if isinstance(obj, types.CellType):
+        return "closure cell"
+    if isinstance(obj, type):
+        return f"class {obj.__module__}.{obj.__qualname__}"
+    if isinstance(obj, types.ModuleType):
+        return f"module {obj.__name__}"
+    return type(obj).__name__
+
+
+def referrer_chain(ref: weakref.ref, roots: Dict[int, str]) -> List[str]:
+    """广度优先反向搜索 gc 引用者，返回从根到目标的引用链"""
+    target = ref()
+    if target is None:
+        return []
+    # 只保存 id 与对象字典，避免搜索用的容器本身成为引用者
+    objects: Dict[int, object] = {id(target): target}
+    parents: Dict[int, int] = {}
+    depths: Dict[int, int] = {id(target): 0}
+    pending = deque([id(target)])
+    ignored = {id(objects), id(parents), id(depths), id(pending), id(sys._getframe())}
+
+    found = None
+    while pending and len(objects) < _MAX_VISITED:
+        oid = pending.popleft()
+        if depths[oid] >= _MAX_DEPTH:
+            continue
+        referrers = gc.get_referrers(objects[oid])
+        ignored.add(id(referrers))
+        for referrer in referrers:
+            rid = id(referrer)
+            if rid in ignored or rid in objects or isinstance(referrer, types.FrameType):
+                continue
+            objects[rid] = referrer
+            parents[rid] = oid
+            depths[rid] = depths[oid] + 1
+            if rid in roots:
+                found = rid
+                break
+            pending.append(rid)
+        del referrers
+        if found is not None:
+            break
+
+    chain = []
+    if found is not None:
+        # 从根走回目标
+        chain.append(roots[found])
+        node = found
+        while node != id(target):
+            child = parents[node]
+            chain.append(_describe(objects[node], objects[child]))
+            node = child
+    objects.clear()
+    return chain
+
+
+def check(root: str, before: Optional[tracemalloc.Snapshot]) -> LeakReport:
+    """重载完成后执行垃圾回收，报告仍然存活的旧模块/类及其引用链"""
+    generations = dm.leak_generations.get(root, [])
+    report = LeakReport(root, generations[-1].index if generations else 0)
+    report.collected = gc.collect()
+
+    # (代, 描述, 弱引用)，不持有旧对象，以免干扰引用链搜索
+    alive: List[Tuple[int, str, weakref.ref]] = []
+    for generation in generations:
+        count = 0
+        for label, ref in generation.refs:
+            obj = ref()
+            if obj is None:
+                continue
+            count += 1
+            alive.append((generation.index, label, ref))
+            if isinstance(obj, types.ModuleType):
+                report.old_modules.append(ref)
+        obj = None
+        if count:
+            report.generations[generation.index] = count
+    # 完全释放的旧代不再追踪
+    dm.leak_generations[root] = [g for g in generations if g.index in report.generations]
+    report.alive_count = len(alive)
+
+    # 优先追踪类，模块对象通常只通过其中的函数/类被间接保留
+    alive.sort(key=lambda item: not item[1].startswith("class"))
+    for index, label, ref in alive[:_MAX_CHAINS]:
+        report.survivors.append(Survivor(label, index, ref))
+
+    if before is not None and tracemalloc.is_tracing():
+        after = tracemalloc.take_snapshot()
+        stats = after.compare_to(before, "filename")
+        report.memory_delta = sum(stat.size_diff for stat in stats)
+        report.top_allocations = [str(stat) for stat in stats[:_TOP_ALLOCATIONS]]
+
+    dm.leak_report = report
+    _log_report(report)
+    return report
+
+
+def _log_report(report: LeakReport) -> None:
+    if report.memory_delta is not None:
+        log.info("重载内存变化: %+.1f KB", report.memory_delta / 1024)
+        for line in report.top_allocations:
+            log.debug("  %s", line)
+    if not report.alive_count:
+        log.info("泄漏检查: %s 的旧模块已全部释放", report.module_name)
+        return
+    log.warning("泄漏检查: %s 有 %d 个旧对象未释放 (代: %s)", report.module_name,
+                report.alive_count,
+                ", ".join(f"#{index}: {count}" for index, count in sorted(report.generations.items())))
+    for survivor in report.survivors:
+        log.warning("  #%d %s", survivor.generation, survivor.label)
+    log.warning("  引用链见 Leak Report")
+
+
+def trace_chains(report: LeakReport) -> None:
+    """为报告中的存活对象搜索引用链（打开泄漏报告时调用，每个对象只搜索一次）"""
+    pending = [survivor for survivor in report.survivors if survivor.chain is None]
+    if not pending:
+        return
+    old_modules = {id(module) for module in (ref() for ref in report.old_modules) if module is not None}
+    roots = _live_roots(old_modules)
+    for survivor in pending:
+        survivor.chain = referrer_chain(survivor.ref, roots)
+        if survivor.chain:
+            log.debug("  #%d %s: %s", survivor.generation, survivor.label, " -> ".join(survivor.chain))
+
+
+def shutdown() -> None:
+    """停止由本插件启动的 tracemalloc"""
+    global _started_tracemalloc
+    if _started_tracemalloc and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _started_tracemalloc = False
@@ -1,35 +1,127 @@
 # log.py
 import logging
+import logging.handlers
+import queue
+from collections import deque
+from typing import List, Optional, Tuple
+
+# 日志级别缩写
+_SHORT_LEVELS = {
+    "DEBUG": "D",
+    "INFO": "I",
+    "WARNING": "W",
+    "ERROR": "E",
+    "CRITICAL": "C",
+}
+
+# 偏好设置加载前的默认值: 只输出警告与错误
+DEFAULT_LEVEL = "WARNING"
+DEFAULT_CAPACITY = 500
 
 
 class _ShortLevelFormatter(logging.Formatter):
+    """输出 "RA.D: 消息" 格式，不修改日志记录"""
+
     def format(self, record: logging.LogRecord) -> str:
-        record.levelname_short = {
-            "DEBUG": "D",
-            "INFO": "I",
-            "WARNING": "W",
-            "ERROR": "E",
-            "CRITICAL": "C",
-        }.get(record.levelname, record.levelname)
-        try:
-            return super().format(record)
-        finally:
-            if hasattr(record, "levelname_short"):
-                delattr(record, "levelname_short")
+        text = f"{record.name}.{_SHORT_LEVELS.get(record.levelname, record.levelname)}: {record.getMessage()}"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            text = f"{text}\n{record.exc_text}"
+        if record.stack_info:
+            text = f"{text}\n{self.formatStack(record.stack_info)}"
+        return text
+
+
+class _RingHandler(logging.Handler):
+    """在内存中保留最近的日志 (时间, 级别, 文本)，供日志窗口查看"""
+
+    def __init__(self, capacity: int):
+        super().__init__()
+        self.records: deque = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # 在日志线程中调用，已持有处理器锁
+        self.records.append((record.created, record.levelno, self.format(record)))
+
+    def resize(self, capacity: int) -> None:
+        with self.lock:
+            if self.records.maxlen != capacity:
+                self.records = deque(self.records, maxlen=capacity)
+
+    def snapshot(self) -> List[Tuple[float, int, str]]:
+        with self.lock:
+            return list(self.records)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.records.clear()
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """把记录原样放入队列: 标准 QueueHandler.prepare() 会在调用线程中格式化消息与异常堆栈
+
+    参数在日志线程格式化，记录日志后被修改的可变参数会显示修改后的值
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# 格式化与输出在后台线程中进行，主线程只把记录放入队列
+_listener: Optional[logging.handlers.QueueListener] = None
+_buffer: Optional[_RingHandler] = None
 
 
 def setup_logger() -> logging.Logger:
     """配置日志"""
+    global _listener, _buffer
     logger = logging.getLogger("RA")
     if not logger.hasHandlers():
-        logger.setLevel(logging.DEBUG)
-        # logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler()
-        handler.setFormatter(_ShortLevelFormatter("%(name)s.%(levelname_short)s: %(message)s"))
+        logger.setLevel(DEFAULT_LEVEL)
+        formatter = _ShortLevelFormatter()
+        console = logging.StreamHandler()
+        console.setFormatter(formatter)
+        _buffer = _RingHandler(DEFAULT_CAPACITY)
+        _buffer.setFormatter(formatter)
 
-        logger.addHandler(handler)
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, console, _buffer)
+        logger.addHandler(_DeferredQueueHandler(records))
+        _listener.start()
     return logger
 
 
+def configure_logging(level: str, capacity: int) -> None:
+    """按偏好设置调整日志级别与保留的记录数"""
+    log.setLevel(level)
+    if _buffer is not None:
+        _buffer.resize(capacity)
+
+
+def recent_records() -> List[Tuple[float, int, str]]:
+    """最近的日志记录（从旧到新）"""
+    return _buffer.snapshot() if _buffer is not None else []
+
+
+def clear_records() -> None:
+    """清空保留的日志记录"""
+    if _buffer is not None:
+        _buffer.clear()
+
+
+def shutdown_logger() -> None:
+    """输出队列中剩余的日志并停止日志线程（注销插件时调用）"""
+    global _listener, _buffer
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in list(log.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            log.removeHandler(handler)
+    _listener = None
+    _buffer = None
+
+
 log: logging.Logger = setup_logger()
 """ RA 日志实例 """
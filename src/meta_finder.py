@@ -0,0 +1,44 @@
+# meta_finder.py
+import sys
+import time
+
+
+class WrappingFinder:
+    """位于 sys.meta_path 首位、包装找到的 loader 的查找器基类
+
+    导入耗时分析与保留对象可能同时启用。只有最前面的包装查找器向真实的查找器查找，
+    找到后依次交给所有包装查找器包装；包装查找器之间不会互相调用
+    """
+
+    def find_spec(self, fullname, path=None, target=None):
+        wrappers = [finder for finder in sys.meta_path if isinstance(finder, WrappingFinder)]
+        if not wrappers or wrappers[0] is not self:
+            # 最前面的包装查找器已经查找过
+            return None
+        start = time.perf_counter_ns()
+        spec = find_real_spec(fullname, path, target)
+        if spec is None:
+            return None
+        find_ns = time.perf_counter_ns() - start
+        # 后插入（内层）的包装在外层
+        for wrapper in reversed(wrappers):
+            spec = wrapper.wrap_spec(fullname, spec, find_ns)
+        return spec
+
+    def wrap_spec(self, fullname, spec, find_ns: int):
+        """返回包装后的 spec，find_ns 为查找耗时"""
+        return spec
+
+    def invalidate_caches(self):
+        pass
+
+
+def find_real_spec(fullname, path=None, target=None):
+    """跳过所有包装查找器，从真实的查找器中查找模块"""
+    for finder in sys.meta_path:
+        if isinstance(finder, WrappingFinder) or not hasattr(finder, "find_spec"):
+            continue
+        spec = finder.find_spec(fullname, path, target)
+        if spec is not None:
+            return spec
+    return None
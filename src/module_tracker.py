@@ -0,0 +1,217 @@
+# module_tracker.py
+import ast
+import hashlib
+import importlib.util
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .data_manager import dm
+from .log import log
+
+
+# 文件指纹: (mtime_ns, size, sha1)
+FileStamp = Tuple[int, int, str]
+
+
+class ModuleSnapshot:
+    """某个插件包在加载时的源码指纹与包内导入关系"""
+
+    def __init__(self, root: str):
+        self.root = root
+        # 模块名 -> 源文件路径
+        self.files: Dict[str, str] = {}
+        # 模块名 -> 文件指纹
+        self.stamps: Dict[str, FileStamp] = {}
+        # 模块名 -> 该模块导入的包内模块
+        self.imports: Dict[str, Set[str]] = {}
+
+    def importers(self) -> Dict[str, Set[str]]:
+        """反向导入图: 模块名 -> 导入了它的包内模块"""
+        reverse: Dict[str, Set[str]] = {name: set() for name in self.files}
+        for name, deps in self.imports.items():
+            for dep in deps:
+                reverse.setdefault(dep, set()).add(name)
+        return reverse
+
+
+def package_module_names(root: str) -> Iterable[str]:
+    """列出 sys.modules 中属于该插件包的模块名"""
+    prefix = f"{root}."
+    return [
+        name for name, mod in list(sys.modules.items())
+        if mod is not None and (name == root or name.startswith(prefix))
+    ]
+
+
+def _source_file(module) -> Optional[str]:
+    """返回模块的 .py 源文件路径，非源码模块返回 None"""
+    path = getattr(module, "__file__", None)
+    if path and path.endswith(".py"):
+        return path
+    return None
+
+
+def _file_hash(path: str) -> str:
+    """计算文件内容哈希"""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def file_stamp(path: str, previous: Optional[FileStamp] = None) -> Optional[FileStamp]:
+    """获取文件指纹，mtime 与大小未变时复用上次的哈希"""
+    try:
+        st = os.stat(path)
+        if previous and previous[0] == st.st_mtime_ns and previous[1] == st.st_size:
+            return previous
+        return (st.st_mtime_ns, st.st_size, _file_hash(path))
+    except OSError:
+        return None
+
+
+def _parse_imports(path: str, module_name: str, is_package: bool) -> List[Tuple[str, Tuple[str, ...]]]:
+    """解析源码中的 import 语句，返回 (模块名, from 导入的名称) 列表"""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError) as e:
+        log.debug("解析导入失败 %s: %s", module_name, e)
+        return []
+
+    package = module_name if is_package else module_name.rpartition(".")[0]
+    found: List[Tuple[str, Tuple[str, ...]]] = []
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                found.append((alias.name, ()))
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                try:
+                    base = importlib.util.resolve_name(
+                        "." * node.level + (node.module or ""), package)
+                except (ImportError, ValueError):
+                    continue
+            else:
+                base = node.module or ""
+            if base:
+                found.append((base, tuple(alias.name for alias in node.names)))
+    return found
+
+
+def _resolve_deps(imports: List[Tuple[str, Tuple[str, ...]]], module_name: str,
+                  root: str, known: Set[str]) -> Set[str]:
+    """将导入语句解析为包内模块依赖"""
+    prefix = f"{root}."
+    root_depth = root.count(".") + 1
+    deps: Set[str] = set()
+
+    for base, names in imports:
+        if base != root and not base.startswith(prefix):
+            continue
+        if not names:
+            # import a.b.c 绑定的是 a，同时会导入 a 与 a.b
+            parts = base.split(".")
+            for i in range(root_depth, len(parts) + 1):
+                deps.add(".".join(parts[:i]))
+            continue
+        # from x import y: y 为子模块时只依赖子模块，否则依赖 x 本身
+        for name in names:
+            submodule = f"{base}.{name}"
+            if submodule in known:
+                deps.add(submodule)
+            else:
+                deps.add(base)
+
+    deps.discard(module_name)
+    return deps & known
+
+
+def take_snapshot(root: str) -> Optional[ModuleSnapshot]:
+    """记录插件包当前已加载模块的源码指纹与导入关系"""
+    previous = dm.module_snapshots.get(root)
+    snapshot = ModuleSnapshot(root)
+    raw_imports: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {}
+
+    for name in package_module_names(root):
+        module = sys.modules.get(name)
+        path = _source_file(module)
+        if not path:
+            continue
+        stamp = file_stamp(path, previous.stamps.get(name) if previous else None)
+        if stamp is None:
+            continue
+        is_package = os.path.basename(path) == "__init__.py"
+        snapshot.files[name] = path
+        snapshot.stamps[name] = stamp
+        raw_imports[name] = _parse_imports(path, name, is_package)
+
+    if not snapshot.files:
+        dm.module_snapshots.pop(root, None)
+        return None
+
+    known = set(snapshot.files)
+    for name, imports in raw_imports.items():
+        snapshot.imports[name] = _resolve_deps(imports, name, root, known)
+
+    dm.module_snapshots[root] = snapshot
+    log.debug("记录模块快照: %s (%d 个模块)", root, len(snapshot.files))
+    return snapshot
+
+
+def forget_snapshot(root: str) -> None:
+    """丢弃插件包的快照"""
+    dm.module_snapshots.pop(root, None)
+
+
+def changed_modules(root: str) -> Optional[Set[str]]:
+    """对比快照找出源码已变更的模块，没有快照时返回 None"""
+    snapshot = dm.module_snapshots.get(root)
+    if snapshot is None:
+        return None
+
+    changed: Set[str] = set()
+    for name, path in snapshot.files.items():
+        old = snapshot.stamps[name]
+        new = file_stamp(path, old)
+        if new is None or new[2] != old[2]:
+            changed.add(name)
+    return changed
+
+
+def eviction_set(root: str, changed: Set[str]) -> Set[str]:
+    """计算需要从 sys.modules 移除的模块: 变更模块及其所有传递导入者"""
+    snapshot = dm.module_snapshots.get(root)
+    if snapshot is None:
+        return set(package_module_names(root))
+
+    # 根模块总是需要重新导入以便重新执行 register()
+    # 快照之后才加载的模块没有导入关系记录，保守地一并移除
+    reverse = snapshot.importers()
+    evict: Set[str] = set()
+    pending = [root, *changed]
+    pending.extend(set(package_module_names(root)) - set(snapshot.files))
+    while pending:
+        name = pending.pop()
+        if name in evict:
+            continue
+        evict.add(name)
+        pending.extend(reverse.get(name, ()))
+    return evict
+
+
+def reattach_submodules(root: str) -> None:
+    """将子模块重新挂载到父包上（保留在缓存中的模块不会被导入系统自动挂载）"""
+    for name in package_module_names(root):
+        if name == root:
+            continue
+        parent_name, _, child = name.rpartition(".")
+        parent = sys.modules.get(parent_name)
+        module = sys.modules.get(name)
+        if parent is None or module is None:
+            continue
+        if getattr(parent, child, None) is not module:
+            try:
+                setattr(parent, child, module)
+            except Exception as e:
+                log.debug("挂载子模块失败 %s: %s", name, e)
@@ -1,17 +1,19 @@
 # operators.py
-import importlib
+import logging
 import os
 import subprocess
 import sys
+import time
 import traceback
-from typing import List, Optional, Set, Tuple
+from typing import List, Set
 
 import addon_utils
 import bpy
 
-from . import utils
+from . import addon_graph, broadcast, catalog, import_cache, import_profiler, leak_check, module_tracker, reload_job, reload_stats, scheduler, search, utils
 from .data_manager import dm
-from .log import log
+from .log import clear_records, log, recent_records
+from .preferences import get_prefs
 
 
 class ADDONRELOADER_OT_reload_addon(bpy.types.Operator):
@@ -20,11 +22,60 @@ class ADDONRELOADER_OT_reload_addon(bpy.types.Operator):
     bl_label = "Reload Addon"
     bl_description = "Fast Reload"
 
+    profile: bpy.props.BoolProperty(
+        name="Profile Reload",
+        description="Profile unregister() and register() with cProfile and save .prof dumps",
+        default=False,
+        options={"SKIP_SAVE"},
+    )  # type: ignore
+
+    cascade: bpy.props.BoolProperty(
+        name="Also Reload Dependent Addons",
+        description="Reload the other addons that hold references to this addon's modules",
+        default=False,
+        options={"SKIP_SAVE"},
+    )  # type: ignore
+
+    dependents: bpy.props.StringProperty(
+        options={"SKIP_SAVE", "HIDDEN"},
+    )  # type: ignore
+
     @classmethod
     def poll(cls, context: bpy.types.Context) -> bool:
         """检查是否可以选择插件/扩展进行重载"""
         return dm.last_selected[0] != "no_addons"
 
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event) -> Set[str]:
+        """有其他插件依赖所选插件时询问是否一并重载"""
+        prefs = get_prefs()
+        if prefs and prefs.cascade_mode == "ASK":
+            dependents = self._find_dependents(dm.last_selected[0])
+            if dependents:
+                self.dependents = ",".join(dependents)
+                self.cascade = True
+                return context.window_manager.invoke_props_dialog(self, width=360)
+        return self.execute(context)
+
+    def draw(self, context: bpy.types.Context) -> None:
+        """绘制级联重载确认对话框"""
+        layout = self.layout
+        layout.label(text="These addons reference modules of the selected addon:", icon="LINKED")
+        col = layout.column(align=True)
+        for name in self.dependents.split(","):
+            col.label(text=name)
+        layout.prop(self, "cascade")
+
+    def _find_dependents(self, module_name: str) -> List[str]:
+        """查找引用了该插件模块的其他插件"""
+        try:
+            dependents = addon_graph.dependent_addons(module_name, dm.addons_paths)
+        except Exception as e:
+            log.debug("查找依赖插件失败: %s", e)
+            return []
+        if dependents:
+            log.debug("依赖 %s 的插件: %s", module_name, ", ".join(dependents))
+        return dependents
+
     def execute(self, context: bpy.types.Context) -> Set[str]:
         """执行插件/扩展重载操作"""
         target_item = dm.last_selected
@@ -37,6 +88,19 @@ class ADDONRELOADER_OT_reload_addon(bpy.types.Operator):
                 self.report({"WARNING"}, "Cannot reload Addon Reloader itself")
                 return {"CANCELLED"}
 
+            # 级联重载引用了该插件模块的其他插件
+            prefs = get_prefs()
+            if self.cascade or (prefs and prefs.cascade_mode == "AUTO"):
+                dependents = self._find_dependents(target_item[0])
+                if dependents:
+                    return self._cascade_reload(context, target_item, dependents)
+
+            # 后台分步重载，或已有该插件的后台重载时合并请求
+            if (prefs and prefs.background_reload) or scheduler.is_busy(target_item[0]):
+                scheduler.request(target_item[0], profile=self.profile)
+                self.report({"INFO"}, f"[ {target_item[1]} ] Reload queued")
+                return {"FINISHED"}
+
             # 检查插件/扩展是否启用
             was_enabled = utils.is_addon_enabled(target_item[0])
 
@@ -45,13 +109,19 @@ class ADDONRELOADER_OT_reload_addon(bpy.types.Operator):
                 context, target_item[0], was_enabled)
 
             if success:
-                utils.refresh_addon_list(force=True)
+                utils.refresh_addon_list()
                 utils.sync_addon_state(context)
+                self._show_import_profile(context)
                 self.report(
                     {"INFO"}, f"[ {target_item[1]} ] Reloaded!")
+                for call_profile in dm.call_profiles:
+                    self.report({"INFO"}, call_profile.summary())
+                broadcast.after_reload(target_item[0])
                 return {"FINISHED"}
 
             self.report({"ERROR"}, f"[ {target_item[1]} ] Reload Failed!")
+            for call_profile in dm.call_profiles:
+                self.report({"INFO"}, call_profile.summary())
             return {"CANCELLED"}
 
         except Exception as e:
@@ -60,91 +130,175 @@ class ADDONRELOADER_OT_reload_addon(bpy.types.Operator):
             log.debug("重载时发生错误 %s : %s", target_item[0], str(e))
             return {"CANCELLED"}
 
-    def _reload_modules(self, context: bpy.types.Context, module_name: str, was_enabled: bool) -> bool:
-        """重新加载插件/扩展及其所有相关模块"""
-        root_module_name = module_name
-        log.debug("正在重载模块: %s", root_module_name)
-
+    def _cascade_reload(self, context: bpy.types.Context, target_item, dependents: List[str]) -> Set[str]:
+        """将所选插件与依赖它的插件一起批量重载"""
+        modules = [target_item[0], *dependents]
+        log.info("级联重载: %s", ", ".join(modules))
         try:
-            # 获取模块
-            target_module = None
-            for mod in addon_utils.modules():
-                if mod.__name__ == root_module_name:
-                    target_module = mod
-                    break
-
-            # 如果未找到模块，记录错误并返回False
-            if not target_module:
-                log.error("未找到模块: %s", root_module_name)
-                return False
-
-            # 保存模块路径
-            module_path = os.path.dirname(target_module.__file__)
-            log.debug("模块路径: %s", module_path)
-
-            # 完全卸载模块，就像Blender卸载时一样
-            log.debug("正在完全移除模块: %s", root_module_name)
-
-            # 确保模块被完全禁用
-            addon_utils.disable(root_module_name)
-
-            # 手动注销所有已注册的类
-            if hasattr(target_module, "classes"):
-                for cls in reversed(target_module.classes):
-                    try:
-                        log.debug("手动注销类: %s", cls.__name__)
-                        bpy.utils.unregister_class(cls)
-                    except Exception as e:
-                        log.debug("注销类失败 %s: %s", cls.__name__, str(e))
-
-            # 调用模块的unregister函数
-            if hasattr(target_module, "unregister"):
-                try:
-                    target_module.unregister()
-                    log.debug("模块注销成功")
-                except Exception as e:
-                    log.error("模块注销失败: %s", str(e))
+            result = bpy.ops.addonreloader.batch_reload(module_names=",".join(modules))
+        except RuntimeError as e:
+            self.report({"ERROR"}, f"[ {target_item[1]} ] Reload Failed: {str(e)}")
+            return {"CANCELLED"}
 
-            # 从sys.modules中完全移除所有相关模块
-            modules_to_remove: List[str] = [
-                name for name in sys.modules
-                if name == root_module_name or name.startswith(f"{root_module_name}.")
-            ]
+        if "FINISHED" in result:
+            self.report(
+                {"INFO"},
+                f"[ {target_item[1]} ] Reloaded with dependents: {', '.join(dependents)}")
+            return {"FINISHED"}
+        self.report({"ERROR"}, f"[ {target_item[1]} ] Reload Failed!")
+        return {"CANCELLED"}
 
-            for name in modules_to_remove:
-                log.debug("从sys.modules移除模块: %s", name)
-                del sys.modules[name]
+    def _reload_modules(self, context: bpy.types.Context, module_name: str, was_enabled: bool) -> bool:
+        """重新加载插件/扩展及其所有相关模块（记录各阶段耗时）"""
+        job = reload_job.ReloadJob(module_name, was_enabled, profile=self.profile)
+        success = job.run()
+        for report_type, message in job.reports:
+            self.report(report_type, message)
+        return success
+
+    def _show_import_profile(self, context: bpy.types.Context) -> None:
+        """开启导入分析时显示耗时最多的导入"""
+        prefs = get_prefs()
+        if not (prefs and prefs.profile_imports and dm.import_profile):
+            return
+        if getattr(context, "window", None) is None:
+            return
+        try:
+            bpy.ops.addonreloader.show_import_profile("INVOKE_DEFAULT")
+        except Exception as e:
+            log.debug("显示导入耗时失败: %s", e)
 
-            # 清除importlib缓存
-            importlib.invalidate_caches()
 
-            # 如果模块原来已启用，则重新启用它
-            if was_enabled:
-                try:
-                    # 使用addon_utils重新启用模块，就像Blender安装时一样
-                    result = addon_utils.enable(root_module_name, default_set=True)
-                    if result is not None:
-                        log.debug("模块重新启用成功")
-                        return True
+class ADDONRELOADER_OT_batch_reload(bpy.types.Operator):
+    """按依赖顺序一次性重载多个插件/扩展"""
+    bl_idname = "addonreloader.batch_reload"
+    bl_label = "Batch Reload"
+    bl_description = "Reload several addons/extensions at once, ordered by their import dependencies"
 
-                    log.error("模块重新启用失败")
-                    return False
+    module_names: bpy.props.StringProperty(
+        name="Modules",
+        description="Comma separated module names to reload (empty: choose in a dialog)",
+        default="",
+        options={"SKIP_SAVE"},
+    )  # type: ignore
 
-                except Exception as e:
-                    log.error("启用模块失败: %s, 错误: %s", root_module_name, str(e))
-                    log.error(traceback.format_exc())
-                    self.report(
-                        {"ERROR"}, f"Failed to reload module {root_module_name}")
-                    return False
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event) -> Set[str]:
+        """未指定模块时弹出选择对话框"""
+        if self.module_names:
+            return self.execute(context)
+
+        # 根据当前列表重建选择项，保留之前的勾选
+        items = context.window_manager.addonreloader.batch_items
+        previous = {item.name for item in items if item.selected}
+        items.clear()
+        for entry in dm.show_lists:
+            if entry[0] == "no_addons":
+                continue
+            item = items.add()
+            item.name = entry[0]
+            item.label = entry[1]
+            item.selected = entry[0] in previous
+        return context.window_manager.invoke_props_dialog(self, width=360)
+
+    def draw(self, context: bpy.types.Context) -> None:
+        """绘制插件勾选列表"""
+        col = self.layout.column(align=True)
+        for item in context.window_manager.addonreloader.batch_items:
+            col.prop(item, "selected", text=item.label)
+
+    def _selected_modules(self, context: bpy.types.Context) -> List[str]:
+        """获取要重载的模块名称"""
+        if self.module_names:
+            names = [name.strip() for name in self.module_names.split(",")]
+        else:
+            names = [
+                item.name for item in context.window_manager.addonreloader.batch_items
+                if item.selected
+            ]
+        excluded = {dm.my_addon_names.get("Addon"), dm.my_addon_names.get("Extend")}
+        return [name for name in names if name and name not in excluded]
 
-            return True
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        """执行批量重载"""
+        roots = self._selected_modules(context)
+        if not roots:
+            self.report({"WARNING"}, "No addon/extension selected!")
+            return {"CANCELLED"}
 
+        timer = reload_stats.ReloadTimer("+".join(roots))
+        timer.meta["mode"] = "batch"
+        timer.meta["batch_roots"] = roots
+        success = False
+        try:
+            success = self._batch_reload(roots, timer)
         except Exception as e:
-            log.error("模块重载失败: %s, 错误: %s", root_module_name, str(e))
+            log.error("批量重载失败: %s", str(e))
             log.error(traceback.format_exc())
-            self.report(
-                {"ERROR"}, f"Error reloading module {root_module_name}: {str(e)}")
-            return False
+        finally:
+            prefs = get_prefs()
+            reload_stats.record(
+                timer.finish(success), prefs.timing_log_path if prefs else "")
+
+        # 所有插件处理完后只刷新一次列表
+        utils.refresh_addon_list()
+        utils.sync_addon_state(context)
+
+        if success:
+            self.report({"INFO"}, f"Reloaded {len(roots)} addons: {', '.join(roots)}")
+            for root in roots:
+                broadcast.after_reload(root)
+            return {"FINISHED"}
+        self.report({"ERROR"}, "Batch Reload Failed!")
+        return {"CANCELLED"}
+
+    def _batch_reload(self, roots: List[str], timer: reload_stats.ReloadTimer) -> bool:
+        """按依赖顺序禁用、统一清理、再按依赖顺序启用"""
+        with timer.phase("resolve"):
+            was_enabled = {root: utils.is_addon_enabled(root) for root in roots}
+            order = addon_graph.topological_order(
+                roots, addon_graph.addon_dependencies(roots))
+        timer.meta["order"] = order
+        log.debug("批量重载顺序: %s", " -> ".join(order))
+
+        # 依赖其他插件的先禁用
+        with timer.phase("disable"):
+            for root in reversed(order):
+                if was_enabled[root]:
+                    addon_utils.disable(root)
+
+        # 一次性移除所有相关模块
+        with timer.phase("purge"):
+            modules_to_remove = [
+                name for root in roots
+                for name in module_tracker.package_module_names(root)
+            ]
+            for name in modules_to_remove:
+                sys.modules.pop(name, None)
+        timer.meta["evicted"] = len(modules_to_remove)
+
+        with timer.phase("invalidate_caches"):
+            timer.meta["finders_invalidated"] = sum(import_cache.invalidate(root) for root in roots)
+            # 正在后台编译的文件由 drop_stale_bytecode 跳过
+            timer.meta["bytecode_dropped"] = sum(import_cache.drop_stale_bytecode(root) for root in roots)
+
+        # 被依赖的插件先启用
+        success = True
+        with timer.phase("enable"):
+            for root in order:
+                if not was_enabled[root]:
+                    module_tracker.forget_snapshot(root)
+                    continue
+                try:
+                    if addon_utils.enable(root, default_set=True) is None:
+                        log.error("模块重新启用失败: %s", root)
+                        success = False
+                        continue
+                except Exception as e:
+                    log.error("启用模块失败: %s, 错误: %s", root, str(e))
+                    success = False
+                    continue
+                module_tracker.take_snapshot(root)
+        return success
 
 
 class ADDONRELOADER_OT_dropdown_list(bpy.types.Operator):
@@ -152,42 +306,25 @@ class ADDONRELOADER_OT_dropdown_list(bpy.types.Operator):
     bl_idname = "addonreloader.dropdown_list"
     bl_label = "Addon List"
     bl_description = "List"
-    bl_property = "enum_items"
-
-    def _get_enum_items(self, context: bpy.types.Context) -> List[Tuple[str, str, str, str, int]]:
-        """获取枚举项列表"""
-        items = dm.show_lists
-        return items if items else dm.ddmenu_default_val
-
-    enum_items: bpy.props.EnumProperty(items=_get_enum_items)  # type: ignore
-
-    def _find_selected_item(self, idname: str) -> Optional[Tuple[str, str, str, str, int]]:
-        """根据ID名称查找插件/扩展"""
-        for item_tuple in dm.show_lists:
-            if item_tuple[0] == idname:
-                return item_tuple
-        return None
-
-    def execute(self, context: bpy.types.Context) -> Set[str]:
-        """执行插件/扩展选择操作"""
-        if not dm.show_lists:
-            return {"CANCELLED"}
 
-        log.info("选择 %s", self.enum_items)
-
-        # 更新最后选择的值
-        last_selected = self._find_selected_item(self.enum_items)
-        if last_selected:
-            dm.last_selected = last_selected
-            utils.sync_addon_state(context)
-
-        return {"FINISHED"}
+    def draw(self, context: bpy.types.Context) -> None:
+        """搜索框（按匹配度、收藏与最近使用排序）"""
+        layout = self.layout
+        row = layout.row(align=True)
+        # 弹窗打开时直接进入搜索框
+        row.activate_init = True
+        row.prop(context.window_manager.addonreloader, "search", text="", icon="VIEWZOOM")
+        if dm.last_selected[0] != "no_addons":
+            starred = search.is_favorite(dm.last_selected[0])
+            row.operator("addonreloader.toggle_favorite", text="",
+                         icon="SOLO_ON" if starred else "SOLO_OFF")
 
     def invoke(self, context: bpy.types.Context, event: bpy.types.Event) -> Set[str]:
         """调用插件/扩展选择下拉列表"""
-        # 显示下拉列表前先刷新列表
-        log.debug("显示下拉列表前自动刷新")
-        utils.refresh_addon_list(force=True)
+        # 显示下拉列表前应用失效事件（列表未变化时直接使用）
+        utils.refresh_addon_list()
+        # 清空上次的搜索（不触发选择）
+        context.window_manager.addonreloader["search"] = ""
 
         # 保存当前鼠标位置
         current_mouse_x = event.mouse_x
@@ -199,8 +336,8 @@ class ADDONRELOADER_OT_dropdown_list(bpy.types.Operator):
         context.window.cursor_warp(
             current_mouse_x + offset_x, current_mouse_y + offset_y)
 
-        # 调用原始搜索弹窗
-        context.window_manager.invoke_search_popup(self)
+        # 调用搜索弹窗
+        context.window_manager.invoke_popup(self, width=320)
 
         # 操作完成后恢复鼠标位置
         context.window.cursor_warp(current_mouse_x, current_mouse_y)
@@ -208,6 +345,22 @@ class ADDONRELOADER_OT_dropdown_list(bpy.types.Operator):
         return {"FINISHED"}
 
 
+class ADDONRELOADER_OT_toggle_favorite(bpy.types.Operator):
+    """收藏或取消收藏当前选择的插件"""
+    bl_idname = "addonreloader.toggle_favorite"
+    bl_label = "Favorite"
+    bl_description = "Pin the selected addon to the top of the search results"
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        """执行收藏切换"""
+        module_name = dm.last_selected[0]
+        if module_name == "no_addons":
+            return {"CANCELLED"}
+        starred = search.toggle_favorite(module_name)
+        log.info("%s %s", "收藏" if starred else "取消收藏", module_name)
+        return {"FINISHED"}
+
+
 class ADDONRELOADER_OT_refresh_list(bpy.types.Operator):
     """刷新可用插件/扩展列表"""
     bl_idname = "addonreloader.refresh_list"
@@ -228,6 +381,227 @@ class ADDONRELOADER_OT_refresh_list(bpy.types.Operator):
         return {"CANCELLED"}
 
 
+class ADDONRELOADER_OT_measure_refresh(bpy.types.Operator):
+    """测量刷新插件列表的耗时（冷启动与缓存命中）"""
+    bl_idname = "addonreloader.measure_refresh"
+    bl_label = "Measure Refresh Time"
+    bl_description = "Time a cold (cache cleared) and several warm refreshes of the addon list"
+
+    runs: bpy.props.IntProperty(
+        name="Runs", default=5, min=1, max=100)  # type: ignore
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        """执行刷新耗时测量"""
+        # 冷启动: 清空目录缓存
+        catalog.clear()
+        utils.refresh_addon_list(force=True)
+        cold_ms = dm.last_refresh_ms
+
+        # 缓存命中
+        warm_total = 0.0
+        for _ in range(self.runs):
+            utils.refresh_addon_list(force=True)
+            warm_total += dm.last_refresh_ms
+        warm_ms = warm_total / self.runs
+
+        log.info("刷新耗时: 冷 %.2f ms, 热 %.2f ms (%d 次平均)", cold_ms, warm_ms, self.runs)
+        self.report(
+            {"INFO"},
+            f"Refresh: cold {cold_ms:.2f} ms, cached {warm_ms:.2f} ms "
+            f"(avg of {self.runs}, {len(dm.show_lists)} items)")
+        return {"FINISHED"}
+
+
+class ADDONRELOADER_OT_show_import_profile(bpy.types.Operator):
+    """显示上次重载中耗时最多的导入"""
+    bl_idname = "addonreloader.show_import_profile"
+    bl_label = "Import Time"
+    bl_description = "Show the slowest imports of the last profiled reload"
+
+    count: bpy.props.IntProperty(
+        name="Count", default=15, min=1, max=100)  # type: ignore
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context) -> bool:
+        return dm.import_profile is not None
+
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event) -> Set[str]:
+        """弹出导入耗时窗口"""
+        return context.window_manager.invoke_popup(self, width=480)
+
+    def draw(self, context: bpy.types.Context) -> None:
+        """绘制耗时最多的导入"""
+        profile = dm.import_profile
+        layout = self.layout
+        layout.label(
+            text=f"{profile.module_name}: {len(profile.nodes())} imports, "
+                 f"{profile.total_ns() / 1e6:.1f} ms",
+            icon="TIME")
+
+        col = layout.column(align=True)
+        row = col.row()
+        row.label(text="Module")
+        row.label(text="Self / Cumulative (ms)")
+        for node in profile.top(self.count):
+            row = col.row()
+            row.label(text=node.name)
+            row.label(text=f"{node.self_ns / 1e6:.2f} / {node.cumulative_ns / 1e6:.2f}")
+
+        layout.operator("addonreloader.export_import_profile", icon="EXPORT")
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        return {"FINISHED"}
+
+
+class ADDONRELOADER_OT_export_import_profile(bpy.types.Operator):
+    """导出上次重载的导入耗时树"""
+    bl_idname = "addonreloader.export_import_profile"
+    bl_label = "Export Import Time"
+    bl_description = "Write the import timing tree of the last profiled reload to a text file"
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context) -> bool:
+        return dm.import_profile is not None
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        """执行导出"""
+        try:
+            path = import_profiler.export(dm.import_profile)
+        except OSError as e:
+            log.error("导出导入耗时失败: %s", e)
+            self.report({"ERROR"}, f"Export Failed: {str(e)}")
+            return {"CANCELLED"}
+
+        log.info("导入耗时已导出: %s", path)
+        self.report({"INFO"}, f"Import time written to {path}")
+        return {"FINISHED"}
+
+
+class ADDONRELOADER_OT_show_leak_report(bpy.types.Operator):
+    """显示上次重载后仍然存活的旧模块与类"""
+    bl_idname = "addonreloader.show_leak_report"
+    bl_label = "Leak Report"
+    bl_description = "Show purged modules and classes that survived the last reload and what refers to them"
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context) -> bool:
+        return dm.leak_report is not None
+
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event) -> Set[str]:
+        """搜索引用链并弹出泄漏报告窗口"""
+        leak_check.trace_chains(dm.leak_report)
+        return context.window_manager.invoke_popup(self, width=640)
+
+    def draw(self, context: bpy.types.Context) -> None:
+        """绘制存活的旧对象及其引用链"""
+        report = dm.leak_report
+        layout = self.layout
+        if report.memory_delta is not None:
+            layout.label(text=f"Memory change: {report.memory_delta / 1024:+.1f} KB", icon="MEMORY")
+        if not report.alive_count:
+            layout.label(text=f"{report.module_name}: all purged modules were freed", icon="CHECKMARK")
+            return
+
+        generations = ", ".join(
+            f"#{index}: {count}" for index, count in sorted(report.generations.items()))
+        layout.label(
+            text=f"{report.module_name}: {report.alive_count} old objects alive ({generations})",
+            icon="ERROR")
+        for survivor in report.survivors:
+            col = layout.column(align=True)
+            col.label(text=f"#{survivor.generation} {survivor.label}")
+            if not survivor.chain:
+                col.label(text="    referrer chain not found")
+            for step in survivor.chain:
+                col.label(text=f"    {step}")
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        return {"FINISHED"}
+
+
+# 日志窗口中的级别筛选与图标
+_LOG_LEVELS = (
+    ("DEBUG", "Debug", "Show all messages"),
+    ("INFO", "Info", "Hide debug messages"),
+    ("WARNING", "Warning", "Only warnings and errors"),
+    ("ERROR", "Error", "Only errors"),
+)
+_LOG_ICONS = {"WARNING": "ERROR", "ERROR": "CANCEL", "CRITICAL": "CANCEL"}
+
+
+def _format_record(created: float, text: str) -> str:
+    return f"{time.strftime('%H:%M:%S', time.localtime(created))} {text}"
+
+
+class ADDONRELOADER_OT_show_log(bpy.types.Operator):
+    """显示最近的日志"""
+    bl_idname = "addonreloader.show_log"
+    bl_label = "Log"
+    bl_description = "Show the most recent messages of this addon (set Log Level to Debug for full traces)"
+
+    level: bpy.props.EnumProperty(
+        name="Level", items=_LOG_LEVELS, default="DEBUG")  # type: ignore
+
+    count: bpy.props.IntProperty(
+        name="Count", default=40, min=1, max=500)  # type: ignore
+
+    def invoke(self, context: bpy.types.Context, event: bpy.types.Event) -> Set[str]:
+        """弹出日志窗口"""
+        return context.window_manager.invoke_popup(self, width=720)
+
+    def draw(self, context: bpy.types.Context) -> None:
+        """绘制最近的日志，多行消息（异常堆栈）逐行显示"""
+        layout = self.layout
+        row = layout.row()
+        row.prop(self, "level", expand=True)
+        row.prop(self, "count")
+
+        minimum = logging.getLevelName(self.level)
+        records = [record for record in recent_records() if record[1] >= minimum]
+        col = layout.column(align=True)
+        if not records:
+            col.label(text="No messages (check the Log Level in the preferences)", icon="INFO")
+        for created, levelno, text in records[-self.count:]:
+            lines = text.splitlines() or [""]
+            col.label(text=_format_record(created, lines[0]),
+                      icon=_LOG_ICONS.get(logging.getLevelName(levelno), "NONE"))
+            for line in lines[1:]:
+                col.label(text=f"    {line}")
+
+        row = layout.row()
+        row.operator("addonreloader.copy_log", icon="COPYDOWN")
+        row.operator("addonreloader.clear_log", icon="TRASH")
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        return {"FINISHED"}
+
+
+class ADDONRELOADER_OT_copy_log(bpy.types.Operator):
+    """复制保留的全部日志到剪贴板"""
+    bl_idname = "addonreloader.copy_log"
+    bl_label = "Copy"
+    bl_description = "Copy all kept log messages to the clipboard"
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        """执行复制"""
+        records = recent_records()
+        context.window_manager.clipboard = "\n".join(
+            _format_record(created, text) for created, _, text in records)
+        self.report({"INFO"}, f"{len(records)} log messages copied")
+        return {"FINISHED"}
+
+
+class ADDONRELOADER_OT_clear_log(bpy.types.Operator):
+    """清空保留的日志"""
+    bl_idname = "addonreloader.clear_log"
+    bl_label = "Clear"
+    bl_description = "Discard the kept log messages"
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        clear_records()
+        return {"FINISHED"}
+
+
 class ADDONRELOADER_OT_open_addon_folder(bpy.types.Operator):
     """打开选定的插件/扩展文件夹"""
     bl_idname = "addonreloader.open_addon_folder"
@@ -256,11 +630,11 @@ class ADDONRELOADER_OT_open_addon_folder(bpy.types.Operator):
                 else:
                     subprocess.Popen(("xdg-open", selected_item_path))
 
-            log.debug(f"打开文件夹: {dm.last_selected[1]}")
+            log.debug("打开文件夹: %s", dm.last_selected[1])
             self.report({"INFO"}, f"[ {dm.last_selected[1]} ] Folder Opened!")
             return {"FINISHED"}
         except Exception as e:
-            log.error(f"打开文件夹失败: {str(e)}")
+            log.error("打开文件夹失败: %s", e)
             self.report({"ERROR"}, f"Open Folder Failed: {str(e)}")
             return {"CANCELLED"}
 
@@ -297,9 +671,10 @@ class ADDONRELOADER_OT_enable_or_disable_addon(bpy.types.Operator):
                     last_selected[0], default_set=True)
                 if enabled is not None:
                     log.info("[%s] 启用成功!", last_selected[1])
+                    module_tracker.take_snapshot(last_selected[0])
                     self.report(
                         {"INFO"}, f"[{last_selected[1]}] Enabled!")
-                    utils.refresh_addon_list(force=True)
+                    utils.refresh_addon_list()
                     utils.sync_addon_state(context)
                     return {"FINISHED"}
 
@@ -314,7 +689,7 @@ class ADDONRELOADER_OT_enable_or_disable_addon(bpy.types.Operator):
             if disabled is None:
                 log.info("[%s] 禁用成功!", last_selected[1])
                 self.report({"INFO"}, f"[{last_selected[1]}] Disabled!")
-                utils.refresh_addon_list(force=True)
+                utils.refresh_addon_list()
                 utils.sync_addon_state(context)
                 return {"FINISHED"}
 
@@ -0,0 +1,169 @@
+# precompile.py
+import importlib.util
+import os
+import py_compile
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Set
+
+import bpy
+
+from . import preflight
+from .data_manager import dm
+from .log import log
+
+
+# 检查后台编译是否完成的间隔(秒)
+_POLL_INTERVAL_S: float = 0.1
+
+# 正在运行的编译进程/线程池任务，以及等待下一轮编译的文件
+_proc: Optional[subprocess.Popen] = None
+_futures: list = []
+_started: float = 0.0
+_running: Set[str] = set()
+_pending: Set[str] = set()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def is_stale(path: str) -> bool:
+    """__pycache__ 中的字节码是否缺失或与源码不一致"""
+    try:
+        cached = importlib.util.cache_from_source(path)
+        st = os.stat(path)
+        with open(cached, "rb") as f:
+            header = f.read(16)
+    except (OSError, NotImplementedError, ValueError):
+        return True
+
+    if len(header) < 16 or header[:4] != importlib.util.MAGIC_NUMBER:
+        return True
+    flags = int.from_bytes(header[4:8], "little")
+    if flags != 0:
+        # 基于哈希的 pyc 由导入系统自行校验
+        return False
+    mtime = int.from_bytes(header[8:12], "little")
+    size = int.from_bytes(header[12:16], "little")
+    return mtime != (int(st.st_mtime) & 0xFFFFFFFF) or size != (st.st_size & 0xFFFFFFFF)
+
+
+def _compile_one(path: str) -> None:
+    try:
+        py_compile.compile(path, doraise=True)
+    except (py_compile.PyCompileError, OSError) as e:
+        log.debug("预编译失败 %s: %s", path, e)
+
+
+def _start(files: List[str]) -> None:
+    """启动一轮后台编译（优先使用独立进程以避开主线程 GIL）"""
+    global _proc, _futures, _started, _executor
+    _running.clear()
+    _running.update(files)
+    _started = time.monotonic()
+
+    executable = preflight.python_executable()
+    if executable is not None:
+        try:
+            _proc = subprocess.Popen(
+                [executable, "-I", "-m", "compileall", "-q", "-j", "0", *files],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        except OSError as e:
+            log.debug("无法启动编译进程，改用线程池: %s", e)
+            _proc = None
+    if _proc is None:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="AddonReloaderCompile")
+        _futures = [_executor.submit(_compile_one, path) for path in files]
+
+    log.debug("后台预编译 %d 个文件", len(files))
+    if not bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.register(_poll, first_interval=_POLL_INTERVAL_S)
+
+
+def _finished() -> bool:
+    """当前一轮编译是否已完成"""
+    if _proc is not None:
+        return _proc.poll() is not None
+    return all(future.done() for future in _futures)
+
+
+def _poll() -> Optional[float]:
+    """定时器回调: 当前一轮完成后启动等待中的文件"""
+    global _proc, _futures
+    if not _finished():
+        return _POLL_INTERVAL_S
+
+    dm.last_precompile_ms = (time.monotonic() - _started) * 1000.0
+    log.debug("预编译完成: %d 个文件, %.1f ms", len(_running), dm.last_precompile_ms)
+    _proc = None
+    _futures = []
+    _running.clear()
+
+    if _pending:
+        files = [path for path in _pending if is_stale(path)]
+        _pending.clear()
+        if files:
+            _start(files)
+            return _POLL_INTERVAL_S
+    return None
+
+
+def schedule(paths: Iterable[str]) -> None:
+    """将过期的源码文件加入后台编译"""
+    files = [path for path in paths if path.endswith(".py") and is_stale(path)]
+    if not files:
+        return
+    if _proc is not None or _futures:
+        _pending.update(files)
+        return
+    _start(files)
+
+
+def schedule_addon(module_name: str) -> None:
+    """预编译插件目录下所有过期的源码文件"""
+    path = dm.addons_paths.get(module_name)
+    if not path:
+        return
+    if os.path.basename(path) == "__init__.py":
+        schedule(preflight.source_files(os.path.dirname(path)))
+    else:
+        schedule([path])
+
+
+def is_running() -> bool:
+    """是否有进行中的编译"""
+    return (_proc is not None or bool(_futures)) and not _finished()
+
+
+def is_compiling(path: str) -> bool:
+    """该文件是否正在编译或等待下一轮编译"""
+    return path in _pending or (path in _running and is_running())
+
+
+def wait(timeout: float) -> None:
+    """等待进行中的编译完成（重载前调用，避免主线程重复编译）"""
+    deadline = time.monotonic() + timeout
+    while is_running():
+        if time.monotonic() >= deadline:
+            log.debug("等待预编译超时")
+            return
+        time.sleep(0.01)
+
+
+def shutdown() -> None:
+    """停止后台编译"""
+    global _proc, _futures, _executor
+    if bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.unregister(_poll)
+    if _proc is not None and _proc.poll() is None:
+        _proc.terminate()
+    _proc = None
+    _futures = []
+    _pending.clear()
+    _running.clear()
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
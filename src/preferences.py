@@ -0,0 +1,305 @@
+# preferences.py
+from typing import Optional
+
+import bpy
+
+from . import broadcast, control_server, ui, watcher
+from .log import configure_logging
+
+
+def _update_watcher(self, context: bpy.types.Context) -> None:
+    """偏好设置变更时启动或停止文件监视"""
+    watcher.configure(self.auto_reload, self.auto_reload_debounce, self.precompile)
+
+
+def _update_control_server(self, context: bpy.types.Context) -> None:
+    """偏好设置变更时启动或停止控制服务"""
+    control_server.configure(self.control_server, self.control_address)
+
+
+def _update_broadcast(self, context: bpy.types.Context) -> None:
+    """偏好设置变更时启动或停止实例同步"""
+    broadcast.configure(self.broadcast_reload, self.broadcast_dir, self.broadcast_timeout)
+
+
+def _update_logging(self, context: bpy.types.Context) -> None:
+    """偏好设置变更时调整日志级别与保留的记录数"""
+    configure_logging(self.log_level, self.log_buffer_size)
+
+
+class ADDONRELOADER_AP_preferences(bpy.types.AddonPreferences):
+    """插件偏好设置"""
+    bl_idname = __package__
+
+    reload_mode: bpy.props.EnumProperty(
+        name="Reload Mode",
+        description="How the selected addon is reloaded",
+        items=(
+            ("FULL", "Full", "Disable the addon, purge its modules and enable it again"),
+            ("CLASS_DIFF", "Changed Classes",
+             "Re-run changed modules in place, re-register only classes whose registration "
+             "layout changed and swap methods on the others; falls back to a full reload when needed"),
+            ("HOT_PATCH", "Hot Patch",
+             "Swap the code of changed functions and methods in place and keep all addon state; "
+             "falls back to a full reload when signatures, class layouts or bl_* attributes change"),
+        ),
+        default="FULL",
+    )  # type: ignore
+
+    incremental_reload: bpy.props.BoolProperty(
+        name="Incremental Reload",
+        description="Only re-import submodules whose source changed, plus the modules importing them",
+        default=False,
+    )  # type: ignore
+
+    auto_reload: bpy.props.BoolProperty(
+        name="Auto Reload on Save",
+        description="Watch the selected addon's source files and reload it automatically when they change",
+        default=False,
+        update=_update_watcher,
+    )  # type: ignore
+
+    auto_reload_debounce: bpy.props.FloatProperty(
+        name="Debounce",
+        description="Wait this long after the last detected change before reloading, so bursts of saves trigger one reload",
+        default=0.5,
+        min=0.05,
+        max=10.0,
+        subtype="TIME_ABSOLUTE",
+        unit="TIME_ABSOLUTE",
+        update=_update_watcher,
+    )  # type: ignore
+
+    precompile: bpy.props.BoolProperty(
+        name="Background Precompile",
+        description="Compile changed sources of the selected addon into __pycache__ in the background, "
+                    "so the reload only loads cached bytecode",
+        default=True,
+        update=_update_watcher,
+    )  # type: ignore
+
+    cascade_mode: bpy.props.EnumProperty(
+        name="Dependent Addons",
+        description="What to do with other addons that hold references to the reloaded addon's modules",
+        items=(
+            ("OFF", "Ignore", "Only reload the selected addon"),
+            ("ASK", "Ask", "Ask before reloading dependent addons too"),
+            ("AUTO", "Always", "Always reload dependent addons too"),
+        ),
+        default="ASK",
+    )  # type: ignore
+
+    background_reload: bpy.props.BoolProperty(
+        name="Non-blocking Reload",
+        description="Queue reloads and run their phases from timers so the UI stays responsive; "
+                    "repeated requests for the same addon are merged",
+        default=False,
+    )  # type: ignore
+
+    cleanup_callbacks: bpy.props.BoolProperty(
+        name="Clean Up Leftover Callbacks",
+        description="After the addon's unregister(), remove app handlers, timers, draw callbacks, "
+                    "msgbus subscriptions and menu draw functions it left behind. Draw callbacks and "
+                    "msgbus subscriptions are only tracked from when Addon Reloader was enabled; "
+                    "ones added earlier are not cleaned up",
+        default=True,
+    )  # type: ignore
+
+    preflight_check: bpy.props.BoolProperty(
+        name="Pre-flight Import Check",
+        description="Compile changed files and test-import the addon in a separate Python process "
+                    "before tearing down the running version",
+        default=False,
+    )  # type: ignore
+
+    preflight_timeout: bpy.props.FloatProperty(
+        name="Timeout",
+        description="Give up on the test import after this many seconds (the reload then proceeds)",
+        default=30.0,
+        min=1.0,
+        max=600.0,
+        subtype="TIME_ABSOLUTE",
+        unit="TIME_ABSOLUTE",
+    )  # type: ignore
+
+    control_server: bpy.props.BoolProperty(
+        name="Control Server",
+        description="Accept reload/toggle/list/stats commands from editors and build scripts "
+                    "on a local socket (clients must first send the token from control_token "
+                    "in the user config directory)",
+        default=False,
+        update=_update_control_server,
+    )  # type: ignore
+
+    control_address: bpy.props.StringProperty(
+        name="Address",
+        description="Localhost port (\"48765\" or \"127.0.0.1:48765\") or Unix domain socket "
+                    "(\"unix:/tmp/addon_reloader.sock\")",
+        default="127.0.0.1:48765",
+        update=_update_control_server,
+    )  # type: ignore
+
+    favorite_addons: bpy.props.StringProperty(
+        name="Favorites",
+        description="Comma-separated module names pinned to the top of the addon search",
+        default="",
+        options={'HIDDEN'},
+    )  # type: ignore
+
+    broadcast_reload: bpy.props.BoolProperty(
+        name="Sync Instances",
+        description="After a successful reload, reload the same addon in every other local Blender "
+                    "instance that has this option enabled (background workers must call "
+                    "broadcast.poll() in a loop to receive reloads)",
+        default=False,
+        update=_update_broadcast,
+    )  # type: ignore
+
+    broadcast_dir: bpy.props.StringProperty(
+        name="Registry",
+        description="Directory where instances register themselves (empty for the user config directory); "
+                    "entries owned by other users are ignored",
+        default="",
+        subtype="DIR_PATH",
+        update=_update_broadcast,
+    )  # type: ignore
+
+    broadcast_timeout: bpy.props.FloatProperty(
+        name="Timeout",
+        description="Report an instance as failed if it has not finished the reload after this many seconds",
+        default=120.0,
+        min=1.0,
+        max=3600.0,
+        subtype="TIME_ABSOLUTE",
+        unit="TIME_ABSOLUTE",
+        update=_update_broadcast,
+    )  # type: ignore
+
+    timing_log_path: bpy.props.StringProperty(
+        name="Timing Log",
+        description="Append a JSON line with per-phase timings of every reload to this file (empty to disable)",
+        default="",
+        subtype="FILE_PATH",
+    )  # type: ignore
+
+    profile_imports: bpy.props.BoolProperty(
+        name="Profile Imports",
+        description="Record an import timing tree of the modules imported while the addon is re-enabled",
+        default=False,
+    )  # type: ignore
+
+    profile_register: bpy.props.BoolProperty(
+        name="Profile register()/unregister()",
+        description="Run the addon's unregister() and register() under cProfile on every reload and save .prof dumps to the temp directory",
+        default=False,
+    )  # type: ignore
+
+    leak_check: bpy.props.BoolProperty(
+        name="Leak Check",
+        description="After every full reload, run a GC pass and report purged modules and classes "
+                    "that are still alive, with the chain of references keeping them",
+        default=False,
+    )  # type: ignore
+
+    leak_tracemalloc: bpy.props.BoolProperty(
+        name="Track Memory",
+        description="Also report the memory allocated across each reload with tracemalloc "
+                    "(slows Python down while enabled)",
+        default=False,
+    )  # type: ignore
+
+    log_level: bpy.props.EnumProperty(
+        name="Log Level",
+        description="Lowest level of messages printed to the console and kept for the log viewer",
+        items=(
+            ("DEBUG", "Debug", "Every step of refreshes and reloads (for debugging this addon)"),
+            ("INFO", "Info", "Reload results and other notable events"),
+            ("WARNING", "Warning", "Only problems"),
+            ("ERROR", "Error", "Only failures"),
+        ),
+        default="WARNING",
+        update=_update_logging,
+    )  # type: ignore
+
+    log_buffer_size: bpy.props.IntProperty(
+        name="Keep",
+        description="Number of recent log messages kept in memory for the log viewer",
+        default=500,
+        min=50,
+        max=10000,
+        update=_update_logging,
+    )  # type: ignore
+
+    def draw(self, context: bpy.types.Context) -> None:
+        """绘制偏好设置面板"""
+        layout = self.layout
+
+        # 重载设置
+        box = layout.box()
+        box.label(text="Reload", icon="FILE_REFRESH")
+        box.prop(self, "reload_mode")
+        box.prop(self, "background_reload")
+        box.prop(self, "incremental_reload")
+        box.prop(self, "cascade_mode")
+        box.prop(self, "precompile")
+        box.prop(self, "cleanup_callbacks")
+        row = box.row()
+        row.prop(self, "preflight_check")
+        sub = row.row()
+        sub.enabled = self.preflight_check
+        sub.prop(self, "preflight_timeout")
+        box.prop(self, "timing_log_path")
+
+        # 性能分析
+        box = layout.box()
+        box.label(text="Profiling", icon="TIME")
+        row = box.row()
+        row.prop(self, "profile_imports")
+        row.operator("addonreloader.show_import_profile", text="", icon="VIEWZOOM")
+        box.prop(self, "profile_register")
+        row = box.row()
+        row.prop(self, "leak_check")
+        sub = row.row()
+        sub.enabled = self.leak_check
+        sub.prop(self, "leak_tracemalloc")
+        row.operator("addonreloader.show_leak_report", text="", icon="VIEWZOOM")
+        row = box.row()
+        row.prop(self, "log_level")
+        row.prop(self, "log_buffer_size")
+        row.operator("addonreloader.show_log", text="", icon="TEXT")
+
+        # 文件监视设置
+        box = layout.box()
+        box.label(text="Watch", icon="HIDE_OFF")
+        box.prop(self, "auto_reload")
+        row = box.row()
+        row.enabled = self.auto_reload
+        row.prop(self, "auto_reload_debounce")
+        row = box.row()
+        row.prop(self, "control_server")
+        sub = row.row()
+        sub.enabled = self.control_server
+        sub.prop(self, "control_address")
+        row = box.row()
+        row.prop(self, "broadcast_reload")
+        sub = row.row()
+        sub.enabled = self.broadcast_reload
+        sub.prop(self, "broadcast_timeout")
+        row = box.row()
+        row.enabled = self.broadcast_reload
+        row.prop(self, "broadcast_dir")
+
+        # 插件列表
+        box = layout.box()
+        box.label(text="Addon List", icon="PRESET")
+        box.operator("addonreloader.measure_refresh", icon="TIME")
+        box.label(text=ui.draw_stats(), icon="RESTRICT_VIEW_OFF")
+
+
+def get_prefs() -> Optional[ADDONRELOADER_AP_preferences]:
+    """获取本插件的偏好设置，未注册时返回 None"""
+    try:
+        addon = bpy.context.preferences.addons.get(__package__)
+    except Exception:
+        return None
+    return addon.preferences if addon else None
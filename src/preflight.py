@@ -0,0 +1,253 @@
+# preflight.py
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import bpy
+
+from . import module_tracker
+from .data_manager import dm
+from .log import log
+
+
+# 子进程中需要用桩模块替代的 Blender 内置模块
+_BLENDER_MODULES = (
+    "_bpy", "_bpy_path", "addon_utils", "aud", "bgl", "bl_app_override", "bl_i18n_utils",
+    "bl_keymap_utils", "bl_math", "bl_operators", "bl_previews_utils", "bl_ui", "blf",
+    "bmesh", "bpy", "bpy_extras", "bpy_restrict_state", "bpy_types", "freestyle", "gpu",
+    "gpu_extras", "idprop", "imbuf", "keyingsets_utils", "mathutils", "nodeitems_utils",
+    "rna_keymap_ui", "rna_prop_ui",
+)
+
+# 子进程脚本: 安装 Blender 模块桩后导入插件包
+_CHILD_SCRIPT = r'''
+import importlib, importlib.abc, importlib.machinery, json, sys, traceback, types
+
+args = json.loads(sys.argv[1])
+STUBBED = set(args["stubbed"])
+
+
+class _Meta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Stub
+
+    def __getitem__(cls, key):
+        return _Stub
+
+    def __iter__(cls):
+        return iter(())
+
+
+class _Stub(metaclass=_Meta):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Stub()
+
+    def __call__(self, *args, **kwargs):
+        return _Stub()
+
+    def __getitem__(self, key):
+        return _Stub()
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Stub
+
+
+class _StubLoader(importlib.abc.Loader):
+    def create_module(self, spec):
+        module = _StubModule(spec.name)
+        module.__path__ = []
+        return module
+
+    def exec_module(self, module):
+        # 以属性访问的子模块（bpy.app.version、bpy.app.handlers.persistent）也使用下面的设置
+        if module.__name__ == "bpy":
+            module.app = importlib.import_module("bpy.app")
+        elif module.__name__ == "bpy.app":
+            module.version = tuple(args["version"])
+            module.version_string = args["version_string"]
+            module.background = True
+            module.handlers = importlib.import_module("bpy.app.handlers")
+        elif module.__name__ == "bpy.app.handlers":
+            module.persistent = lambda func: func
+
+
+class _StubFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname.split(".")[0] in STUBBED:
+            return importlib.machinery.ModuleSpec(fullname, _StubLoader(), is_package=True)
+        return None
+
+
+sys.meta_path.insert(0, _StubFinder())
+sys.path[:] = args["sys_path"]
+
+# 为扩展等带前缀的包名创建父包
+parts = args["module"].split(".")
+for i in range(1, len(parts)):
+    name = ".".join(parts[:i])
+    if name not in sys.modules:
+        parent = types.ModuleType(name)
+        parent.__path__ = [args["parent_dir"]] if i == len(parts) - 1 else []
+        sys.modules[name] = parent
+
+try:
+    importlib.import_module(args["module"])
+    result = {"ok": True}
+except BaseException as e:
+    if isinstance(e, SyntaxError):
+        kind = "syntax"
+    elif isinstance(e, ImportError) and (e.name or "").split(".")[0] not in STUBBED:
+        kind = "import"
+    elif isinstance(e, NameError):
+        kind = "name"
+    else:
+        kind = "other"
+    result = {"ok": False, "kind": kind, "error": traceback.format_exc()}
+print("__PREFLIGHT__" + json.dumps(result))
+'''
+
+# 这些错误说明新代码确实无法导入，其余错误可能由桩模块引起
+_FATAL_KINDS = {"syntax", "import", "name"}
+
+
+def source_files(package_dir: str) -> List[str]:
+    """插件目录下所有源码文件"""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(package_dir):
+        dirnames[:] = [d for d in dirnames if d != "__pycache__" and not d.startswith(".")]
+        files.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(".py"))
+    return files
+
+
+def changed_files(module_name: str, module_file: str) -> List[str]:
+    """相对于模块快照发生变化（或快照中没有）的源码文件"""
+    if os.path.basename(module_file) != "__init__.py":
+        return [module_file]
+
+    files = source_files(os.path.dirname(module_file))
+    snapshot = dm.module_snapshots.get(module_name)
+    if snapshot is None:
+        return files
+
+    known = {path: snapshot.stamps[name] for name, path in snapshot.files.items()}
+    result = []
+    for path in files:
+        old = known.get(path)
+        new = module_tracker.file_stamp(path, old)
+        if old is None or new is None or new[2] != old[2]:
+            result.append(path)
+    return result
+
+
+def _compile_file(path: str) -> Optional[str]:
+    """编译单个文件，返回错误信息"""
+    try:
+        with open(path, "rb") as f:
+            source = f.read()
+        compile(source, path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return f"{path}:{e.lineno}: {e.msg}"
+    except (OSError, ValueError) as e:
+        return f"{path}: {e}"
+    return None
+
+
+def compile_files(files: List[str]) -> List[str]:
+    """在线程池中编译文件，返回所有错误"""
+    if not files:
+        return []
+    workers = min(8, len(files), (os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [error for error in pool.map(_compile_file, files) if error]
+
+
+def python_executable() -> Optional[str]:
+    """Blender 自带的 Python 解释器"""
+    executable = sys.executable
+    if executable and "python" in os.path.basename(executable).lower() and os.path.exists(executable):
+        return executable
+    return None
+
+
+def test_import(module_name: str, module_file: str, timeout: float) -> Tuple[bool, str]:
+    """在独立的 Python 进程中试导入插件包，返回 (是否致命错误, 错误信息)"""
+    executable = python_executable()
+    if executable is None:
+        log.warning("找不到 Python 解释器，跳过预检导入")
+        return False, ""
+
+    if os.path.basename(module_file) == "__init__.py":
+        package_dir = os.path.dirname(module_file)
+    else:
+        package_dir = module_file
+    parent_dir = os.path.dirname(package_dir)
+
+    args = {
+        "module": module_name,
+        "parent_dir": parent_dir,
+        "sys_path": [parent_dir, *sys.path],
+        "stubbed": _BLENDER_MODULES,
+        "version": list(bpy.app.version),
+        "version_string": getattr(bpy.app, "version_string", ""),
+    }
+    try:
+        proc = subprocess.run(
+            [executable, "-I", "-c", _CHILD_SCRIPT, json.dumps(args)],
+            capture_output=True, text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        log.warning("预检导入超时 (%.0f s)，跳过", timeout)
+        return False, ""
+    except OSError as e:
+        log.warning("无法启动预检进程: %s", e)
+        return False, ""
+
+    for line in proc.stdout.splitlines():
+        if line.startswith("__PREFLIGHT__"):
+            result = json.loads(line[len("__PREFLIGHT__"):])
+            break
+    else:
+        log.warning("预检进程没有返回结果: %s", proc.stderr.strip())
+        return False, ""
+
+    if result["ok"]:
+        return False, ""
+    if result["kind"] in _FATAL_KINDS:
+        return True, result["error"]
+    # 可能是桩模块不完整导致的错误，不阻止重载
+    log.warning("预检导入出现非致命错误(可能由 bpy 桩引起):\n%s", result["error"])
+    return False, result["error"]
+
+
+def run(module_name: str, module_file: str, timeout: float = 30.0) -> Optional[str]:
+    """执行预检: 编译变更文件并在子进程中试导入，失败时返回错误信息"""
+    files = changed_files(module_name, module_file)
+    log.debug("预检: 编译 %d 个文件", len(files))
+    errors = compile_files(files)
+    if errors:
+        return "\n".join(errors)
+
+    fatal, error = test_import(module_name, module_file, timeout)
+    if fatal:
+        return error
+    return None
@@ -0,0 +1,339 @@
+# reload_job.py
+import os
+import sys
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Generator, List, Optional, Set, Tuple
+
+import addon_utils
+import bpy
+
+from . import callback_cleanup, call_profiler, class_reload, hot_patch, import_cache, import_profiler, leak_check, module_tracker, precompile, preflight, reload_state, reload_stats
+from .data_manager import dm
+from .log import log
+from .preferences import get_prefs
+
+
+# 分步执行时依次产出的阶段（用于显示进度）
+STEPS = ("resolve", "preflight", "disable", "purge", "precompile_wait", "enable", "finish")
+# 重新启用前等待后台预编译的最长时间(秒)
+_PRECOMPILE_TIMEOUT_S: float = 5.0
+
+
+class ReloadJob:
+    """一次插件重载
+
+    run() 一次执行完所有阶段；steps() 返回生成器，每次迭代执行到下一个阶段之前，
+    供调度器在定时器回调之间分步执行
+    """
+
+    def __init__(self, module_name: str, was_enabled: bool, profile: bool = False, blocking: bool = True):
+        self.module_name = module_name
+        self.was_enabled = was_enabled
+        # 是否对 unregister()/register() 进行 cProfile 分析
+        self.profile = profile
+        # 同步执行时直接等待预编译，分步执行时在等待期间让出
+        self.blocking = blocking
+        self.timer = reload_stats.ReloadTimer(module_name)
+        self.success = False
+        # 结束后的耗时记录
+        self.record: Optional[Dict[str, object]] = None
+        # 需要报告给用户的消息 (类型, 文本)
+        self.reports: List[Tuple[Set[str], str]] = []
+
+    def report(self, report_type: Set[str], message: str) -> None:
+        """记录报告消息，由调用方转交给操作符或日志"""
+        self.reports.append((report_type, message))
+
+    def run(self) -> bool:
+        """同步执行全部阶段"""
+        for _ in self.steps():
+            pass
+        return self.success
+
+    def steps(self) -> Generator[str, None, None]:
+        """分步执行重载，每次产出即将执行的阶段名，结束后记录耗时"""
+        try:
+            self.success = yield from self._steps()
+        finally:
+            prefs = get_prefs()
+            self.record = self.timer.finish(self.success)
+            reload_stats.record(self.record, prefs.timing_log_path if prefs else "")
+
+    def _steps(self) -> Generator[str, None, bool]:
+        """按阶段执行重载"""
+        root_module_name = self.module_name
+        was_enabled = self.was_enabled
+        timer = self.timer
+        log.debug("正在重载模块: %s", root_module_name)
+
+        try:
+            # 获取模块
+            yield "resolve"
+            target_module = None
+            with timer.phase("resolve"):
+                # 先使用缓存的模块列表，找不到时再重新扫描
+                for refresh in (False, True):
+                    for mod in addon_utils.modules(refresh=refresh):
+                        if mod.__name__ == root_module_name:
+                            target_module = mod
+                            break
+                    if target_module:
+                        break
+
+            # 如果未找到模块，记录错误并返回False
+            if not target_module:
+                log.error("未找到模块: %s", root_module_name)
+                return False
+
+            # 保存模块路径
+            module_path = os.path.dirname(target_module.__file__)
+            log.debug("模块路径: %s", module_path)
+
+            # 预检: 新代码无法导入时保留当前运行的版本
+            prefs = get_prefs()
+            if prefs and prefs.preflight_check:
+                yield "preflight"
+                with timer.phase("preflight"):
+                    error = preflight.run(
+                        root_module_name, target_module.__file__, prefs.preflight_timeout)
+                if error:
+                    log.error("预检失败，取消重载: %s\n%s", root_module_name, error)
+                    self.report(
+                        {"ERROR"},
+                        f"Pre-flight failed, {root_module_name} left untouched: "
+                        f"{error.strip().splitlines()[-1]}")
+                    timer.meta["preflight_error"] = error
+                    return False
+
+            # 类级别差异重载: 只重新注册布局变化的类
+            if was_enabled and prefs and prefs.reload_mode == "CLASS_DIFF":
+                with timer.phase("class_diff"):
+                    result = self._class_reload(root_module_name, timer)
+                if result is not None:
+                    return result
+
+            # 热补丁: 只替换函数代码，保留所有运行状态
+            if was_enabled and prefs and prefs.reload_mode == "HOT_PATCH":
+                with timer.phase("hot_patch"):
+                    result = self._hot_patch(root_module_name, timer)
+                if result is not None:
+                    return result
+
+            # 完全卸载模块，就像Blender卸载时一样
+            log.debug("正在完全移除模块: %s", root_module_name)
+
+            # 确保模块被完全禁用
+            yield "disable"
+            dm.call_profiles = []
+            with timer.phase("disable"), self._profile_call(root_module_name, "unregister"):
+                addon_utils.disable(root_module_name)
+
+            # 手动注销所有已注册的类
+            with timer.phase("unregister_classes"):
+                if hasattr(target_module, "classes"):
+                    for cls in reversed(target_module.classes):
+                        try:
+                            log.debug("手动注销类: %s", cls.__name__)
+                            bpy.utils.unregister_class(cls)
+                        except Exception as e:
+                            log.debug("注销类失败 %s: %s", cls.__name__, str(e))
+
+            # 调用模块的unregister函数
+            with timer.phase("unregister"):
+                if hasattr(target_module, "unregister"):
+                    try:
+                        target_module.unregister()
+                        log.debug("模块注销成功")
+                    except Exception as e:
+                        log.error("模块注销失败: %s", str(e))
+
+            # 清理 unregister() 遗漏的处理器、定时器、绘制回调、msgbus 订阅与菜单绘制函数
+            if prefs and prefs.cleanup_callbacks:
+                with timer.phase("cleanup"):
+                    counts = callback_cleanup.clean(root_module_name)
+                cleaned = sum(counts.values())
+                if cleaned:
+                    timer.meta["cleaned"] = counts
+                    self.report(
+                        {"WARNING"},
+                        f"Removed {cleaned} callbacks left behind by {root_module_name}'s unregister()")
+
+            yield "purge"
+            with timer.phase("purge"):
+                modules_to_remove = self._modules_to_remove(root_module_name, timer)
+
+            # 取出模块声明跨重载保留的对象（__reload_preserve__ / __reload_state__）
+            preserved = reload_state.PreservedState()
+            if was_enabled:
+                with timer.phase("preserve"):
+                    preserved = reload_state.capture(modules_to_remove)
+                    if preserved:
+                        timer.meta["preserved"] = preserved.count()
+                        timer.meta["preserved_bytes"] = preserved.measure()
+
+            # 泄漏检查: 记录即将移除的模块，重载后检查它们是否被释放
+            memory_before = None
+            if was_enabled and prefs and prefs.leak_check:
+                with timer.phase("leak_track"):
+                    leak_check.track(root_module_name, modules_to_remove)
+                    if prefs.leak_tracemalloc:
+                        memory_before = leak_check.memory_snapshot()
+
+            # 从sys.modules中移除相关模块
+            with timer.phase("purge"):
+                for name in modules_to_remove:
+                    log.debug("从sys.modules移除模块: %s", name)
+                    del sys.modules[name]
+
+            # 只清除插件目录的导入缓存
+            with timer.phase("invalidate_caches"):
+                timer.meta["finders_invalidated"] = import_cache.invalidate(root_module_name)
+
+            # 如果模块原来已启用，则重新启用它
+            if was_enabled:
+                try:
+                    # 使用addon_utils重新启用模块，就像Blender安装时一样
+                    # 等待后台预编译完成，启用时只需加载字节码
+                    if prefs and prefs.precompile:
+                        with timer.phase("precompile_wait"):
+                            if self.blocking:
+                                precompile.wait(_PRECOMPILE_TIMEOUT_S)
+                        if not self.blocking:
+                            deadline = time.monotonic() + _PRECOMPILE_TIMEOUT_S
+                            while precompile.is_running() and time.monotonic() < deadline:
+                                yield "precompile_wait"
+
+                    # 预编译结束后再删除过期字节码，以免删除刚写入的文件
+                    with timer.phase("drop_bytecode"):
+                        timer.meta["bytecode_dropped"] = import_cache.drop_stale_bytecode(root_module_name)
+
+                    yield "enable"
+                    with timer.phase("enable"), self._profile_call(root_module_name, "register"):
+                        prefs = get_prefs()
+                        with reload_state.restoring(preserved):
+                            if prefs and prefs.profile_imports:
+                                with import_profiler.profile_imports(root_module_name):
+                                    result = addon_utils.enable(root_module_name, default_set=True)
+                            else:
+                                result = addon_utils.enable(root_module_name, default_set=True)
+                    if preserved.restored:
+                        log.info("已恢复保留的状态: %s", ", ".join(
+                            f"{module}.{name}" for module, name in preserved.restored))
+                    if result is not None:
+                        log.debug("模块重新启用成功")
+                        # 挂载保留的子模块并记录新的源码快照
+                        yield "finish"
+                        with timer.phase("snapshot"):
+                            module_tracker.reattach_submodules(root_module_name)
+                            module_tracker.take_snapshot(root_module_name)
+                            if prefs and prefs.reload_mode == "HOT_PATCH":
+                                hot_patch.remember(root_module_name)
+                        if prefs and prefs.leak_check:
+                            with timer.phase("leak_check"):
+                                report = leak_check.check(root_module_name, memory_before)
+                            timer.meta["leaked"] = report.alive_count
+                            if report.memory_delta is not None:
+                                timer.meta["memory_delta"] = report.memory_delta
+                        return True
+
+                    log.error("模块重新启用失败")
+                    return False
+
+                except Exception as e:
+                    log.error("启用模块失败: %s, 错误: %s", root_module_name, str(e))
+                    log.error(traceback.format_exc())
+                    self.report(
+                        {"ERROR"}, f"Failed to reload module {root_module_name}")
+                    return False
+
+            with timer.phase("drop_bytecode"):
+                timer.meta["bytecode_dropped"] = import_cache.drop_stale_bytecode(root_module_name)
+            module_tracker.forget_snapshot(root_module_name)
+            return True
+
+        except Exception as e:
+            log.error("模块重载失败: %s, 错误: %s", root_module_name, str(e))
+            log.error(traceback.format_exc())
+            self.report(
+                {"ERROR"}, f"Error reloading module {root_module_name}: {str(e)}")
+            return False
+
+    def _profile_call(self, module_name: str, label: str):
+        """开启重载分析时用 cProfile 包装调用（disable 内调用 unregister()，enable 内调用 register()）"""
+        prefs = get_prefs()
+        if not (self.profile or (prefs and prefs.profile_register)):
+            return nullcontext()
+        return self._collect_profile(module_name, label)
+
+    @contextmanager
+    def _collect_profile(self, module_name: str, label: str):
+        # register()/unregister() 抛出异常时的分析结果同样保留
+        with call_profiler.profile_call(module_name, label) as result:
+            try:
+                yield result
+            finally:
+                dm.call_profiles.append(result)
+
+    def _class_reload(self, root_module_name: str, timer: reload_stats.ReloadTimer) -> Optional[bool]:
+        """尝试类级别差异重载，需要完整重载时返回 None"""
+        try:
+            reregistered, kept, swapped = class_reload.reload_classes(root_module_name)
+        except class_reload.FallbackRequired as e:
+            log.info("无法进行类级别重载 (%s)，改为完整重载", e)
+            return None
+        except class_reload.ClassReloadError as e:
+            log.error("类级别重载失败: %s", e)
+            self.report({"ERROR"}, f"Reload failed, previous version kept: {e}")
+            return False
+
+        timer.meta["mode"] = "class_diff"
+        timer.meta["reregistered"] = reregistered
+        timer.meta["kept"] = kept
+        log.info("类级别重载: 重新注册 %d 个类, 保留 %d 个类, 替换 %d 个方法",
+                 reregistered, kept, swapped)
+        return True
+
+    def _hot_patch(self, root_module_name: str, timer: reload_stats.ReloadTimer) -> Optional[bool]:
+        """尝试热补丁，需要完整重载时返回 None"""
+        try:
+            modules, functions, globals_updated = hot_patch.hot_patch(root_module_name)
+        except class_reload.FallbackRequired as e:
+            log.info("无法热补丁 (%s)，改为完整重载", e)
+            return None
+        except class_reload.ClassReloadError as e:
+            log.error("热补丁失败: %s", e)
+            self.report({"ERROR"}, f"Hot patch failed, previous version kept: {e}")
+            return False
+
+        timer.meta["mode"] = "hot_patch"
+        timer.meta["patched_functions"] = functions
+        log.info("热补丁: %d 个模块, 替换 %d 个函数, 更新 %d 个全局变量",
+                 modules, functions, globals_updated)
+        return True
+
+    def _modules_to_remove(self, root_module_name: str, timer: reload_stats.ReloadTimer) -> List[str]:
+        """确定需要从sys.modules移除的模块（增量模式下只移除变更模块及其导入者）"""
+        all_modules = list(module_tracker.package_module_names(root_module_name))
+        timer.meta["mode"] = "full"
+        timer.meta["modules"] = len(all_modules)
+        timer.meta["evicted"] = len(all_modules)
+
+        prefs = get_prefs()
+        if not (prefs and prefs.incremental_reload):
+            return all_modules
+
+        changed = module_tracker.changed_modules(root_module_name)
+        if changed is None:
+            log.debug("没有模块快照，执行完整重载")
+            return all_modules
+
+        evict = module_tracker.eviction_set(root_module_name, changed)
+        timer.meta["mode"] = "incremental"
+        timer.meta["evicted"] = len(evict)
+        log.debug(
+            "增量重载: 变更 %d 个, 移除 %d 个, 保留 %d 个",
+            len(changed), len(evict), len(all_modules) - len(evict),
+        )
+        return [name for name in all_modules if name in evict]
@@ -0,0 +1,212 @@
+# reload_state.py
+import gc
+import sys
+import types
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+from .log import log
+from .meta_finder import WrappingFinder
+
+
+# 模块中声明需要跨重载保留的全局变量名
+PRESERVE_ATTR = "__reload_preserve__"
+# 重载前调用，返回需要保留的任意对象
+STATE_HOOK = "__reload_state__"
+# 新模块执行完成后（register() 之前）调用，参数为 STATE_HOOK 的返回值
+RESTORE_HOOK = "__reload_restore__"
+
+# 统计大小时最多遍历的对象数
+_SIZE_LIMIT = 200_000
+# 统计大小时不进入这些对象（它们不属于缓存本身）
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, types.CodeType, types.FrameType)
+
+_MISSING = object()
+
+
+def _declared_names(module: types.ModuleType) -> Tuple[str, ...]:
+    """模块 __reload_preserve__ 中声明的变量名（允许单个字符串）"""
+    declared = getattr(module, PRESERVE_ATTR, None) or ()
+    if isinstance(declared, str):
+        return (declared,)
+    return tuple(declared)
+
+
+def deep_sizeof(obj, limit: int = _SIZE_LIMIT) -> Tuple[int, bool]:
+    """估算对象及其引用对象占用的内存，返回 (字节数, 是否因超出上限而截断)"""
+    seen = set()
+    pending = [obj]
+    total = 0
+    while pending:
+        if len(seen) >= limit:
+            return total, True
+        item = pending.pop()
+        if id(item) in seen or (item is not obj and isinstance(item, _OPAQUE_TYPES)):
+            continue
+        seen.add(id(item))
+        try:
+            total += sys.getsizeof(item)
+        except TypeError:
+            continue
+        pending.extend(gc.get_referents(item))
+    return total, False
+
+
+def format_size(size: int) -> str:
+    """以易读的单位显示字节数"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class PreservedState:
+    """重载前从旧模块取出的对象，等待交给新模块"""
+
+    def __init__(self):
+        # 模块名 -> {变量名: 对象}
+        self.names: Dict[str, Dict[str, object]] = {}
+        # 模块名 -> __reload_state__() 的返回值
+        self.states: Dict[str, object] = {}
+        # 已交还的 (模块名, 变量名或钩子名)
+        self.restored: List[Tuple[str, str]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.names or self.states)
+
+    def count(self) -> int:
+        return sum(len(names) for names in self.names.values()) + len(self.states)
+
+    def measure(self) -> int:
+        """记录每个保留对象的大小，返回总字节数"""
+        total = 0
+        items = [(f"{module}.{name}", value)
+                 for module, names in self.names.items() for name, value in names.items()]
+        items.extend((f"{module}.{STATE_HOOK}()", value) for module, value in self.states.items())
+        for label, value in items:
+            size, truncated = deep_sizeof(value)
+            total += size
+            log.info("保留状态 %s: %s%s (%s)", label, ">" if truncated else "",
+                     format_size(size), type(value).__name__)
+        return total
+
+    def restore_module(self, module: types.ModuleType) -> None:
+        """将保留的对象交给刚执行完的新模块"""
+        name = module.__name__
+        values = self.names.pop(name, None)
+        if values:
+            # 新模块仍然声明保留的变量才写回
+            declared = set(_declared_names(module))
+            for attr, value in values.items():
+                if attr in declared:
+                    setattr(module, attr, value)
+                    self.restored.append((name, attr))
+                else:
+                    log.debug("新模块不再保留 %s.%s，丢弃", name, attr)
+
+        state = self.states.pop(name, _MISSING)
+        if state is _MISSING:
+            return
+        hook = getattr(module, RESTORE_HOOK, None)
+        if not callable(hook):
+            log.debug("%s 没有 %s，丢弃保留的状态", name, RESTORE_HOOK)
+            return
+        try:
+            hook(state)
+            self.restored.append((name, RESTORE_HOOK))
+        except Exception as e:
+            log.warning("%s.%s 失败: %s", name, RESTORE_HOOK, e)
+
+
+def capture(module_names: Iterable[str]) -> PreservedState:
+    """从即将移除的模块中取出声明保留的对象"""
+    preserved = PreservedState()
+    for name in module_names:
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+
+        declared = _declared_names(module)
+        if declared:
+            values = {}
+            for attr in declared:
+                value = getattr(module, attr, _MISSING)
+                if value is not _MISSING:
+                    values[attr] = value
+            if values:
+                preserved.names[name] = values
+
+        hook = getattr(module, STATE_HOOK, None)
+        if callable(hook):
+            try:
+                preserved.states[name] = hook()
+            except Exception as e:
+                log.warning("%s.%s 失败: %s", name, STATE_HOOK, e)
+    return preserved
+
+
+class _RestoringLoader:
+    """包装原始 loader，模块执行完成后立即写回保留的对象"""
+
+    def __init__(self, loader, preserved: PreservedState, wrapped: list):
+        self._loader = loader
+        self._preserved = preserved
+        self._wrapped = wrapped
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._wrapped.append((module, self._loader))
+        self._loader.exec_module(module)
+        self._preserved.restore_module(module)
+
+
+class _RestoringFinder(WrappingFinder):
+    """位于 sys.meta_path 首位的查找器，为有保留对象的模块包装 loader"""
+
+    def __init__(self, preserved: PreservedState):
+        self._preserved = preserved
+        self._wrapped = []
+
+    def wrap_spec(self, fullname, spec, find_ns):
+        if fullname not in self._preserved.names and fullname not in self._preserved.states:
+            return spec
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _RestoringLoader(spec.loader, self._preserved, self._wrapped)
+        return spec
+
+
+@contextmanager
+def restoring(preserved: PreservedState):
+    """在上下文期间重新导入的模块执行完成后（register() 之前）立即取回保留的对象"""
+    if not preserved:
+        yield preserved
+        return
+
+    finder = _RestoringFinder(preserved)
+    sys.meta_path.insert(0, finder)
+    try:
+        yield preserved
+    finally:
+        try:
+            sys.meta_path.remove(finder)
+        except ValueError:
+            pass
+        for module, loader in finder._wrapped:
+            try:
+                module.__loader__ = loader
+                if getattr(module, "__spec__", None) is not None:
+                    module.__spec__.loader = loader
+            except Exception:
+                pass
+        # 没有被重新导入的模块
+        for name in sorted(set(preserved.names) | set(preserved.states)):
+            log.debug("模块 %s 没有重新导入，保留的状态已丢弃", name)
+        preserved.names.clear()
+        preserved.states.clear()
@@ -0,0 +1,132 @@
+# reload_stats.py
+import bisect
+import json
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from . import catalog, search
+from .data_manager import dm
+from .log import log
+
+
+class ReloadTimer:
+    """记录一次重载各阶段的耗时(单调时钟纳秒)"""
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+        self.timestamp = time.time()
+        self.start_ns = time.monotonic_ns()
+        # 阶段名 -> 耗时(ns)，按执行顺序
+        self.phases: Dict[str, int] = {}
+        # 附加信息（重载模式、移除模块数等）
+        self.meta: Dict[str, object] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """测量一个阶段的耗时"""
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.monotonic_ns() - start
+
+    def finish(self, success: bool) -> Dict[str, object]:
+        """结束计时并生成记录"""
+        total_ns = time.monotonic_ns() - self.start_ns
+        return {
+            "module": self.module_name,
+            "time": self.timestamp,
+            "success": success,
+            "total_ns": total_ns,
+            "phases_ns": dict(self.phases),
+            **self.meta,
+        }
+
+
+def record(entry: Dict[str, object], log_path: str = "") -> None:
+    """保存重载记录到环形缓冲区，并可选追加到 JSON Lines 文件"""
+    history = dm.reload_history
+    if len(history) == history.maxlen:
+        # 最旧的记录将被移出缓冲区
+        _remove_total(history[0])
+    history.append(entry)
+    _add_total(entry)
+    # 批量重载的记录名为 "a+b"，不在插件列表中; 总耗时无法分摊到各插件，不计入其耗时摘要
+    modules = entry.get("batch_roots")
+    if modules is None:
+        # 下拉列表描述中的耗时摘要随之变化
+        catalog.mark(entry["module"])
+    if entry["success"]:
+        # 最近重载的插件在搜索结果中靠前
+        for module_name in modules or (entry["module"],):
+            search.touch(module_name)
+
+    phases = ", ".join(
+        f"{name} {ns / 1e6:.1f}" for name, ns in entry["phases_ns"].items())
+    log.debug("重载耗时 %s: %.1f ms (%s)",
+              entry["module"], entry["total_ns"] / 1e6, phases)
+
+    if log_path:
+        try:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            log.error("写入重载耗时文件失败: %s", e)
+
+
+def _percentile(sorted_values: List[int], pct: float) -> int:
+    """最近秩法计算百分位数"""
+    if not sorted_values:
+        return 0
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100.0 * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+def _update_percentiles(module_name: str) -> None:
+    totals = dm.reload_totals.get(module_name)
+    if not totals:
+        dm.reload_totals.pop(module_name, None)
+        dm.reload_percentiles.pop(module_name, None)
+        return
+    dm.reload_percentiles[module_name] = (
+        _percentile(totals, 50) / 1e6,
+        _percentile(totals, 95) / 1e6,
+        len(totals),
+    )
+
+
+def _add_total(entry: Dict[str, object]) -> None:
+    if not entry["success"]:
+        return
+    module_name = entry["module"]
+    bisect.insort(dm.reload_totals.setdefault(module_name, []), entry["total_ns"])
+    _update_percentiles(module_name)
+
+
+def _remove_total(entry: Dict[str, object]) -> None:
+    totals = dm.reload_totals.get(entry["module"])
+    if not entry["success"] or not totals:
+        return
+    index = bisect.bisect_left(totals, entry["total_ns"])
+    if index < len(totals) and totals[index] == entry["total_ns"]:
+        del totals[index]
+        _update_percentiles(entry["module"])
+
+
+def percentiles(module_name: str) -> Optional[Tuple[float, float, int]]:
+    """返回插件成功重载总耗时的 (p50 ms, p95 ms, 次数)，没有记录时返回 None
+
+    在 record() 中随缓冲区更新，刷新插件列表时只需读取
+    """
+    return dm.reload_percentiles.get(module_name)
+
+
+def describe(module_name: str) -> str:
+    """下拉列表描述中使用的耗时摘要"""
+    stats = percentiles(module_name)
+    if stats is None:
+        return ""
+    p50, p95, count = stats
+    return f" | Reload p50 {p50:.0f} ms, p95 {p95:.0f} ms (n={count})"
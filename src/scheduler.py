@@ -0,0 +1,197 @@
+# scheduler.py
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import bpy
+
+from . import broadcast, reload_job, ui, utils
+from .data_manager import dm
+from .log import log
+
+
+# 两个阶段之间让出的时间(秒)，期间界面可以刷新与响应输入
+_STEP_INTERVAL_S: float = 0.01
+# 等待后台预编译时的检查间隔(秒)
+_WAIT_INTERVAL_S: float = 0.05
+
+# 重载结束时的回调，参数为 (模块名, 是否成功, 耗时记录)；调度停止时记录只有 "error"
+ReloadCallback = Callable[[str, bool, Optional[Dict[str, object]]], None]
+
+
+class _Request:
+    """等待执行的重载请求（同一插件的多个请求合并为一个）"""
+
+    def __init__(self, module_name: str, profile: bool, propagate: bool):
+        self.module_name = module_name
+        self.profile = profile
+        # 成功后是否转发给其他 Blender 实例
+        self.propagate = propagate
+        self.requested = time.monotonic()
+        self.callbacks: List[ReloadCallback] = []
+        # 被合并的请求数
+        self.merged = 0
+
+
+# 等待执行的请求（按请求顺序）与正在执行的任务
+_pending: "OrderedDict[str, _Request]" = OrderedDict()
+_active: Optional[_Request] = None
+_job: Optional[reload_job.ReloadJob] = None
+_steps = None
+# 因被后续请求取代而丢弃的请求数
+dropped: int = 0
+
+
+def request(module_name: str, profile: bool = False, callback: Optional[ReloadCallback] = None,
+            propagate: bool = True) -> None:
+    """请求在后台分步重载插件，已有等待中的同一插件请求时合并"""
+    global dropped
+    pending = _pending.get(module_name)
+    if pending is None:
+        pending = _pending[module_name] = _Request(module_name, profile, propagate)
+        log.debug("已加入重载队列: %s", module_name)
+    else:
+        pending.merged += 1
+        pending.profile = pending.profile or profile
+        pending.propagate = pending.propagate or propagate
+        dropped += 1
+        log.debug("合并重复的重载请求: %s (%d)", module_name, pending.merged)
+    if callback is not None:
+        pending.callbacks.append(callback)
+
+    if bpy.app.background:
+        # 后台模式 (blender -b) 中定时器不会执行，直接同步重载
+        _run_blocking()
+        return
+    if not bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.register(_tick, first_interval=0.0)
+    _set_progress()
+
+
+def is_busy(module_name: Optional[str] = None) -> bool:
+    """是否有进行中或等待中的重载（可指定插件）"""
+    if module_name is None:
+        return _active is not None or bool(_pending)
+    return (_active is not None and _active.module_name == module_name) or module_name in _pending
+
+
+def pending_modules() -> List[str]:
+    """等待中的插件"""
+    return list(_pending)
+
+
+def _set_progress(phase: str = "") -> None:
+    """更新顶部栏显示的进度"""
+    if _active is None:
+        dm.reload_progress = None
+    else:
+        steps = reload_job.STEPS
+        index = steps.index(phase) if phase in steps else 0
+        dm.reload_progress = (_active.module_name, index / len(steps), phase, len(_pending))
+    ui.update_draw_state()
+    utils.redraw_topbar()
+
+
+def _start_next() -> None:
+    global _active, _job, _steps
+    module_name, req = _pending.popitem(last=False)
+    was_enabled = utils.is_addon_enabled(module_name)
+    _active = req
+    _job = reload_job.ReloadJob(module_name, was_enabled, profile=req.profile, blocking=False)
+    _steps = _job.steps()
+    log.info("开始后台重载: %s", module_name)
+
+
+def _run_blocking() -> None:
+    """同步执行所有等待中的请求（没有定时器的后台实例）"""
+    while _pending:
+        module_name, req = _pending.popitem(last=False)
+        job = reload_job.ReloadJob(module_name, utils.is_addon_enabled(module_name), profile=req.profile)
+        log.info("开始重载: %s", module_name)
+        try:
+            job.run()
+        except Exception as e:
+            log.error("重载出错: %s", e)
+        _complete(req, job)
+
+
+def _finish() -> None:
+    """当前任务结束: 刷新界面并通知请求方"""
+    global _active, _job, _steps
+    req, job = _active, _job
+    _active = _job = _steps = None
+    _complete(req, job)
+
+
+def _complete(req: _Request, job: reload_job.ReloadJob) -> None:
+    """记录任务结果、转发给其他实例并调用回调"""
+    for report_type, message in job.reports:
+        if "ERROR" in report_type:
+            log.error("%s", message)
+        else:
+            log.info("%s", message)
+    if job.success:
+        log.info("[ %s ] Reloaded!", req.module_name)
+        if req.propagate:
+            broadcast.after_reload(req.module_name)
+    else:
+        log.error("[ %s ] Reload Failed!", req.module_name)
+    for call_profile in dm.call_profiles:
+        log.info("%s", call_profile.summary())
+
+    utils.refresh_addon_list()
+    try:
+        utils.sync_addon_state(bpy.context)
+    except Exception:
+        pass
+    for callback in req.callbacks:
+        try:
+            callback(req.module_name, job.success, job.record)
+        except Exception as e:
+            log.error("重载回调出错: %s", e)
+
+
+def _tick() -> Optional[float]:
+    """定时器回调: 每次执行当前任务的一个阶段"""
+    if _active is None:
+        if not _pending:
+            _set_progress()
+            return None
+        _start_next()
+
+    try:
+        phase = next(_steps)
+    except StopIteration:
+        _finish()
+        _set_progress()
+        return _STEP_INTERVAL_S if _pending else None
+    except Exception as e:
+        log.error("后台重载出错: %s", e)
+        _finish()
+        _set_progress()
+        return _STEP_INTERVAL_S if _pending else None
+
+    _set_progress(phase)
+    return _WAIT_INTERVAL_S if phase == "precompile_wait" else _STEP_INTERVAL_S
+
+
+def shutdown() -> None:
+    """停止调度，放弃等待中的请求，中断进行中的任务"""
+    global _active, _job, _steps
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    if _steps is not None:
+        # 关闭生成器会记录失败的耗时
+        _steps.close()
+    # 通知等待结果的请求方（例如控制服务的连接），否则它们不会收到回复
+    requests = ([_active] if _active is not None else []) + list(_pending.values())
+    _active = _job = _steps = None
+    _pending.clear()
+    for req in requests:
+        for callback in req.callbacks:
+            try:
+                callback(req.module_name, False, {"error": "scheduler stopped"})
+            except Exception as e:
+                log.error("重载回调出错: %s", e)
+    dm.reload_progress = None
+    ui.update_draw_state()
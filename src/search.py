@@ -0,0 +1,180 @@
+# search.py
+import math
+import re
+import time
+from typing import List, Optional, Tuple
+
+from .data_manager import dm
+from .preferences import get_prefs
+
+
+# 有查询词时最多显示的搜索结果数（查询为空时显示全部插件）
+_MAX_RESULTS = 50
+# 使用频率的半衰期(秒)，最近使用的插件排在前面
+_HALF_LIFE_S: float = 3600.0
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# 匹配得分: 完全匹配 > 前缀 > 首字母 > 单词 > 单词前缀 > 子串 > 子序列
+_EXACT = 1000
+_PREFIX = 800
+_INITIALS = 700
+_WORD = 650
+_WORD_PREFIX = 600
+_SUBSTRING = 400
+_SUBSEQUENCE = 200
+
+
+class SearchKey:
+    """插件的预计算搜索键（模块名与显示名的小写形式、单词与首字母）"""
+
+    __slots__ = ("texts", "words", "initials")
+
+    def __init__(self, module_name: str, name: str):
+        module = module_name.lower()
+        display = name.lower()
+        # 扩展只比较最后一段 (bl_ext.user_default.my_addon -> my_addon)
+        short = module.rsplit(".", 1)[-1]
+        self.texts = tuple(dict.fromkeys((display, short, module)))
+        self.words = tuple(dict.fromkeys(_WORD_RE.findall(f"{display} {short}")))
+        self.initials = "".join(word[0] for word in _WORD_RE.findall(display))
+
+
+def _subsequence(token: str, text: str) -> Optional[int]:
+    """token 的字符按顺序出现在 text 中时返回得分（间隔越小越高）"""
+    position = -1
+    gaps = 0
+    for char in token:
+        found = text.find(char, position + 1)
+        if found < 0:
+            return None
+        if position >= 0:
+            gaps += found - position - 1
+        position = found
+    return max(1, _SUBSEQUENCE - gaps * 4)
+
+
+def _match(token: str, key: SearchKey) -> Optional[int]:
+    """单个查询词的最佳匹配得分，不匹配时返回 None"""
+    best = None
+    for text in key.texts:
+        if text == token:
+            return _EXACT
+        if text.startswith(token):
+            score = _PREFIX - (len(text) - len(token))
+        else:
+            index = text.find(token)
+            if index >= 0:
+                score = _SUBSTRING - index
+            else:
+                score = _subsequence(token, text)
+        if score is not None and (best is None or score > best):
+            best = score
+    if best is None or best < _WORD_PREFIX:
+        if key.initials.startswith(token) and len(token) > 1:
+            best = _INITIALS
+        elif token in key.words:
+            best = _WORD
+        elif any(word.startswith(token) for word in key.words):
+            best = max(best or 0, _WORD_PREFIX)
+    return best
+
+
+def score(query: str, key: SearchKey) -> Optional[int]:
+    """查询与搜索键的匹配得分（所有查询词都须匹配），不匹配时返回 None"""
+    total = 0
+    for token in query.lower().split():
+        matched = _match(token, key)
+        if matched is None:
+            return None
+        total += matched
+    return total
+
+
+def _decay(elapsed: float) -> float:
+    return math.pow(0.5, elapsed / _HALF_LIFE_S)
+
+
+def touch(module_name: str) -> None:
+    """记录一次使用（选择或重载）"""
+    now = time.monotonic()
+    value, last = dm.addon_usage.get(module_name, (0.0, now))
+    dm.addon_usage[module_name] = (value * _decay(now - last) + 1.0, now)
+
+
+def frecency(module_name: str, now: Optional[float] = None) -> float:
+    """按时间衰减的使用次数"""
+    usage = dm.addon_usage.get(module_name)
+    if usage is None:
+        return 0.0
+    value, last = usage
+    return value * _decay((now if now is not None else time.monotonic()) - last)
+
+
+def favorites() -> List[str]:
+    prefs = get_prefs()
+    if prefs is None:
+        return []
+    return [name for name in prefs.favorite_addons.split(",") if name]
+
+
+def is_favorite(module_name: str) -> bool:
+    return module_name in favorites()
+
+
+def toggle_favorite(module_name: str) -> bool:
+    """切换收藏状态，返回切换后是否为收藏"""
+    prefs = get_prefs()
+    if prefs is None:
+        return False
+    names = favorites()
+    if module_name in names:
+        names.remove(module_name)
+    else:
+        names.append(module_name)
+    prefs.favorite_addons = ",".join(names)
+    return module_name in names
+
+
+def rank(query: str, limit: Optional[int] = _MAX_RESULTS) -> List[Tuple[str, int]]:
+    """按匹配度、收藏与最近使用排序，返回 [(模块名, 得分)]
+
+    查询为空时只按收藏与最近使用排序，其余保持列表顺序; limit 为 None 时不限制数量
+    """
+    now = time.monotonic()
+    starred = set(favorites())
+    results = []
+    for module_name, index in dm.show_index.items():
+        entry = dm.catalog_entries.get(module_name)
+        if entry is None:
+            continue
+        matched = score(query, entry.search_key) if query.strip() else 0
+        if matched is None:
+            continue
+        boost = 150 if module_name in starred else 0
+        boost += int(50 * min(frecency(module_name, now), 4.0))
+        results.append((matched + boost, -index, module_name))
+    results.sort(reverse=True)
+    return [(module_name, total) for total, _, module_name in results[:limit]]
+
+
+def search_items(query: str) -> List[Tuple[str, str]]:
+    """搜索框使用的结果: (显示名, 说明)"""
+    starred = set(favorites())
+    items = []
+    # 查询为空时列出全部插件，不截断
+    for module_name, _ in rank(query, _MAX_RESULTS if query.strip() else None):
+        entry = dm.catalog_entries[module_name]
+        star = "★ " if module_name in starred else ""
+        # 附加下拉列表项的说明: 版本、启用状态与重载耗时
+        description = dm.show_lists[dm.show_index[module_name]][2]
+        items.append((dm.search_labels.get(module_name, entry.label), f"{star}{module_name} - {description}"))
+    return items
+
+
+def resolve(text: str) -> Optional[str]:
+    """搜索框中选定的显示名对应的模块名"""
+    module_name = dm.search_lookup.get(text)
+    if module_name is None and text in dm.show_index:
+        module_name = text
+    return module_name
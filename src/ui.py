@@ -1,50 +1,78 @@
 # ui.py
+import time
+from typing import Optional
+
 from .data_manager import dm
 
 
+# 插件名称在重载按钮上显示的最大字符数
+_MAX_LABEL = 20
+
+
+def update_draw_state(is_enabled: Optional[bool] = None) -> None:
+    """预先计算顶部栏的绘制内容，在选择、插件状态或重载进度变化时调用
+
+    is_enabled 省略时使用插件列表中记录的启用状态
+    """
+    module_name, name = dm.last_selected[0], dm.last_selected[1]
+    if module_name == "no_addons":  # 如果没有选择的插件
+        # 禁用状态的按钮，无选择时显示默认文本
+        icon, label = "COLORSET_02_VEC", name
+    else:
+        if is_enabled is None:
+            is_enabled = dm.enabled_map.get(module_name, False)
+        # 根据插件启用状态设置图标
+        icon = "COLORSET_03_VEC" if is_enabled else "COLORSET_02_VEC"
+        # 将插件名称限制在20个字符以内
+        label = name[:_MAX_LABEL] + "..." if len(name) > _MAX_LABEL else name
+
+    progress = None
+    if dm.reload_progress is not None:
+        progress_module, factor, phase, queued = dm.reload_progress
+        text = f"{progress_module}: {phase or 'queued'}"
+        if queued:
+            text += f" (+{queued})"
+        progress = (factor, text)
+
+    dm.topbar_state = (icon, label, progress)
+
+
 def draw_topbar_menu(self, context) -> None:
-    """在顶部菜单栏绘制插件界面"""
+    """在顶部菜单栏绘制插件界面（只输出预先计算的内容）"""
     # 获取当前区域对齐方式
     # https://www.cnblogs.com/letleon/p/18991793
-    alignment = context.region.alignment
-
     # 只在右侧区域绘制
-    if alignment == "RIGHT":
-        wm = context.window_manager
-        layout = self.layout
-
-        # 创建一行布局
-        row = layout.row(align=True)
-
-        # 📜 插件选择列表
-        row.operator("addonreloader.dropdown_list",
-                     text="", icon="DOWNARROW_HLT")
-
-        # ✨ 重新载入按钮
-        if dm.last_selected[0] != "no_addons":  # 如果有选择的插件
-            # 根据插件启用状态设置图标
-            is_enabled = wm.addonreloader.addon_state
-            icon = "COLORSET_03_VEC" if is_enabled else "COLORSET_02_VEC"
-
-            # 添加启用/禁用按钮
-            row.operator("addonreloader.enable_or_disable_addon",
-                         text="", icon=icon)
-
-            # 将插件名称限制在20个字符以内
-            shortened_name = dm.last_selected[1][:20]
-            if len(dm.last_selected[1]) > 20:
-                shortened_name += "..."
-            # 添加重载按钮
-            row.operator("addonreloader.reload_addon", text=shortened_name)
-        else:  # 如果没有选择的插件
-            # 禁用状态的按钮
-            row.operator(
-                "addonreloader.enable_or_disable_addon", text="", icon="COLORSET_02_VEC"
-            )
-            # 添加重载按钮（无选择时显示默认文本）
-            row.operator("addonreloader.reload_addon",
-                         text=dm.last_selected[1])
-
-        # 📂 打开插件目录按钮
-        row.operator("addonreloader.open_addon_folder",
-                     text="", icon="FILE_FOLDER")
+    if context.region.alignment != "RIGHT":
+        return
+    start = time.perf_counter_ns()
+    icon, label, progress = dm.topbar_state
+
+    # 创建一行布局
+    row = self.layout.row(align=True)
+
+    # 📜 插件选择列表
+    row.operator("addonreloader.dropdown_list", text="", icon="DOWNARROW_HLT")
+
+    # ✨ 启用/禁用与重载按钮
+    row.operator("addonreloader.enable_or_disable_addon", text="", icon=icon)
+    row.operator("addonreloader.reload_addon", text=label)
+
+    # ⏳ 后台重载进度
+    if progress is not None:
+        row.progress(factor=progress[0], type="BAR", text=progress[1])
+
+    # 🔗 批量重载按钮
+    row.operator("addonreloader.batch_reload", text="", icon="LINKED")
+
+    # 📂 打开插件目录按钮
+    row.operator("addonreloader.open_addon_folder", text="", icon="FILE_FOLDER")
+
+    dm.topbar_draw_count += 1
+    dm.topbar_draw_ns += time.perf_counter_ns() - start
+
+
+def draw_stats() -> str:
+    """顶部栏绘制次数与平均耗时"""
+    count = dm.topbar_draw_count
+    average_us = dm.topbar_draw_ns / count / 1000.0 if count else 0.0
+    return f"Top bar drawn {count} times, avg {average_us:.1f} µs"
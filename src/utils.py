@@ -1,14 +1,15 @@
 # utils.py
+import sys
+import time
+from typing import Dict, Iterable, Optional, Set
+
 import addon_utils
 import bpy
-import time
 
+from . import broadcast, catalog, control_server, precompile, reload_stats, search, ui, watcher
 from .data_manager import dm
 from .log import log
-
-
-_LAST_REFRESH_TS: float = 0.0
-_MIN_REFRESH_INTERVAL_S: float = 0.75
+from .preferences import get_prefs
 
 
 def get_my_module_names(package_name):
@@ -26,9 +27,45 @@ def get_my_module_names(package_name):
         log.error("Error getting self package name: %s", e)
 
 
+def _preference_addons() -> Set[str]:
+    """偏好设置中已启用的插件（bpy.context.preferences.addons）"""
+    try:
+        return set(bpy.context.preferences.addons.keys())
+    except Exception:
+        return set()
+
+
+def _module_enabled(module_name: str, preference_addons: Optional[Set[str]] = None) -> bool:
+    """插件的启用状态
+
+    已加载的模块以 addon_utils 设置的 __addon_enabled__ 为准（启用/禁用过程中它先于偏好设置更新）；
+    未加载或没有该属性的模块（例如被其他插件直接导入）按偏好设置中的插件集合判断，
+    与偏好设置界面的复选框一致；preference_addons 省略时只查询该插件
+    """
+    state = getattr(sys.modules.get(module_name), "__addon_enabled__", None)
+    if state is not None:
+        return bool(state)
+    if preference_addons is not None:
+        return module_name in preference_addons
+    try:
+        return bpy.context.preferences.addons.get(module_name) is not None
+    except Exception:
+        return False
+
+
+def enabled_snapshot(module_names: Iterable[str]) -> Dict[str, bool]:
+    """一次遍历得到多个插件的启用状态，偏好设置中的插件集合只读取一次"""
+    preference_addons = _preference_addons()
+    return {name: _module_enabled(name, preference_addons) for name in module_names}
+
+
 def is_addon_enabled(addon_name: str) -> bool:
-    """检查插件是否启用"""
-    return addon_utils.check(addon_name)[1]
+    """检查插件是否启用（使用插件列表的状态快照，状态可能已变化时直接读取）"""
+    if not dm.catalog_dirty and addon_name not in dm.catalog_stale:
+        is_enabled = dm.enabled_map.get(addon_name)
+        if is_enabled is not None:
+            return is_enabled
+    return _module_enabled(addon_name)
 
 
 def sync_addon_state(context: bpy.types.Context) -> None:
@@ -40,6 +77,8 @@ def sync_addon_state(context: bpy.types.Context) -> None:
             desired = dm.enabled_map.get(selected_idname)
             if desired is None:
                 desired = is_addon_enabled(selected_idname)
+        # 选择或启用状态变化后重新计算顶部栏内容
+        ui.update_draw_state(desired)
         group = context.window_manager.addonreloader
         if group.addon_state != desired:
             group.addon_state = desired
@@ -48,111 +87,96 @@ def sync_addon_state(context: bpy.types.Context) -> None:
 
 
 def refresh_addon_list(force: bool = False) -> None:
-    """刷新插件列表"""
+    """刷新插件列表
+
+    列表只在事件使其失效时完整重建（force 时总是重建），启用状态变化的插件只更新对应项，
+    没有变化时直接使用已构建的列表
+    """
+    if force:
+        catalog.invalidate("forced")
+    if dm.catalog_dirty:
+        _rebuild_addon_list()
+    elif dm.catalog_stale:
+        _update_addon_entries()
+
+
+def _update_addon_entries() -> None:
+    """只更新状态变化的插件对应的列表项"""
+    start = time.perf_counter()
+    stale, dm.catalog_stale = dm.catalog_stale, set()
+    updated = False
+    for module_name in stale:
+        entry = dm.catalog_entries.get(module_name)
+        if entry is not None and entry.excluded:
+            continue
+        index = dm.show_index.get(module_name)
+        if entry is None or index is None or catalog.entry_changed(entry):
+            # 新插件或入口文件已变化
+            _rebuild_addon_list()
+            return
+
+        is_enabled = _module_enabled(module_name)
+        dm.enabled_map[module_name] = is_enabled
+        item = entry.enum_item(is_enabled, index, reload_stats.describe(module_name))
+        dm.show_lists[index] = item
+        if dm.last_selected[0] == module_name:
+            dm.last_selected = item
+        updated = True
+
+    if updated:
+        dm.last_refresh_ms = (time.perf_counter() - start) * 1000.0
+        log.debug("Update List (%.2f ms, %d items)", dm.last_refresh_ms, len(stale))
+        sync_addon_state(bpy.context)
+
+
+def _rebuild_addon_list() -> None:
+    """重建插件列表"""
     log.debug("Refresh List")
-    global _LAST_REFRESH_TS
-    now = time.monotonic()
-    if not force and now - _LAST_REFRESH_TS < _MIN_REFRESH_INTERVAL_S:
-        return
-    _LAST_REFRESH_TS = now
+    start = time.perf_counter()
+    dm.catalog_dirty = False
+    dm.catalog_stale = set()
 
     # 插件列表
     addons_list = []
 
-    # 获取所有插件
-    all_addons = addon_utils.modules()
-
-    # 当前插件名称(Addon Reloader)
-    my_module = dm.my_addon_names
+    # 获取所有插件（插件目录未变化时使用 addon_utils 的缓存）
+    rescan = catalog.scan()
+    all_addons = addon_utils.modules(refresh=rescan)
 
     # 检查上次选择的插件是否仍在列表中
-    last_in_list = False
+    last_item = None
     dm.addons_paths = {}
-    dm.enabled_map = {}
+    dm.show_index = {}
+    dm.search_labels = {}
+    dm.search_lookup = {}
 
-    for addon in all_addons:
-        # 模块名称
-        module_name = addon.__name__
-        # 模块路径
-        module_file = addon.__file__
+    entries = [entry for entry in map(catalog.get_entry, all_addons) if not entry.excluded]
+    # 所有插件的启用状态（一次遍历）
+    dm.enabled_map = enabled_snapshot(entry.module_name for entry in entries)
 
-        # 模块信息
-        this_bl_info = addon.__dict__.get("bl_info", {})
-        bl_addon_version = this_bl_info.get("version", "0.0.0")
-        bl_addon_name = this_bl_info.get("name", "Unknown Name")
-
-        check_res = addon_utils.check(module_name)
-        is_enabled = check_res[1]
-        dm.enabled_map[module_name] = is_enabled
-        enabled_status = " [Enabled]" if is_enabled else " [Disabled]"
-        state_icon = "COLORSET_03_VEC" if is_enabled else "COLORSET_02_VEC"
+    for entry in entries:
+        module_name = entry.module_name
+        is_enabled = dm.enabled_map[module_name]
 
-        bl_addon_description = f"Version: {bl_addon_version}{enabled_status}"
+        # 添加到插件列表（无论是否启用）
+        dm.show_index[module_name] = len(addons_list)
+        addon_entry = entry.enum_item(
+            is_enabled, len(addons_list), reload_stats.describe(module_name))
+        addons_list.append(addon_entry)
 
         # 检查是否为上次选择的插件
-        if not last_in_list:
-            if dm.last_selected[0] == module_name:
-                last_in_list = True
-            else:
-                last_in_list = False
-
-        # 扩展
-        if addon_utils.check_extension(module_name):
-            # 分割模块名称
-            module_name_split = module_name.split(".")
-            # 排除自己(Addon Reloader)
-            if my_module["Extend"]:
-                if module_name == my_module["Extend"]:
-                    log.debug("Exclude this extension (Addon Reloader)")
-                    continue
-            else:
-                if module_name_split[-1] == my_module["Addon"]:
-                    log.debug("Exclude this addon (Addon Reloader)")
-                    continue
-
-            # 排除系统扩展
-            if (
-                len(module_name_split) > 1
-                and module_name_split[0] == "bl_ext"
-                and module_name_split[1] == "system"
-            ):
-                # log.debug("[%s] system extension", module_name)
-                continue
-
-            # 添加到扩展列表（无论是否启用）
-            addon_entry = (
-                module_name,
-                f"[E] {bl_addon_name}",
-                bl_addon_description,
-                state_icon,
-                len(addons_list),
-            )
-            addons_list.append(addon_entry)
-
-            # 添加到插件路径列表
-            dm.addons_paths[module_name] = module_file
-        else:  # 插件
-            # 排除自己(Addon Reloader)
-            if module_name == my_module["Addon"]:
-                continue
-
-            # 排除系统插件(v4.2+)
-            if "addons_core" in module_file:
-                # log.debug("[%s] system addon", module_name)
-                continue
-
-            # 添加到插件列表（无论是否启用）
-            addon_entry = (
-                module_name,
-                f"[A] {bl_addon_name}",
-                bl_addon_description,
-                state_icon,
-                len(addons_list),
-            )
-            addons_list.append(addon_entry)
+        if dm.last_selected[0] == module_name:
+            last_item = addon_entry
 
-            # 添加到插件路径列表
-            dm.addons_paths[module_name] = module_file
+        # 添加到插件路径列表
+        dm.addons_paths[module_name] = entry.file
+
+        # 搜索框显示名（重名时附加模块名以便区分）
+        label = entry.label
+        if label in dm.search_lookup:
+            label = f"{label} ({module_name})"
+        dm.search_labels[module_name] = label
+        dm.search_lookup[label] = module_name
 
     # 如列表为空则设置默认值
     if not addons_list:
@@ -162,17 +186,48 @@ def refresh_addon_list(force: bool = False) -> None:
         # 更新插件列表
         dm.show_lists = addons_list
         # 如果上次的选择为默认或本次列表中没有上次的选择时 更新选择
-        if not last_in_list or dm.last_selected[0] == "no_addons":
+        if last_item is None:
             dm.last_selected = addons_list[0]
             log.debug(
                 "No addon/extension selected, updating to: %s",
                 dm.last_selected[1],
             )
+        else:
+            # 使用本次构建的元组（启用状态可能已变化）
+            dm.last_selected = last_item
 
-    log.debug("Re-refresh List")
+    dm.last_refresh_ms = (time.perf_counter() - start) * 1000.0
+    log.debug("Re-refresh List (%.2f ms, rescan=%s)", dm.last_refresh_ms, rescan)
     sync_addon_state(bpy.context)
 
 
+def select_addon(context: bpy.types.Context, module_name: str) -> bool:
+    """选择插件（通过索引查找列表项），未在列表中时返回 False"""
+    index = dm.show_index.get(module_name)
+    if index is None:
+        return False
+    dm.last_selected = dm.show_lists[index]
+    search.touch(module_name)
+    sync_addon_state(context)
+
+    # 提前在后台编译所选插件的源码
+    prefs = get_prefs()
+    if prefs and prefs.precompile:
+        precompile.schedule_addon(module_name)
+    return True
+
+
+def redraw_topbar() -> None:
+    """请求重绘所有窗口的顶部栏"""
+    try:
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == "TOPBAR":
+                    area.tag_redraw()
+    except Exception:
+        return
+
+
 def check_blender_ready():
     """检查 Blender 是否已完全初始化，并在初始化后刷新插件列表"""
     try:
@@ -189,6 +244,17 @@ def check_blender_ready():
             # Blender 已就绪 刷新插件列表
             refresh_addon_list(force=True)
 
+            # 按偏好设置启动文件监视
+            prefs = get_prefs()
+            if prefs and prefs.auto_reload:
+                watcher.start(prefs.auto_reload_debounce, prefs.precompile)
+            # 按偏好设置启动控制服务
+            if prefs and prefs.control_server:
+                control_server.start(prefs.control_address)
+            # 按偏好设置登记本实例，接收其他实例转发的重载
+            if prefs and prefs.broadcast_reload and not broadcast.is_running():
+                broadcast.start(prefs.broadcast_dir, prefs.broadcast_timeout)
+
             # 停止定时器
             return None
         else:
@@ -0,0 +1,321 @@
+# watcher.py
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+import bpy
+
+from . import module_tracker, precompile
+from .data_manager import dm
+from .log import log
+
+
+# 定时器间隔(秒)
+_TICK_INTERVAL_S: float = 0.2
+# 轮询模式下扫描目录的间隔(秒)
+_POLL_INTERVAL_S: float = 1.0
+# 忽略的目录
+_IGNORED_DIRS = {"__pycache__", ".git", ".hg", ".svn", ".idea", ".vscode"}
+
+
+def _is_source(path: str) -> bool:
+    """是否为需要监视的源码文件"""
+    return path.endswith(".py")
+
+
+def _iter_dirs(root: str):
+    """遍历需要监视的目录"""
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [
+            d for d in dirnames if d not in _IGNORED_DIRS and not d.startswith(".")]
+        yield dirpath
+
+
+class _PollingBackend:
+    """通过定期 stat 检测变更的后备方案"""
+
+    def __init__(self, root: str, single_file: Optional[str]):
+        self.root = root
+        self.single_file = single_file
+        self.mtimes: Dict[str, tuple] = self._scan()
+        self.next_scan = time.monotonic() + _POLL_INTERVAL_S
+
+    def _scan(self) -> Dict[str, tuple]:
+        """扫描所有源码文件的 mtime 与大小"""
+        result = {}
+        files: List[str] = []
+        if self.single_file:
+            files.append(self.single_file)
+        else:
+            for dirpath in _iter_dirs(self.root):
+                try:
+                    with os.scandir(dirpath) as it:
+                        files.extend(
+                            e.path for e in it if e.is_file() and _is_source(e.name))
+                except OSError:
+                    continue
+        for path in files:
+            try:
+                st = os.stat(path)
+                result[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return result
+
+    def poll(self) -> Set[str]:
+        """返回自上次调用以来变更的文件"""
+        now = time.monotonic()
+        if now < self.next_scan:
+            return set()
+        self.next_scan = now + _POLL_INTERVAL_S
+
+        current = self._scan()
+        changed = {p for p, m in current.items() if self.mtimes.get(p) != m}
+        changed.update(set(self.mtimes) - set(current))
+        self.mtimes = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyBackend:
+    """Linux inotify 后端（非阻塞读取，由定时器驱动）"""
+
+    _IN_NONBLOCK = os.O_NONBLOCK
+    _IN_CLOEXEC = 0o2000000
+    _IN_MODIFY = 0x00000002
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_ISDIR = 0x40000000
+    _MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM
+             | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE)
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, root: str, single_file: Optional[str]):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.single_file = single_file
+        self.watches: Dict[int, str] = {}
+        if single_file:
+            self._add_watch(os.path.dirname(single_file))
+        else:
+            for dirpath in _iter_dirs(root):
+                self._add_watch(dirpath)
+
+    def _add_watch(self, path: str) -> None:
+        """为目录添加监视"""
+        wd = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(path), ctypes.c_uint32(self._MASK))
+        if wd < 0:
+            log.debug("添加 inotify 监视失败: %s", path)
+            return
+        self.watches[wd] = path
+
+    def poll(self) -> Set[str]:
+        """读取所有待处理事件，返回变更的文件"""
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                log.debug("读取 inotify 事件失败: %s", e)
+                break
+            if not data:
+                break
+
+            offset = 0
+            while offset + self._EVENT.size <= len(data):
+                wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                directory = self.watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+
+                if mask & self._IN_ISDIR:
+                    # 新建的子目录也需要监视
+                    if mask & (self._IN_CREATE | self._IN_MOVED_TO) and not self.single_file:
+                        for dirpath in _iter_dirs(path):
+                            self._add_watch(dirpath)
+                    continue
+                if self.single_file and path != self.single_file:
+                    continue
+                if _is_source(path):
+                    changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class _FileWatcher:
+    """监视所选插件的源码并在变更后自动重载"""
+
+    def __init__(self):
+        self.debounce_s: float = 0.5
+        # 检测到变更后立即在后台预编译
+        self.precompile: bool = False
+        self.target: Optional[str] = None
+        self.backend = None
+        # 待处理的变更文件与触发重载的时间点
+        self.pending: Set[str] = set()
+        self.deadline: float = 0.0
+        # 文件内容指纹，用于跳过内容未变化的保存
+        self.stamps: Dict[str, module_tracker.FileStamp] = {}
+
+    def _attach(self, module_name: str) -> None:
+        """切换监视目标"""
+        self._detach()
+        self.target = module_name
+        path = dm.addons_paths.get(module_name)
+        if not path:
+            return
+
+        # 单文件插件只监视该文件
+        if os.path.basename(path) == "__init__.py":
+            root, single_file = os.path.dirname(path), None
+        else:
+            root, single_file = os.path.dirname(path), path
+
+        backend_cls = _InotifyBackend if sys.platform.startswith("linux") else _PollingBackend
+        try:
+            self.backend = backend_cls(root, single_file)
+        except Exception as e:
+            log.debug("inotify 不可用，改用轮询: %s", e)
+            self.backend = _PollingBackend(root, single_file)
+
+        files = [single_file] if single_file else [
+            os.path.join(d, f) for d in _iter_dirs(root)
+            for f in os.listdir(d) if _is_source(f)
+        ]
+        self.stamps = {}
+        for file in files:
+            stamp = module_tracker.file_stamp(file)
+            if stamp:
+                self.stamps[file] = stamp
+        log.debug("开始监视: %s (%s, %d 个文件)", module_name,
+                  type(self.backend).__name__, len(self.stamps))
+
+    def _detach(self) -> None:
+        """停止监视当前目标"""
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = None
+        self.target = None
+        self.pending.clear()
+        self.stamps = {}
+
+    def _content_changed(self, paths: Set[str]) -> bool:
+        """按内容哈希判断是否有实际变更，并更新指纹"""
+        changed = False
+        for path in paths:
+            old = self.stamps.get(path)
+            new = module_tracker.file_stamp(path, old)
+            if new is None:
+                if self.stamps.pop(path, None) is not None:
+                    changed = True
+                continue
+            self.stamps[path] = new
+            if old is None or old[2] != new[2]:
+                changed = True
+        return changed
+
+    def tick(self) -> float:
+        """定时器回调"""
+        selected = dm.last_selected[0]
+        if selected == "no_addons":
+            self._detach()
+            return _TICK_INTERVAL_S
+        if selected != self.target or self.backend is None:
+            self._attach(selected)
+            if self.backend is None:
+                return _TICK_INTERVAL_S
+
+        now = time.monotonic()
+        changed = self.backend.poll()
+        if changed:
+            if self.precompile:
+                precompile.schedule(changed)
+            # 合并一段时间内的连续保存
+            self.pending.update(changed)
+            self.deadline = now + self.debounce_s
+            return _TICK_INTERVAL_S
+
+        if self.pending and now >= self.deadline:
+            pending, self.pending = self.pending, set()
+            if not self._content_changed(pending):
+                log.debug("文件内容未变化，跳过重载")
+                return _TICK_INTERVAL_S
+            log.info("检测到源码变更，自动重载: %s", selected)
+            self._reload()
+        return _TICK_INTERVAL_S
+
+    def _reload(self) -> None:
+        """触发重载操作"""
+        try:
+            bpy.ops.addonreloader.reload_addon()
+        except Exception as e:
+            log.error("自动重载失败: %s", e)
+
+
+_watcher = _FileWatcher()
+
+
+def _tick() -> Optional[float]:
+    try:
+        return _watcher.tick()
+    except Exception as e:
+        log.error("文件监视出错: %s", e)
+        return _TICK_INTERVAL_S
+
+
+def is_running() -> bool:
+    """监视是否已启动"""
+    return bpy.app.timers.is_registered(_tick)
+
+
+def start(debounce_s: float = 0.5, precompile_changes: bool = False) -> None:
+    """启动文件监视"""
+    _watcher.debounce_s = debounce_s
+    _watcher.precompile = precompile_changes
+    if not is_running():
+        bpy.app.timers.register(_tick, first_interval=_TICK_INTERVAL_S, persistent=True)
+        log.info("文件监视已启动")
+
+
+def stop() -> None:
+    """停止文件监视"""
+    if is_running():
+        bpy.app.timers.unregister(_tick)
+        log.info("文件监视已停止")
+    _watcher._detach()
+
+
+def configure(enabled: bool, debounce_s: float, precompile_changes: bool) -> None:
+    """根据偏好设置启动或停止文件监视"""
+    if enabled:
+        start(debounce_s, precompile_changes)
+    else:
+        stop()